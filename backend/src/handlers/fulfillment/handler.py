@@ -9,18 +9,22 @@ import json
 import logging
 import os
 import sys
-import uuid
 from datetime import datetime, timezone
 import time
 
 # Add shared module to path
 sys.path.insert(0, '/opt/python')
 
+from shared import deadline
 from shared.config import Config
 from shared.dynamo_client import DynamoClient
 from shared.comprehend_client import ComprehendClient
 from shared.bedrock_client import BedrockClient
-from shared.models import AnalyticsEvent
+from shared.faq_index import FAQIndex
+from shared.faq_search import FAQSearchEngine
+from shared.faq_vectors import SemanticFAQMatcher
+from shared.lex_client import ANALYTICS_ATTRIBUTE, answer_attributes, decode_history, encode_analytics_events
+from shared.models import AnalyticsEvent, new_event_id
 
 # Configure logging
 logger = logging.getLogger()
@@ -31,6 +35,19 @@ dynamo_client = DynamoClient()
 comprehend_client = ComprehendClient()
 bedrock_client = BedrockClient()
 
+# Knowledge base index, loaded once per container and refreshed on a TTL
+faq_index = FAQIndex(
+    dynamo_client.get_all_faqs,
+    ttl_seconds=Config.FAQ_INDEX_TTL_SECONDS,
+    prebuilt=FAQSearchEngine.load(Config.FAQ_VECTORS_DIR),
+)
+
+# Precomputed FAQ vectors from the layer (None if unavailable)
+semantic_matcher = SemanticFAQMatcher.load(Config.FAQ_VECTORS_DIR)
+
+# Analytics events recorded during the current invocation
+analytics_events = []
+
 
 def lambda_handler(event: dict, context) -> dict:
     """
@@ -40,6 +57,8 @@ def lambda_handler(event: dict, context) -> dict:
     It processes the intent and returns the appropriate response.
     """
     logger.info(f"Fulfillment event: {json.dumps(event)}")
+    deadline.start(context)
+    analytics_events.clear()
     
     try:
         intent_name = event['sessionState']['intent']['name']
@@ -55,18 +74,56 @@ def lambda_handler(event: dict, context) -> dict:
         
         # Route to appropriate handler
         if intent_name == 'FAQQueryIntent':
-            return handle_faq_query(event, slots, language)
+            response = handle_faq_query(event, slots, language)
         elif intent_name == 'FeedbackIntent':
-            return handle_feedback(event, slots, language, session_id)
+            response = handle_feedback(event, slots, language, session_id)
         elif intent_name == 'FallbackIntent':
-            return handle_fallback(event, input_transcript, language)
+            response = handle_fallback(event, input_transcript, language, session_id)
         else:
             # For other intents, let Lex handle with default responses
-            return close_intent(event, 'Fulfilled')
+            response = close_intent(event, 'Fulfilled')
             
     except Exception as e:
         logger.error(f"Error in fulfillment: {e}")
-        return build_error_response(event)
+        response = build_error_response(event)
+    finally:
+        deadline.clear()
+    
+    return hand_off_analytics(event, response)
+
+
+def hand_off_analytics(event: dict, response: dict) -> dict:
+    """
+    Hand this invocation's analytics events to the orchestrator.
+    
+    Writing them here would delay the answer to Lex (and so to the user),
+    so they travel back in the session attributes and the orchestrator
+    writes them after replying. Without a turn ID (Lex was not called by
+    the orchestrator) or room for them, they are written here in a single
+    attempt, without retries or backoff sleeps.
+    """
+    events = list(analytics_events)
+    analytics_events.clear()
+    session_state = response.setdefault('sessionState', {})
+    attributes = session_state.get('sessionAttributes')
+    
+    if not events:
+        # Events handed back on an earlier turn stay in the session otherwise
+        if attributes and ANALYTICS_ATTRIBUTE in attributes:
+            session_state['sessionAttributes'] = {k: v for k, v in attributes.items() if k != ANALYTICS_ATTRIBUTE}
+        return response
+    
+    handed = encode_analytics_events(event, events, Config.LEX_ANALYTICS_MAX_BYTES)
+    if handed is not None:
+        if attributes is None:
+            attributes = event.get('sessionState', {}).get('sessionAttributes') or {}
+        session_state['sessionAttributes'] = {**attributes, **handed}
+        return response
+    
+    for analytics_event in events:
+        dynamo_client.buffer_analytics_event(analytics_event)
+    dynamo_client.flush_analytics_events(max_attempts=1)
+    return response
 
 
 def handle_faq_query(event: dict, slots: dict, language: str) -> dict:
@@ -90,11 +147,23 @@ def handle_faq_query(event: dict, slots: dict, language: str) -> dict:
     
     logger.info(f"Searching FAQ for topic: {topic}")
     
-    # Search in knowledge base
-    faqs = dynamo_client.search_faqs_by_keyword(topic)
+    # Search in knowledge base: exact keyword matches ranked by BM25,
+    # or the best BM25 match over the whole knowledge base otherwise.
+    # The transcript may have been translated to Spanish by the orchestrator,
+    # so the query is tokenized with every language's stopwords.
+    query = f"{topic} {event.get('inputTranscript', '')}"
+    faqs = faq_index.search(topic)
+    match_type = 'keyword'
+    
+    if len(faqs) > 1:
+        faqs = faq_index.rank(faqs, query)
+    elif not faqs:
+        results = faq_index.search_ranked(query, top_k=1, min_score=Config.FAQ_MIN_SCORE)
+        faqs = [result.faq for result in results]
+        match_type = 'bm25'
     
     if faqs:
-        # Return the first matching FAQ
+        # Return the best matching FAQ
         faq = faqs[0]
         answer = faq.get_answer(language)
         
@@ -103,6 +172,7 @@ def handle_faq_query(event: dict, slots: dict, language: str) -> dict:
             'topic': topic,
             'found': True,
             'category': faq.category,
+            'match': match_type,
         })
         
         return close_intent(event, 'Fulfilled', answer)
@@ -161,7 +231,7 @@ def handle_feedback(event: dict, slots: dict, language: str, session_id: str) ->
     return close_intent(event, 'Fulfilled', thanks_msg)
 
 
-def handle_fallback(event: dict, input_text: str, language: str) -> dict:
+def handle_fallback(event: dict, input_text: str, language: str, session_id: str) -> dict:
     """
     Handle fallback intent with intelligent response using Bedrock.
     
@@ -174,26 +244,50 @@ def handle_fallback(event: dict, input_text: str, language: str) -> dict:
         'input': input_text,
     })
     
-    # Use Bedrock to generate response
+    # Paraphrased FAQ questions are answered from the knowledge base
+    match = None
+    if semantic_matcher:
+        match = semantic_matcher.match(
+            input_text, Config.FAQ_SEMANTIC_MIN_SCORE, Config.FAQ_SEMANTIC_MIN_MARGIN, faq_index.faqs,
+        )
+    if match:
+        logger.info(f"Semantic FAQ match: {match.faq.topic_id} ({match.score:.2f}, margin {match.margin:.2f})")
+        save_analytics_event('FAQ_QUERY', {
+            'topic': match.faq.topic_id,
+            'found': True,
+            'category': match.faq.category,
+            'match': 'semantic',
+        })
+        return close_intent(
+            event, 'Fulfilled', match.faq.get_answer(language),
+            session_attributes=answer_attributes(event, 'faq_semantic'),
+        )
+    
+    # Use Bedrock to generate response (the only generation for this turn:
+    # the orchestrator reuses it through the session attributes)
     try:
-        # Fetch conversation history for context
+        # Conversation history for context: carried by the orchestrator in
+        # the request attributes, or read from DynamoDB if missing
         history_context = ""
         try:
-            # Get last 5 messages
-            history = dynamo_client.get_conversation_history(session_id, limit=5)
-            # Reverse to have oldest first
-            history.reverse()
-            
-            if history:
-                history_text = []
-                for msg in history:
-                    if msg.user_message:
-                        history_text.append(f"User: {msg.user_message}")
-                    if msg.bot_response:
-                        history_text.append(f"Assistant: {msg.bot_response}")
-                
-                history_context = "\n".join(history_text)
+            turns = decode_history(event)
+            if turns is None:
+                # Get last 5 messages
+                history = dynamo_client.get_conversation_history(session_id, limit=5)
+                # Reverse to have oldest first
+                history.reverse()
+                turns = [(msg.user_message, msg.bot_response) for msg in history]
                 logger.info(f"Retrieved {len(history)} messages for context")
+            else:
+                logger.info(f"Using {len(turns)} carried turns for context")
+            
+            history_text = []
+            for user_message, bot_response in turns:
+                if user_message:
+                    history_text.append(f"User: {user_message}")
+                if bot_response:
+                    history_text.append(f"Assistant: {bot_response}")
+            history_context = "\n".join(history_text)
         except Exception as h_e:
             logger.warning(f"Failed to retrieve history: {h_e}")
 
@@ -205,19 +299,26 @@ def handle_fallback(event: dict, input_text: str, language: str) -> dict:
         # Add some basic info about the business/bot if we want the AI to be aware
         # context += " You are a helpful assistant for an e-commerce store."
         
+        generations = bedrock_client.generations
         ai_response = bedrock_client.generate_response(input_text, context)
-        return close_intent(event, 'Fulfilled', ai_response)
+        return close_intent(
+            event, 'Fulfilled', ai_response,
+            session_attributes=answer_attributes(event, 'bedrock', bedrock_client.generations - generations),
+        )
         
     except Exception as e:
         logger.error(f"Error using Bedrock in fallback: {e}")
         # Default fallback if AI fails
-        return close_intent(event, 'Fulfilled', get_message(language, 'fallback_default'))
+        return close_intent(
+            event, 'Fulfilled', get_message(language, 'fallback_default'),
+            session_attributes=answer_attributes(event, 'fallback_default'),
+        )
 
 
 # Response builders
 
-def close_intent(event: dict, state: str, message: str = None) -> dict:
-    """Close the intent with a response."""
+def close_intent(event: dict, state: str, message: str = None, session_attributes: dict = None) -> dict:
+    """Close the intent with a response, merging in any extra session attributes."""
     response = {
         'sessionState': {
             'dialogAction': {
@@ -230,6 +331,12 @@ def close_intent(event: dict, state: str, message: str = None) -> dict:
         },
     }
     
+    if session_attributes:
+        response['sessionState']['sessionAttributes'] = {
+            **event['sessionState'].get('sessionAttributes', {}),
+            **session_attributes,
+        }
+    
     if message:
         response['messages'] = [
             {
@@ -324,16 +431,16 @@ def get_message(language: str, key: str) -> str:
 
 
 def save_analytics_event(metric_type: str, metadata: dict) -> None:
-    """Save an analytics event."""
+    """Record an analytics event; handed to the orchestrator by hand_off_analytics."""
     try:
         event = AnalyticsEvent(
             metric_type=metric_type,
-            event_id=str(uuid.uuid4()),
+            event_id=new_event_id(),
             date=datetime.now(timezone.utc).strftime('%Y-%m-%d'),
             value=1,
             metadata=metadata,
             ttl=int(time.time()) + (30 * 24 * 60 * 60),
         )
-        dynamo_client.save_analytics_event(event)
+        analytics_events.append(event)
     except Exception as e:
         logger.warning(f"Failed to save analytics: {e}")
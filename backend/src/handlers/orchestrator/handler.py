@@ -1,28 +1,49 @@
 """
 Lambda Orchestrator Handler.
 
-Uses Claude 3 Haiku via Amazon Bedrock for AI-powered responses.
+Uses Amazon Bedrock for AI-powered responses, with a generation profile
+(model, max tokens, temperature, reasoning) chosen per intent and sentiment.
 """
 
 import json
 import logging
 import os
 import sys
+import threading
 import uuid
 from datetime import datetime, timezone
 import time
+from itertools import islice
+from typing import List, Optional, Tuple
 
 sys.path.insert(0, '/opt/python')
 
-import boto3
-
+from shared import deadline
 from shared.config import Config
+from shared.apigateway_client import ApiGatewayClientPool
 from shared.dynamo_client import DynamoClient
-from shared.lex_client import LexClient
+from shared.lex_client import (
+    HISTORY_ATTRIBUTE, TURN_ID_ATTRIBUTE, LexClient,
+    encode_history, get_fulfillment_analytics, get_fulfillment_answer,
+)
 from shared.comprehend_client import ComprehendClient
 from shared.translate_client import TranslateClient
+from shared.translation_memory import build_translation_memory
 from shared.bedrock_client import BedrockClient
-from shared.models import Message, AnalyticsEvent
+from shared.context_builder import BuiltContext, ContextBuilder, estimate_tokens
+from shared.faq_index import FAQIndex
+from shared.faq_search import FAQSearchEngine
+from shared.faq_vectors import SemanticFAQMatcher
+from shared.intent_classifier import IntentClassifier
+from shared.generation_profiles import GenerationProfile, select_profile
+from shared.response_cache import LRUCache, ResponseCache
+from shared.response_router import TIER_FULFILLMENT, ResponseRouter, RoutedResponse
+from shared.models import Message, SessionState, AnalyticsEvent, new_event_id
+from shared.pipeline import Stage, StageExecutor
+from shared.speculation import (
+    DISCARD_CACHED, DISCARD_CONTEXT, DISCARD_PROFILE, DISCARD_ROUTED,
+    SpeculativeGeneration, Speculator,
+)
 
 logger = logging.getLogger()
 logger.setLevel(getattr(logging, Config.LOG_LEVEL))
@@ -31,8 +52,34 @@ logger.setLevel(getattr(logging, Config.LOG_LEVEL))
 dynamo_client = DynamoClient()
 lex_client = LexClient()
 comprehend_client = ComprehendClient()
-translate_client = TranslateClient()
+translate_client = TranslateClient(memory=build_translation_memory(dynamo_client))
 bedrock_client = BedrockClient()
+stage_executor = StageExecutor(max_workers=Config.PIPELINE_MAX_WORKERS)
+api_client_pool = ApiGatewayClientPool(max_size=Config.APIGW_CLIENT_POOL_SIZE)
+semantic_matcher = SemanticFAQMatcher.load(Config.FAQ_VECTORS_DIR)
+faq_index = FAQIndex(
+    dynamo_client.get_all_faqs,
+    ttl_seconds=Config.FAQ_INDEX_TTL_SECONDS,
+    prebuilt=FAQSearchEngine.load(Config.FAQ_VECTORS_DIR),
+)
+response_router = ResponseRouter(faq_index=faq_index, semantic_matcher=semantic_matcher)
+response_cache = ResponseCache(
+    LRUCache(
+        max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+        ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+    ),
+    shared=dynamo_client if Config.RESPONSE_CACHE_SHARED else None,
+    shared_ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+    history_policy=Config.RESPONSE_CACHE_HISTORY_POLICY,
+)
+intent_classifier = IntentClassifier.load() if Config.INTENT_CLASSIFIER_ENABLED else None
+context_builder = ContextBuilder(
+    Config.CONTEXT_TOKEN_BUDGET,
+    Config.CONTEXT_MIN_TURN_TOKENS,
+    Config.CONTEXT_SUMMARY_TOKENS,
+)
+speculator = Speculator(BedrockClient, Config.BEDROCK_SPECULATIVE_WORKERS) if Config.BEDROCK_SPECULATIVE else None
 
 
 def lambda_handler(event: dict, context) -> dict:
@@ -42,6 +89,9 @@ def lambda_handler(event: dict, context) -> dict:
     route_key = event.get('requestContext', {}).get('routeKey', '$default')
     connection_id = event.get('requestContext', {}).get('connectionId', '')
     
+    # AWS calls below are budgeted against the time this invocation has left
+    deadline.start(context)
+    
     try:
         if route_key == '$connect':
             return handle_connect(connection_id, event)
@@ -52,6 +102,10 @@ def lambda_handler(event: dict, context) -> dict:
     except Exception as e:
         logger.error(f"Error handling {route_key}: {e}")
         return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+    finally:
+        # Messages have already been posted to the client by now
+        deadline.clear()
+        dynamo_client.flush_analytics_events()
 
 
 def handle_connect(connection_id: str, event: dict) -> dict:
@@ -72,6 +126,11 @@ def handle_message(connection_id: str, event: dict) -> dict:
     """
     Handle incoming chat message with AI-powered responses via Claude.
     """
+    speculation = None
+    # Every speculation started for this turn, and whether the turn has
+    # ended: one still starting when the turn fails is cancelled either way
+    speculations: List[SpeculativeGeneration] = []
+    turn_over = threading.Event()
     try:
         body = json.loads(event.get('body', '{}'))
         user_message = body.get('message', '')
@@ -83,6 +142,8 @@ def handle_message(connection_id: str, event: dict) -> dict:
             return send_response(connection_id, event, {'error': 'No message provided'})
         
         logger.info(f"Processing message from {user_id}: {user_message[:50]}...")
+        generations_before = count_generations()
+        turn_id = new_event_id()
         
         # Step 1: Detect language
         if preferred_language:
@@ -92,37 +153,182 @@ def handle_message(connection_id: str, event: dict) -> dict:
         
         logger.info(f"Language: {detected_language}")
         
-        # Step 2: Analyze sentiment
-        sentiment = comprehend_client.detect_sentiment(user_message, detected_language)
-        logger.info(f"Sentiment: {sentiment['sentiment']}")
+        # Steps 2-4: sentiment, intent (via translation) and history run
+        # concurrently; Lex also waits for the history (a single GetItem)
+        # to carry it to fulfillment
+        locale_id = Config.get_lex_locale(detected_language)
+        intent_guess = intent_classifier.classify(user_message) if intent_classifier else (None, 0.0)
+        local_intent = classify_locally(intent_guess)
         
-        # Step 3: Send to Lex for intent classification
-        message_for_lex = user_message
-        if detected_language != 'es':
-            message_for_lex = translate_client.translate_to_spanish(user_message, detected_language)
+        def translate_for_lex():
+            if detected_language != 'es':
+                return translate_client.translate_to_spanish(user_message, detected_language)
+            return user_message
         
-        locale_id = Config.get_lex_locale(detected_language)
-        lex_response = lex_client.recognize_text(
-            session_id=session_id,
-            text=message_for_lex,
-            locale_id=locale_id,
-        )
+        def recognize_intent(message_for_lex, history):
+            request_attributes = {TURN_ID_ATTRIBUTE: turn_id}
+            # Carry the recent turns so fulfillment needs no history query
+            carried = encode_history(history.turns, Config.LEX_HISTORY_MAX_BYTES) if Config.LEX_HISTORY_MAX_BYTES else None
+            if carried is not None:
+                request_attributes[HISTORY_ATTRIBUTE] = carried
+            return lex_client.recognize_text(
+                session_id=session_id,
+                text=message_for_lex,
+                locale_id=locale_id,
+                request_attributes=request_attributes,
+                use_cache=not continues_lex_dialog(history),
+            )
         
-        intent_name = lex_response['intent_name']
-        logger.info(f"Detected intent: {intent_name}")
+        def recognize_locally(history):
+            # A Lex dialog may still be eliciting a slot: let Lex see the reply
+            if continues_lex_dialog(history):
+                return recognize_intent(translate_for_lex(), history)
+            intent, similarity = local_intent
+            # The router thresholds are on Lex's nluConfidence scale
+            confidence = intent_classifier.calibrated(similarity)
+            logger.info(f"Local intent {intent} (similarity {similarity:.2f}, confidence {confidence}), skipping Lex")
+            return {
+                'intent_name': intent,
+                'confidence': confidence,
+                'intent_state': 'Fulfilled',
+                'messages': [],
+                'session_state': {},
+                'session_attributes': {},
+                'slots': {},
+                'source': 'local',
+            }
         
-        # Step 4: Get conversation history for memory
-        conversation_history = dynamo_client.get_conversation_history(session_id, limit=5)
-        history_text = format_conversation_history(conversation_history)
-        logger.info(f"Retrieved {len(conversation_history)} messages from history")
+        stages = [
+            Stage('sentiment', lambda: comprehend_client.detect_sentiment(user_message, detected_language)),
+            Stage('history', lambda: load_session_state(session_id)),
+        ]
+        if local_intent:
+            stages.append(Stage('lex', recognize_locally, depends_on=('history',)))
+        else:
+            stages.append(Stage('message_for_lex', translate_for_lex))
+            stages.append(Stage('lex', recognize_intent, depends_on=('message_for_lex', 'history')))
+        if speculator and not local_intent:
+            # Start generating as soon as sentiment and history are in,
+            # while Lex (and Translate) are still classifying the message
+            def speculate(sentiment, history):
+                speculation = start_speculation(
+                    user_message, detected_language, intent_guess, sentiment['sentiment'], history,
+                )
+                if speculation:
+                    speculations.append(speculation)
+                    if turn_over.is_set():
+                        speculation.cancel()
+                return speculation
+            
+            stages.append(Stage('speculation', speculate, depends_on=('sentiment', 'history')))
+        enrichment = stage_executor.run(stages)
+        speculation = enrichment.results.get('speculation')
+        
+        sentiment = enrichment['sentiment']
+        logger.info(f"Sentiment: {sentiment['sentiment']}")
+        
+        intent_name = enrichment['lex']['intent_name']
+        logger.info(f"Detected intent: {intent_name} (Lex cache: {lex_client.get_cache_stats()})")
         
-        # Step 5: Build context with history
-        context = build_context(intent_name, sentiment['sentiment'], detected_language, history_text)
+        # Conversation history for memory
+        session_state = enrichment['history']
+        logger.info(f"Retrieved {len(session_state.turns)} turns from session state")
         
-        # Step 6: Generate AI response using DeepSeek
-        bot_response = bedrock_client.generate_response(user_message, context)
+        # Step 5: Reuse the answer fulfillment already gave for this turn, or
+        # answer confidently classified intents from templates, the knowledge
+        # base or Lex itself; everything else goes to the LLM
+        route = None
+        # Fulfillment hands its analytics events back instead of writing
+        # them before answering Lex; they are flushed after the reply
+        for analytics_event in get_fulfillment_analytics(enrichment['lex'], turn_id):
+            dynamo_client.buffer_analytics_event(analytics_event)
+        fulfilled = get_fulfillment_answer(enrichment['lex'], turn_id)
+        if fulfilled:
+            route = RoutedResponse(TIER_FULFILLMENT, fulfilled['text'], fulfilled['source'])
+            logger.info(f"Reusing fulfillment answer ({fulfilled['source']})")
+        elif Config.RESPONSE_ROUTER_ENABLED:
+            route = response_router.route(
+                intent_name,
+                enrichment['lex'].get('confidence'),
+                detected_language,
+                user_message,
+                slots=enrichment['lex'].get('slots'),
+                sentiment=sentiment['sentiment'],
+                lex_messages=enrichment['lex'].get('messages'),
+            )
+            logger.info(f"Route: {route.tier if route else 'llm'} {response_router.get_stats()}")
         
-        # Step 6: Save message to DynamoDB
+        ttft_ms = None
+        built_context = None
+        profile = None
+        cache_status = 'disabled'
+        speculation_result = None
+        speculation_wasted = None
+        if route:
+            bot_response = route.text
+            response_source = route.tier
+            if speculation:
+                speculation_result = DISCARD_ROUTED
+                speculation_wasted = speculator.discard(speculation, DISCARD_ROUTED)
+        else:
+            # Steps 6-7: Build context with history, within the token budget,
+            # and pick the intent's generation profile. The profile follows
+            # from intent and sentiment, both already in the cache key (the
+            # sentiment through the context hint)
+            built_context, profile = generation_request(
+                intent_name, sentiment['sentiment'], detected_language, session_state,
+            )
+            context = built_context.text
+            has_history = bool(built_context.turns_included or built_context.summary_included)
+            logger.info(
+                f"Context: {built_context.tokens}/{built_context.budget} tokens, "
+                f"{built_context.turns_included} turns ({built_context.turns_truncated} truncated, "
+                f"{built_context.turns_dropped} dropped)"
+            )
+            
+            cache_key = None
+            bot_response = None
+            if Config.RESPONSE_CACHE_ENABLED:
+                cache_key = response_cache.make_key(
+                    user_message, intent_name, detected_language, context,
+                    session_id=session_id, has_history=has_history,
+                )
+                bot_response = response_cache.get(cache_key)
+                cache_status = 'bypass' if cache_key is None else ('hit' if bot_response else 'miss')
+            
+            if speculation:
+                if bot_response is not None:
+                    speculation_result = DISCARD_CACHED
+                elif not speculation.matches(context, profile):
+                    speculation_result = DISCARD_CONTEXT if context != speculation.context else DISCARD_PROFILE
+                else:
+                    speculation_result = 'hit'
+                if speculation_result != 'hit':
+                    speculation_wasted = speculator.discard(speculation, speculation_result)
+                    speculation = None
+            
+            if bot_response is None:
+                if Config.BEDROCK_STREAMING:
+                    bot_response, ttft_ms = stream_response(
+                        connection_id, event, session_id, user_message, context, profile, speculation,
+                    )
+                elif speculation:
+                    bot_response, ttft_ms = speculator.adopt(speculation)
+                else:
+                    bot_response = bedrock_client.generate_response(user_message, context, profile)
+                
+                degraded = speculation.degraded if speculation else bedrock_client.last_response_degraded
+                if not degraded:
+                    response_cache.put(cache_key, bot_response)
+            
+            if Config.RESPONSE_CACHE_ENABLED:
+                logger.info(f"Response cache {cache_status}: {response_cache.get_stats()}")
+            response_source = 'cache' if cache_status == 'hit' else 'bedrock'
+        
+        if speculator:
+            logger.info(f"Speculation {speculation_result}: {speculator.get_stats()}")
+        
+        # Step 8: Save message to DynamoDB
         timestamp = datetime.now(timezone.utc).isoformat()
         ttl = int(time.time()) + Config.SESSION_TTL_SECONDS
         
@@ -137,7 +343,12 @@ def handle_message(connection_id: str, event: dict) -> dict:
             created_at=timestamp,
             ttl=ttl,
         )
-        dynamo_client.save_message(message)
+        dynamo_client.save_message(message, session_state)
+        
+        # LLM generations for this turn: ours (speculative ones included) plus
+        # the fulfillment Lambda's
+        generations = count_generations() - generations_before + (fulfilled['generations'] if fulfilled else 0)
+        logger.info(f"Turn generations: {generations}")
         
         # Log analytics
         save_analytics_event('MESSAGE', {
@@ -145,7 +356,22 @@ def handle_message(connection_id: str, event: dict) -> dict:
             'intent': intent_name,
             'sentiment': sentiment['sentiment'],
             'language': detected_language,
-            'ai_model': 'claude-3-haiku',
+            'ai_model': profile.model_id if profile else None,
+            'profile': profile.name if profile else None,
+            'stage_ms': {name: int(ms) for name, ms in enrichment.timings_ms.items()},
+            'response_source': response_source,
+            'route_detail': route.detail if route else None,
+            'cache': cache_status,
+            'streaming': Config.BEDROCK_STREAMING,
+            'ttft_ms': int(ttft_ms) if ttft_ms is not None else None,
+            'prompt_tokens': built_context.tokens + estimate_tokens(user_message) if built_context else None,
+            'context_tokens': built_context.parts_tokens if built_context else None,
+            'context_turns_dropped': built_context.turns_dropped if built_context else None,
+            'speculation': speculation_result,
+            'speculation_saved_ms': int(speculation.saved_ms) if speculation else None,
+            'speculation_wasted_tokens': speculation_wasted,
+            'generations': generations,
+            'intent_source': enrichment['lex'].get('source', 'lex'),
         })
         
         # Prepare response
@@ -167,30 +393,109 @@ def handle_message(connection_id: str, event: dict) -> dict:
             'type': 'error',
             'error': 'Error processing your message. Please try again.',
         })
+    finally:
+        # Adopted and discarded speculations are already finished or
+        # cancelled; this stops any left running by an error
+        turn_over.set()
+        for started in speculations:
+            started.cancel()
 
 
-def format_conversation_history(history) -> str:
-    """Format conversation history for context."""
-    if not history:
-        return ""
+def load_session_state(session_id: str) -> SessionState:
+    """
+    Load the rolling session state, rebuilding it from stored messages for
+    sessions that predate it (or a new, empty state for new sessions).
     
-    formatted = []
-    # Reverse to get chronological order (oldest first)
-    for msg in reversed(history):
-        formatted.append(f"Usuario: {msg.user_message}")
-        formatted.append(f"Asistente: {msg.bot_response}")
+    If either read fails the turn goes on with an empty state that is marked
+    as not loaded, so saving the message does not overwrite the stored one.
+    """
+    try:
+        state = dynamo_client.get_session_state(session_id)
+        if state is not None:
+            return state
+        items = islice(
+            dynamo_client.iter_conversation_history(session_id, page_size=Config.SESSION_STATE_TURNS),
+            Config.SESSION_STATE_TURNS,
+        )
+        history = [Message.from_dynamo_item(item) for item in items]
+    except Exception as e:
+        logger.error(f"Error loading session state, it will not be updated this turn: {e}")
+        return SessionState(session_id=session_id, turns=[], loaded=False)
     
-    return "\n".join(formatted)
+    return SessionState.from_messages(
+        session_id,
+        history,
+        Config.SESSION_STATE_TURNS,
+        Config.SESSION_TURN_MAX_CHARS,
+        Config.SESSION_SUMMARY_MAX_CHARS,
+    )
 
 
-def build_context(intent_name: str, sentiment: str, language: str, history: str = "") -> str:
-    """Build context string for DeepSeek based on intent, sentiment, and history."""
-    context_parts = []
+def classify_locally(intent_guess: tuple):
+    """
+    Decide whether the local classifier's guess can stand in for Lex.
     
-    # Conversation history (memory)
-    if history:
-        context_parts.append(f"HISTORIAL DE CONVERSACION:\n{history}\n")
+    Returns:
+        Tuple of (intent, confidence) if Lex can be skipped for it, else None
+    """
+    intent, confidence = intent_guess
+    if intent in Config.INTENT_CLASSIFIER_INTENTS and confidence >= Config.INTENT_CLASSIFIER_MIN_CONFIDENCE:
+        return intent, confidence
+    return None
+
+
+def continues_lex_dialog(state: SessionState) -> bool:
+    """True if the last turn's intent may have left Lex eliciting a slot."""
+    if not state.turns:
+        return False
+    last_intent = state.turns[-1].get('i')
+    return last_intent not in Config.INTENT_CLASSIFIER_INTENTS and last_intent not in (None, 'FallbackIntent')
+
+
+def count_generations() -> int:
+    """Bedrock generations started by this container so far."""
+    return bedrock_client.generations + (speculator.started if speculator else 0)
+
+
+def start_speculation(
+    user_message: str,
+    language: str,
+    intent_guess: tuple,
+    sentiment: str,
+    state: SessionState,
+) -> Optional[SpeculativeGeneration]:
+    """
+    Start generating before Lex answers, with the request the turn will make
+    if Lex agrees with the local classifier's guess (sentiment and history
+    are already known, so only the intent can change it).
     
+    Returns:
+        The speculation, or None if the guess is not confident enough, Lex
+        may be continuing a dialog, or no speculation worker is free
+    """
+    intent, confidence = intent_guess
+    if intent is None or confidence < Config.BEDROCK_SPECULATIVE_MIN_CONFIDENCE or continues_lex_dialog(state):
+        return None
+    built_context, profile = generation_request(intent, sentiment, language, state)
+    return speculator.start(user_message, built_context.text, profile)
+
+
+def generation_request(
+    intent_name: str,
+    sentiment: str,
+    language: str,
+    state: SessionState,
+) -> Tuple[BuiltContext, GenerationProfile]:
+    """Context and generation profile of an LLM answer (speculative or not)."""
+    if Config.BEDROCK_PROFILE_SELECTION:
+        profile = select_profile(intent_name, sentiment)
+    else:
+        profile = bedrock_client.default_profile
+    return build_context(intent_name, sentiment, language, state), profile
+
+
+def build_context(intent_name: str, sentiment: str, language: str, state: SessionState) -> BuiltContext:
+    """Build context for DeepSeek from intent, sentiment and history, within the token budget."""
     # Intent context
     intent_hints = {
         'GreetingIntent': 'El usuario te saluda. Responde amablemente.',
@@ -201,42 +506,88 @@ def build_context(intent_name: str, sentiment: str, language: str, history: str
         'ReturnQueryIntent': 'El usuario pregunta sobre devoluciones.',
         'FallbackIntent': 'Intenta entender que necesita el usuario.',
     }
-    if intent_name in intent_hints:
-        context_parts.append(intent_hints[intent_name])
     
     # Sentiment context
+    sentiment_hint = None
     if sentiment == 'NEGATIVE':
-        context_parts.append('El usuario parece frustrado. Muestra empatia.')
+        sentiment_hint = 'El usuario parece frustrado. Muestra empatia.'
     elif sentiment == 'POSITIVE':
-        context_parts.append('El usuario esta contento. Manten un tono positivo.')
+        sentiment_hint = 'El usuario esta contento. Manten un tono positivo.'
     
     # Language
     lang_names = {'es': 'espanol', 'en': 'ingles', 'pt': 'portugues'}
-    context_parts.append(f'Responde en {lang_names.get(language, "espanol")}.')
     
-    return '\n'.join(context_parts)
+    return context_builder.build(
+        language_instruction=f'Responde en {lang_names.get(language, "espanol")}.',
+        intent_hint=intent_hints.get(intent_name),
+        sentiment_hint=sentiment_hint,
+        state=state,
+    )
+
+
+def stream_response(
+    connection_id: str,
+    event: dict,
+    session_id: str,
+    prompt: str,
+    context: str,
+    profile: GenerationProfile = None,
+    speculation: SpeculativeGeneration = None,
+) -> tuple:
+    """
+    Generate a response with Bedrock streaming, forwarding content deltas
+    to the client as 'chunk' frames. The caller still sends the final
+    'message' frame with the complete (cleaned) text. An adopted
+    speculation has its buffered deltas forwarded first.
+    
+    Returns:
+        Tuple of (bot_response, time to first token in ms or None)
+    """
+    buffer = []
+    index = 0
+    last_flush = time.perf_counter()
+    
+    def flush():
+        nonlocal index, last_flush
+        if not buffer:
+            return
+        delta = ''.join(buffer)
+        buffer.clear()
+        last_flush = time.perf_counter()
+        try:
+            post_to_connection(connection_id, event, {
+                'type': 'chunk',
+                'sessionId': session_id,
+                'index': index,
+                'delta': delta,
+            })
+        except Exception as e:
+            # A lost chunk is recovered by the final message frame
+            logger.warning(f"Failed to send chunk {index}: {e}")
+        index += 1
+    
+    def on_delta(text: str):
+        buffer.append(text)
+        buffered_chars = sum(len(part) for part in buffer)
+        waited_ms = (time.perf_counter() - last_flush) * 1000
+        if buffered_chars >= Config.STREAM_CHUNK_MIN_CHARS or waited_ms >= Config.STREAM_CHUNK_MAX_DELAY_MS:
+            flush()
+    
+    if speculation:
+        bot_response, ttft_ms = speculator.adopt(speculation, on_delta)
+    else:
+        bot_response, ttft_ms = bedrock_client.generate_response_stream(prompt, context, on_delta=on_delta, profile=profile)
+    flush()
+    
+    logger.info(f"Streamed {index} chunks to {connection_id}")
+    return bot_response, ttft_ms
 
 
 def send_response(connection_id: str, event: dict, data: dict) -> dict:
     """Send response back to WebSocket client."""
     try:
-        domain_name = event.get('requestContext', {}).get('domainName', '')
-        stage = event.get('requestContext', {}).get('stage', '')
-        
-        if domain_name and stage:
-            endpoint_url = f"https://{domain_name}/{stage}"
-            
-            api_client = boto3.client(
-                'apigatewaymanagementapi',
-                endpoint_url=endpoint_url,
-            )
-            
-            api_client.post_to_connection(
-                ConnectionId=connection_id,
-                Data=json.dumps(data).encode('utf-8'),
-            )
-            
-            logger.info(f"Sent response to {connection_id}")
+        if post_to_connection(connection_id, event, data):
+            logger.info(f"Sent response to {connection_id} (client pool: {api_client_pool.get_stats()})")
         
         return {'statusCode': 200, 'body': json.dumps(data)}
         
@@ -245,17 +596,34 @@ def send_response(connection_id: str, event: dict, data: dict) -> dict:
         return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
 
 
+def post_to_connection(connection_id: str, event: dict, data: dict) -> bool:
+    """
+    Post a frame to the WebSocket connection.
+    
+    Returns:
+        False when the event carries no API Gateway endpoint (e.g. local runs)
+    """
+    domain_name = event.get('requestContext', {}).get('domainName', '')
+    stage = event.get('requestContext', {}).get('stage', '')
+    
+    if not (domain_name and stage):
+        return False
+    
+    api_client_pool.post_to_connection(domain_name, stage, connection_id, data)
+    return True
+
+
 def save_analytics_event(metric_type: str, metadata: dict) -> None:
-    """Save an analytics event."""
+    """Buffer an analytics event; written by flush_analytics_events at the end of the invocation."""
     try:
         event = AnalyticsEvent(
             metric_type=metric_type,
-            event_id=str(uuid.uuid4()),
+            event_id=new_event_id(),
             date=datetime.now(timezone.utc).strftime('%Y-%m-%d'),
             value=1,
             metadata=metadata,
             ttl=int(time.time()) + (30 * 24 * 60 * 60),
         )
-        dynamo_client.save_analytics_event(event)
+        dynamo_client.buffer_analytics_event(event)
     except Exception as e:
         logger.warning(f"Failed to save analytics: {e}")
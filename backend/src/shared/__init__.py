@@ -7,7 +7,20 @@ from .dynamo_client import DynamoClient
 from .lex_client import LexClient
 from .comprehend_client import ComprehendClient
 from .translate_client import TranslateClient
-from .models import Message, Conversation, AnalyticsEvent
+from .models import Message, SessionState, Conversation, AnalyticsEvent
+from .pipeline import Stage, StageExecutor
+from .apigateway_client import ApiGatewayClientPool
+from .faq_index import FAQIndex
+from .faq_search import FAQSearchEngine, SearchResult
+from .faq_vectors import SemanticFAQMatcher, SemanticMatch
+from .response_cache import LRUCache, ResponseCache
+from .context_builder import ContextBuilder, BuiltContext, estimate_tokens
+from .response_router import ResponseRouter, RoutePolicy, RoutedResponse
+from .generation_profiles import GenerationProfile, select_profile
+from .translation_memory import TranslationMemory
+from .language_detector import LanguageDetector
+from .intent_classifier import IntentClassifier
+from .deadline import Deadline, DeadlineExceeded
 
 __all__ = [
     'Config',
@@ -16,6 +29,30 @@ __all__ = [
     'ComprehendClient',
     'TranslateClient',
     'Message',
+    'SessionState',
     'Conversation',
     'AnalyticsEvent',
+    'Stage',
+    'StageExecutor',
+    'ApiGatewayClientPool',
+    'FAQIndex',
+    'FAQSearchEngine',
+    'SearchResult',
+    'SemanticFAQMatcher',
+    'SemanticMatch',
+    'LRUCache',
+    'ResponseCache',
+    'ContextBuilder',
+    'BuiltContext',
+    'estimate_tokens',
+    'ResponseRouter',
+    'RoutePolicy',
+    'RoutedResponse',
+    'GenerationProfile',
+    'select_profile',
+    'TranslationMemory',
+    'LanguageDetector',
+    'IntentClassifier',
+    'Deadline',
+    'DeadlineExceeded',
 ]
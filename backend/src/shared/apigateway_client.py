@@ -0,0 +1,89 @@
+"""
+API Gateway Management API client pool for WebSocket responses.
+"""
+
+import boto3
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict
+import json
+import logging
+import time
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+
+class ApiGatewayClientPool:
+    """
+    Bounded LRU pool of apigatewaymanagementapi clients keyed by
+    domainName/stage, reused across warm invocations.
+    """
+
+    def __init__(self, max_size: int = 4):
+        self.max_size = max(1, max_size)
+        self._clients: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = Lock()
+        # Timeouts and retries only: the response must go out even when the
+        # request deadline has passed (that is what its reserve is for)
+        self._boto_config = deadline.boto_config(
+            tcp_keepalive=True,
+            max_pool_connections=10,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._create_ms_total = 0.0
+
+    def get_client(self, domain_name: str, stage: str):
+        """Get a management client for the endpoint, creating it on first use."""
+        key = f'{domain_name}/{stage}'
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+
+            started = time.perf_counter()
+            client = boto3.client(
+                'apigatewaymanagementapi',
+                endpoint_url=f'https://{key}',
+                config=self._boto_config,
+            )
+            self._create_ms_total += (time.perf_counter() - started) * 1000
+            self.misses += 1
+
+            self._clients[key] = client
+            if len(self._clients) > self.max_size:
+                evicted, _ = self._clients.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Evicted management client for {evicted}")
+
+            return client
+
+    def post_to_connection(self, domain_name: str, stage: str, connection_id: str, data: dict) -> None:
+        """Post a JSON frame to a WebSocket connection."""
+        client = self.get_client(domain_name, stage)
+        client.post_to_connection(
+            ConnectionId=connection_id,
+            Data=json.dumps(data).encode('utf-8'),
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Pool counters. `saved_ms` estimates the client construction time
+        avoided by reuse, from the average cost of the clients built so far.
+        """
+        with self._lock:
+            avg_create_ms = self._create_ms_total / self.misses if self.misses else 0.0
+            return {
+                'size': len(self._clients),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'avg_create_ms': round(avg_create_ms, 2),
+                'saved_ms': round(avg_create_ms * self.hits, 2),
+            }
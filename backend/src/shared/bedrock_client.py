@@ -7,9 +7,13 @@ import boto3
 import json
 import logging
 import re
-from typing import Optional
+import threading
+import time
+from typing import Callable, Optional, Tuple
 
+from . import deadline
 from .config import Config
+from .generation_profiles import PROFILES, GenerationProfile, get_adapter
 
 logger = logging.getLogger(__name__)
 
@@ -18,62 +22,178 @@ class BedrockClient:
     """Client for Amazon Bedrock using DeepSeek R1."""
     
     def __init__(self):
-        self.client = boto3.client('bedrock-runtime', region_name=Config.AWS_REGION)
-        self.model_id = 'us.deepseek.r1-v1:0'  # Cross-region inference profile
+        self.clients = deadline.BudgetedClient(
+            lambda config: boto3.client('bedrock-runtime', config=config),
+            Config.BEDROCK_READ_TIMEOUT,
+        )
+        # Default profile: DeepSeek R1 through its cross-region inference profile
+        self.default_profile = PROFILES['reasoning']
+        self.model_id = self.default_profile.model_id
+        # True when the last response is a canned fallback rather than a
+        # model completion (callers should not cache it)
+        self.last_response_degraded = False
+        # Model invocations made by this client (per container)
+        self.generations = 0
     
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> str:
+    @property
+    def client(self):
+        """Bedrock runtime client with timeouts that fit the current request's deadline."""
+        return self.clients.current()
+    
+    def generate_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        profile: Optional[GenerationProfile] = None,
+    ) -> str:
         """
-        Generate a response using DeepSeek R1.
-        DeepSeek R1 is a reasoning model that returns reasoning_content.
+        Generate a response with the profile's model (DeepSeek R1 by default).
+        Reasoning models may return only reasoning content; the answer is
+        then extracted from it.
         """
+        self.last_response_degraded = False
+        profile = profile or self.default_profile
+        adapter = get_adapter(profile.model_id)
+        self.generations += 1
         try:
-            system_msg = """Eres un asistente virtual amable para una tienda en linea.
-Responde de forma breve y directa (1-2 oraciones maximo).
-Se util, empatico y profesional."""
-
-            body = {
-                "messages": [
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 500,  # More tokens for reasoning + response
-                "temperature": 0.7
-            }
+            def invoke():
+                response = self.client.invoke_model(
+                    modelId=profile.model_id,
+                    body=json.dumps(self._build_body(prompt, context, profile)),
+                    contentType='application/json',
+                    accept='application/json'
+                )
+                return json.loads(response['body'].read())
             
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(body),
-                contentType='application/json',
-                accept='application/json'
-            )
+            # Fails fast (keyword response below) if the request deadline is near
+            response_body = deadline.call(invoke)
+            logger.info(f"{profile.name} ({profile.model_id}) raw response: {json.dumps(response_body)[:200]}")
             
-            response_body = json.loads(response['body'].read())
-            logger.info(f"DeepSeek raw response: {json.dumps(response_body)[:200]}")
-            
-            # DeepSeek R1 returns reasoning_content and content
-            completion = ""
-            if 'choices' in response_body and len(response_body['choices']) > 0:
-                choice = response_body['choices'][0]
-                message = choice.get('message', {})
-                
-                # Try content first, then reasoning_content
-                completion = message.get('content') or ''
-                
-                # If content is null/empty, use reasoning_content
-                if not completion:
-                    reasoning = message.get('reasoning_content', '')
-                    # Extract the actual response from reasoning
-                    completion = self._extract_response_from_reasoning(reasoning)
+            # Try content first, then reasoning content
+            completion, reasoning = adapter.parse_response(response_body)
+            if not completion and profile.reasoning:
+                completion = self._extract_response_from_reasoning(reasoning)
             
             completion = self._clean_response(completion)
             
-            logger.info(f"DeepSeek final response: {completion[:100]}...")
+            logger.info(f"{profile.name} final response: {completion[:100]}...")
+            self.last_response_degraded = not completion
             return completion if completion else "En que puedo ayudarte?"
             
         except Exception as e:
-            logger.error(f"Error calling DeepSeek: {e}")
+            logger.error(f"Error calling {profile.model_id}: {e}")
+            self.last_response_degraded = True
             return self._get_smart_response(prompt)
     
+    def generate_response_stream(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+        profile: Optional[GenerationProfile] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[str, Optional[float]]:
+        """
+        Generate a response with the profile's model, streaming content deltas.
+        
+        Args:
+            prompt: User message
+            context: Optional context (same as generate_response)
+            on_delta: Called with each content delta as it arrives
+            profile: Generation profile (DeepSeek R1 by default)
+            cancel: When set, the stream is closed at the next chunk so the
+                model stops generating; the partial response is degraded
+            
+        Returns:
+            Tuple of (final cleaned response, time to first token in ms or None)
+        """
+        self.last_response_degraded = False
+        profile = profile or self.default_profile
+        adapter = get_adapter(profile.model_id)
+        started = time.perf_counter()
+        ttft_ms = None
+        content_parts = []
+        reasoning_parts = []
+        truncated = False
+        
+        self.generations += 1
+        try:
+            response = deadline.call(
+                self.client.invoke_model_with_response_stream,
+                modelId=profile.model_id,
+                body=json.dumps(self._build_body(prompt, context, profile)),
+                contentType='application/json',
+                accept='application/json'
+            )
+            
+            # Each chunk is awaited within the request deadline, so a stalled
+            # stream ends with what was generated (or the keyword response)
+            stream = iter(response['body'])
+            while True:
+                try:
+                    stream_event = deadline.call(next, stream, None)
+                except deadline.DeadlineExceeded:
+                    response['body'].close()
+                    raise
+                if stream_event is None:
+                    break
+                if cancel is not None and cancel.is_set():
+                    response['body'].close()
+                    logger.info(f"{profile.name} stream cancelled after {len(content_parts)} deltas")
+                    self.last_response_degraded = True
+                    return ''.join(content_parts), ttft_ms
+                
+                chunk = stream_event.get('chunk')
+                if not chunk:
+                    continue
+                
+                text, reasoning = adapter.parse_stream_chunk(json.loads(chunk['bytes']))
+                if reasoning:
+                    reasoning_parts.append(reasoning)
+                if not text:
+                    continue
+                
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    logger.info(f"{profile.name} time to first token: {ttft_ms:.0f}ms")
+                
+                content_parts.append(text)
+                if on_delta:
+                    on_delta(text)
+            
+        except Exception as e:
+            logger.error(f"Error streaming from {profile.model_id}: {e}")
+            if not content_parts:
+                self.last_response_degraded = True
+                return self._get_smart_response(prompt), ttft_ms
+            # A partial response is sent but never cached
+            truncated = True
+        
+        completion = ''.join(content_parts)
+        if not completion and profile.reasoning:
+            completion = self._extract_response_from_reasoning(''.join(reasoning_parts))
+        completion = self._clean_response(completion)
+        
+        logger.info(f"{profile.name} streamed response: {completion[:100]}...")
+        self.last_response_degraded = truncated or not completion
+        return (completion if completion else "En que puedo ayudarte?"), ttft_ms
+    
+    def _build_body(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        profile: Optional[GenerationProfile] = None,
+    ) -> dict:
+        """Build the request body for the profile's model, with the context in the system message."""
+        system_msg = """Eres un asistente virtual amable para una tienda en linea.
+Responde de forma breve y directa (1-2 oraciones maximo).
+Se util, empatico y profesional."""
+        if context:
+            system_msg += f"\n\n{context}"
+
+        profile = profile or self.default_profile
+        return get_adapter(profile.model_id).build_body(system_msg, prompt, profile)
+    
     def _extract_response_from_reasoning(self, reasoning: str) -> str:
         """
         Extract the actual response from DeepSeek's reasoning content.
@@ -6,7 +6,9 @@ import boto3
 from typing import Dict, Any, Tuple
 import logging
 
+from . import deadline
 from .config import Config
+from .language_detector import LanguageDetector
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,13 @@ class ComprehendClient:
     """Client for Amazon Comprehend operations."""
     
     def __init__(self):
-        self.client = boto3.client('comprehend', region_name=Config.AWS_REGION)
+        self.clients = deadline.BudgetedClient(lambda config: boto3.client('comprehend', config=config))
+        self.language_detector = LanguageDetector.load()
+    
+    @property
+    def client(self):
+        """Comprehend client with timeouts that fit the current request's deadline."""
+        return self.clients.current()
     
     def detect_sentiment(self, text: str, language_code: str = 'es') -> Dict[str, Any]:
         """
@@ -29,7 +37,8 @@ class ComprehendClient:
             Sentiment analysis result
         """
         try:
-            response = self.client.detect_sentiment(
+            response = deadline.call(
+                self.client.detect_sentiment,
                 Text=text,
                 LanguageCode=language_code,
             )
@@ -58,14 +67,23 @@ class ComprehendClient:
         """
         Detect dominant language of the text.
         
+        Uses the local trigram detector and only calls Comprehend when its
+        confidence is below Config.LANGUAGE_DETECT_MIN_CONFIDENCE.
+        
         Args:
             text: Text to analyze
             
         Returns:
             Tuple of (language_code, confidence_score)
         """
+        if self.language_detector:
+            language_code, confidence = self.language_detector.detect(text)
+            if confidence >= Config.LANGUAGE_DETECT_MIN_CONFIDENCE:
+                logger.info(f"Detected language locally: {language_code} ({confidence:.2%})")
+                return language_code, confidence
+        
         try:
-            response = self.client.detect_dominant_language(Text=text)
+            response = deadline.call(self.client.detect_dominant_language, Text=text)
             
             if response['Languages']:
                 lang = response['Languages'][0]
@@ -98,7 +116,8 @@ class ComprehendClient:
             List of detected entities
         """
         try:
-            response = self.client.detect_entities(
+            response = deadline.call(
+                self.client.detect_entities,
                 Text=text,
                 LanguageCode=language_code,
             )
@@ -131,7 +150,8 @@ class ComprehendClient:
             List of key phrases
         """
         try:
-            response = self.client.detect_key_phrases(
+            response = deadline.call(
+                self.client.detect_key_phrases,
                 Text=text,
                 LanguageCode=language_code,
             )
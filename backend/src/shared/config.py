@@ -17,15 +17,172 @@ class Config:
     LEX_BOT_ID = os.environ.get('LEX_BOT_ID', '')
     LEX_BOT_ALIAS_ID = os.environ.get('LEX_BOT_ALIAS_ID', '')
     
+    # Bedrock streaming: forward content deltas to the WebSocket as 'chunk' frames
+    BEDROCK_STREAMING = os.environ.get('BEDROCK_STREAMING', 'false').lower() == 'true'
+    # Deltas are coalesced until this many characters or milliseconds accumulate
+    STREAM_CHUNK_MIN_CHARS = int(os.environ.get('STREAM_CHUNK_MIN_CHARS', '24'))
+    STREAM_CHUNK_MAX_DELAY_MS = int(os.environ.get('STREAM_CHUNK_MAX_DELAY_MS', '150'))
+    
+    # Max cached API Gateway management clients (one per domainName/stage)
+    APIGW_CLIENT_POOL_SIZE = int(os.environ.get('APIGW_CLIENT_POOL_SIZE', '4'))
+    
     # AWS Region
     AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
     
+    # AWS client timeouts (seconds, per attempt) and adaptive retries
+    AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', '2'))
+    AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', '5'))
+    BEDROCK_READ_TIMEOUT = float(os.environ.get('BEDROCK_READ_TIMEOUT', '20'))
+    AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))
+    
+    # Request deadline: AWS calls get the Lambda time left minus the reserve
+    # (kept to send the fallback response) and fail fast below the minimum
+    DEADLINE_RESERVE_MS = int(os.environ.get('DEADLINE_RESERVE_MS', '1500'))
+    DEADLINE_MIN_CALL_MS = int(os.environ.get('DEADLINE_MIN_CALL_MS', '200'))
+    
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     
+    # Message pipeline (1 = run enrichment stages sequentially)
+    PIPELINE_MAX_WORKERS = int(os.environ.get('PIPELINE_MAX_WORKERS', '4'))
+    
+    # FAQ keyword index refresh interval (seconds)
+    FAQ_INDEX_TTL_SECONDS = int(os.environ.get('FAQ_INDEX_TTL_SECONDS', '300'))
+    # Minimum BM25 score to answer from the knowledge base without a keyword match
+    FAQ_MIN_SCORE = float(os.environ.get('FAQ_MIN_SCORE', '2.0'))
+    
+    # Semantic FAQ matcher and BM25 index artifacts (built by scripts/build_faq_vectors.py)
+    FAQ_VECTORS_DIR = os.environ.get('FAQ_VECTORS_DIR', '/opt/python/artifacts')
+    # Minimum cosine similarity to answer a fallback from the knowledge base
+    FAQ_SEMANTIC_MIN_SCORE = float(os.environ.get('FAQ_SEMANTIC_MIN_SCORE', '0.3'))
+    # Minimum lead of the best FAQ over any other FAQ and the out-of-scope examples
+    FAQ_SEMANTIC_MIN_MARGIN = float(os.environ.get('FAQ_SEMANTIC_MIN_MARGIN', '0.25'))
+    
+    # Bedrock response cache
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(2 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '3600'))
+    # Shared DynamoDB tier (stored in the conversations table)
+    RESPONSE_CACHE_SHARED = os.environ.get('RESPONSE_CACHE_SHARED', 'false').lower() == 'true'
+    # 'bypass' never caches history-dependent answers; 'session' scopes them to the session
+    RESPONSE_CACHE_HISTORY_POLICY = os.environ.get('RESPONSE_CACHE_HISTORY_POLICY', 'bypass')
+    
+    # Translation memory: in-process LRU plus optional '' | 'dynamodb' | 'file' store
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.environ.get('TRANSLATION_MEMORY_MAX_ENTRIES', '1024'))
+    TRANSLATION_MEMORY_STORE = os.environ.get('TRANSLATION_MEMORY_STORE', '')
+    TRANSLATION_MEMORY_FILE = os.environ.get('TRANSLATION_MEMORY_FILE', '/tmp/translation_memory.jsonl')
+    TRANSLATION_MEMORY_PRELOAD = os.environ.get('TRANSLATION_MEMORY_PRELOAD', '/opt/python/artifacts/translations.json')
+    TRANSLATION_MEMORY_TTL_SECONDS = int(os.environ.get('TRANSLATION_MEMORY_TTL_SECONDS', str(30 * 24 * 60 * 60)))
+    
+    # Batch translation: TranslateText accepts up to 10,000 bytes per request
+    TRANSLATE_MAX_REQUEST_BYTES = int(os.environ.get('TRANSLATE_MAX_REQUEST_BYTES', '9000'))
+    TRANSLATE_BATCH_WORKERS = int(os.environ.get('TRANSLATE_BATCH_WORKERS', '4'))
+    
+    # Local language detection; Comprehend is only called below this confidence
+    LANGUAGE_DETECT_MIN_CONFIDENCE = float(os.environ.get('LANGUAGE_DETECT_MIN_CONFIDENCE', '0.9'))
+    # Text fitting the best profile worse than this (mean log-probability per
+    # trigram) is treated as an unsupported language and left to Comprehend
+    LANGUAGE_DETECT_MIN_LOGPROB = float(os.environ.get('LANGUAGE_DETECT_MIN_LOGPROB', '-7.0'))
+    
+    # Lex classification cache (normalized text + locale) for intents without
+    # slots or fulfillment, whose results do not depend on the session
+    LEX_CACHE_ENABLED = os.environ.get('LEX_CACHE_ENABLED', 'true').lower() == 'true'
+    LEX_CACHE_MAX_ENTRIES = int(os.environ.get('LEX_CACHE_MAX_ENTRIES', '1024'))
+    LEX_CACHE_TTL_SECONDS = int(os.environ.get('LEX_CACHE_TTL_SECONDS', '900'))
+    LEX_CACHE_INTENTS = [
+        i.strip() for i in os.environ.get(
+            'LEX_CACHE_INTENTS',
+            'GreetingIntent,FarewellIntent,HelpIntent,PriceQueryIntent,ShippingQueryIntent,ReturnQueryIntent',
+        ).split(',') if i.strip()
+    ]
+    
+    # Local intent pre-classification: Lex (and the Translate call before it)
+    # is skipped at or above this confidence, for intents Lex has no dialog
+    # or fulfillment for (see scripts/benchmark_intent_classifier.py)
+    INTENT_CLASSIFIER_ENABLED = os.environ.get('INTENT_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+    INTENT_CLASSIFIER_MIN_CONFIDENCE = float(os.environ.get('INTENT_CLASSIFIER_MIN_CONFIDENCE', '0.8'))
+    INTENT_CLASSIFIER_INTENTS = [
+        i.strip() for i in os.environ.get(
+            'INTENT_CLASSIFIER_INTENTS',
+            'GreetingIntent,FarewellIntent,HelpIntent,PriceQueryIntent,ShippingQueryIntent,ReturnQueryIntent',
+        ).split(',') if i.strip()
+    ]
+    
+    # Buffered analytics writes (batch_write_item retries for unprocessed items)
+    ANALYTICS_FLUSH_MAX_ATTEMPTS = int(os.environ.get('ANALYTICS_FLUSH_MAX_ATTEMPTS', '4'))
+    ANALYTICS_FLUSH_BASE_DELAY = float(os.environ.get('ANALYTICS_FLUSH_BASE_DELAY', '0.05'))
+    
+    # Paginated DynamoDB reads (0 = DynamoDB's default 1 MB pages)
+    DYNAMO_PAGE_SIZE = int(os.environ.get('DYNAMO_PAGE_SIZE', '0'))
+    DYNAMO_SCAN_SEGMENTS = int(os.environ.get('DYNAMO_SCAN_SEGMENTS', '1'))
+    
+    # Analytics rollups (hourly counters) and sampling of raw events
+    ANALYTICS_ROLLUP_ENABLED = os.environ.get('ANALYTICS_ROLLUP_ENABLED', 'true').lower() == 'true'
+    ANALYTICS_ROLLUP_DIMENSIONS = [
+        d.strip() for d in os.environ.get(
+            'ANALYTICS_ROLLUP_DIMENSIONS',
+            'intent,language,sentiment,action,category,found,match,rating,response_source,speculation,generations,intent_source',
+        ).split(',') if d.strip()
+    ]
+    ANALYTICS_ROLLUP_TTL_DAYS = int(os.environ.get('ANALYTICS_ROLLUP_TTL_DAYS', '400'))
+    ANALYTICS_RAW_SAMPLE_RATE = float(os.environ.get('ANALYTICS_RAW_SAMPLE_RATE', '0.1'))
+    
+    # Analytics write sharding (readers query every shard, so only ever raise
+    # the counts). Each partition takes about 1/shards of its path's writes:
+    # raw events are ANALYTICS_RAW_SAMPLE_RATE of the events, while every
+    # invocation updates its rollups, so rollups get the most shards.
+    ANALYTICS_WRITE_SHARDS = int(os.environ.get('ANALYTICS_WRITE_SHARDS', '8'))
+    ANALYTICS_ROLLUP_SHARDS = int(os.environ.get('ANALYTICS_ROLLUP_SHARDS', '32'))
+    ANALYTICS_SHARD_STRATEGY = os.environ.get('ANALYTICS_SHARD_STRATEGY', 'random')
+    ANALYTICS_READ_WORKERS = int(os.environ.get('ANALYTICS_READ_WORKERS', '8'))
+    
+    # DateIndex GSI: new events are range-queried on the base table by their
+    # time-ordered sort key; the index only serves events written before that
+    ANALYTICS_DATE_INDEX_WRITES = os.environ.get('ANALYTICS_DATE_INDEX_WRITES', 'false').lower() == 'true'
+    ANALYTICS_DATE_INDEX_READS = os.environ.get('ANALYTICS_DATE_INDEX_READS', 'true').lower() == 'true'
+    
+    # Bedrock generation profiles (see generation_profiles.select_profile)
+    BEDROCK_FAST_MODEL_ID = os.environ.get('BEDROCK_FAST_MODEL_ID', 'us.amazon.nova-micro-v1:0')
+    BEDROCK_FAST_MAX_TOKENS = int(os.environ.get('BEDROCK_FAST_MAX_TOKENS', '150'))
+    BEDROCK_STANDARD_MODEL_ID = os.environ.get('BEDROCK_STANDARD_MODEL_ID', 'us.amazon.nova-lite-v1:0')
+    BEDROCK_STANDARD_MAX_TOKENS = int(os.environ.get('BEDROCK_STANDARD_MAX_TOKENS', '300'))
+    BEDROCK_REASONING_MODEL_ID = os.environ.get('BEDROCK_REASONING_MODEL_ID', 'us.deepseek.r1-v1:0')
+    BEDROCK_REASONING_MAX_TOKENS = int(os.environ.get('BEDROCK_REASONING_MAX_TOKENS', '500'))
+    BEDROCK_PROFILE_SELECTION = os.environ.get('BEDROCK_PROFILE_SELECTION', 'true').lower() == 'true'
+    
+    # Speculative generation while Lex classifies, with the context and
+    # profile of the intent the local classifier guesses at this confidence
+    # or above; discarded if Lex decides otherwise (see
+    # scripts/benchmark_speculation.py). Runs never queue for a worker
+    BEDROCK_SPECULATIVE = os.environ.get('BEDROCK_SPECULATIVE', 'false').lower() == 'true'
+    BEDROCK_SPECULATIVE_MIN_CONFIDENCE = float(os.environ.get('BEDROCK_SPECULATIVE_MIN_CONFIDENCE', '0.5'))
+    BEDROCK_SPECULATIVE_WORKERS = int(os.environ.get('BEDROCK_SPECULATIVE_WORKERS', '2'))
+    
+    # Answer confidently classified intents from templates / knowledge base
+    RESPONSE_ROUTER_ENABLED = os.environ.get('RESPONSE_ROUTER_ENABLED', 'true').lower() == 'true'
+    
+    # Prompt context token budget (approximate tokens, see context_builder)
+    CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONTEXT_TOKEN_BUDGET', '600'))
+    CONTEXT_MIN_TURN_TOKENS = int(os.environ.get('CONTEXT_MIN_TURN_TOKENS', '24'))
+    # Cap on the rolling summary, which gets what the recent turns leave
+    CONTEXT_SUMMARY_TOKENS = int(os.environ.get('CONTEXT_SUMMARY_TOKENS', '120'))
+    
     # Session TTL (7 days in seconds)
     SESSION_TTL_SECONDS = 7 * 24 * 60 * 60
     
+    # Rolling session state (SESSION#<id>/STATE): turns kept verbatim, and
+    # per-turn / summary size caps that bound the item size
+    SESSION_STATE_TURNS = int(os.environ.get('SESSION_STATE_TURNS', '5'))
+    SESSION_TURN_MAX_CHARS = int(os.environ.get('SESSION_TURN_MAX_CHARS', '500'))
+    SESSION_SUMMARY_MAX_CHARS = int(os.environ.get('SESSION_SUMMARY_MAX_CHARS', '600'))
+    # Size cap for the recent turns carried to fulfillment through Lex
+    # (Lex limits all attributes of a request to 12 KB; 0 disables the carry)
+    LEX_HISTORY_MAX_BYTES = int(os.environ.get('LEX_HISTORY_MAX_BYTES', '4096'))
+    # Size cap for the analytics events fulfillment hands back to the
+    # orchestrator in the session attributes (0: fulfillment writes them)
+    LEX_ANALYTICS_MAX_BYTES = int(os.environ.get('LEX_ANALYTICS_MAX_BYTES', '2048'))
+    
     # Supported languages
     SUPPORTED_LANGUAGES = ['es', 'en', 'pt']
     DEFAULT_LANGUAGE = 'es'
@@ -0,0 +1,153 @@
+"""
+Token-budgeted context assembly for Bedrock prompts.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .models import SessionState
+
+# Word pieces and punctuation; long words count as several tokens
+TOKEN_PIECE = re.compile(r'\w+|[^\w\s]')
+
+HISTORY_HEADER = "HISTORIAL DE CONVERSACION:"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of model tokens in a text (roughly one token per
+    short word or symbol, plus one per extra 5 characters of long words).
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 5 for piece in TOKEN_PIECE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most max_tokens (estimated), marking the cut with an ellipsis."""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ''
+    # The ellipsis takes one token; shrink until the estimate fits
+    keep = int(len(text) * (max_tokens - 1) / tokens)
+    while keep > 0 and estimate_tokens(text[:keep]) > max_tokens - 1:
+        keep = int(keep * 0.9)
+    return text[:keep].rstrip() + '…'
+
+
+@dataclass
+class BuiltContext:
+    """Assembled context plus size figures for metrics."""
+    text: str
+    tokens: int
+    budget: int
+    turns_included: int = 0
+    turns_truncated: int = 0
+    turns_dropped: int = 0
+    summary_included: bool = False
+    parts_tokens: Dict[str, int] = field(default_factory=dict)
+
+
+class ContextBuilder:
+    """
+    Fits prompt context into a token budget.
+
+    Parts are admitted in priority order: language instruction (always),
+    intent hint, sentiment hint, conversation turns from the most recent
+    back, then the rolling summary. A turn that does not fit has its bot
+    reply truncated; once even that does not fit, older turns are dropped.
+    The summary gets whatever budget the turns leave, truncated to at most
+    summary_tokens.
+    """
+
+    def __init__(self, budget_tokens: int, min_turn_tokens: int = 24, summary_tokens: int = 120):
+        self.budget_tokens = budget_tokens
+        self.min_turn_tokens = min_turn_tokens
+        self.summary_tokens = summary_tokens
+
+    def build(
+        self,
+        language_instruction: str,
+        intent_hint: Optional[str] = None,
+        sentiment_hint: Optional[str] = None,
+        state: Optional[SessionState] = None,
+    ) -> BuiltContext:
+        remaining = self.budget_tokens
+        parts_tokens: Dict[str, int] = {}
+
+        def admit(name: str, text: Optional[str], required: bool = False) -> Optional[str]:
+            nonlocal remaining
+            if not text:
+                return None
+            tokens = estimate_tokens(text)
+            if tokens > remaining and not required:
+                return None
+            remaining -= tokens
+            parts_tokens[name] = tokens
+            return text
+
+        language_instruction = admit('language', language_instruction, required=True)
+        intent_hint = admit('intent', intent_hint)
+        sentiment_hint = admit('sentiment', sentiment_hint)
+
+        turns = state.turns if state else []
+        history_lines: List[List[str]] = []
+        truncated = 0
+        # The header is charged up front and refunded if no history fits
+        history_tokens = estimate_tokens(HISTORY_HEADER)
+        remaining -= history_tokens
+        # Most recent turns first; stop at the first turn that cannot fit
+        for turn in reversed(turns):
+            user_line = f"Usuario: {turn['u']}"
+            bot_line = f"Asistente: {turn['b']}"
+            user_tokens = estimate_tokens(user_line)
+            bot_tokens = estimate_tokens(bot_line)
+
+            if user_tokens + bot_tokens <= remaining:
+                history_lines.append([user_line, bot_line])
+            elif remaining - user_tokens >= self.min_turn_tokens:
+                bot_line = truncate_to_tokens(bot_line, remaining - user_tokens)
+                bot_tokens = estimate_tokens(bot_line)
+                history_lines.append([user_line, bot_line])
+                truncated += 1
+            else:
+                break
+            remaining -= user_tokens + bot_tokens
+            history_tokens += user_tokens + bot_tokens
+
+        summary_line = None
+        if state and state.summary:
+            summary_line = truncate_to_tokens(
+                f"Temas anteriores: {state.summary}",
+                min(self.summary_tokens, remaining),
+            ) or None
+            if summary_line:
+                summary_tokens = estimate_tokens(summary_line)
+                remaining -= summary_tokens
+                history_tokens += summary_tokens
+        if history_lines or summary_line:
+            parts_tokens['history'] = history_tokens
+        else:
+            remaining += history_tokens
+
+        sections = []
+        if history_lines or summary_line:
+            lines = [summary_line] if summary_line else []
+            for pair in reversed(history_lines):
+                lines.extend(pair)
+            sections.append(f"{HISTORY_HEADER}\n" + "\n".join(lines) + "\n")
+        sections.extend(part for part in (intent_hint, sentiment_hint, language_instruction) if part)
+
+        return BuiltContext(
+            text='\n'.join(sections),
+            tokens=self.budget_tokens - remaining,
+            budget=self.budget_tokens,
+            turns_included=len(history_lines),
+            turns_truncated=truncated,
+            turns_dropped=len(turns) - len(history_lines),
+            summary_included=summary_line is not None,
+            parts_tokens=parts_tokens,
+        )
@@ -0,0 +1,179 @@
+"""
+Request deadlines and timeout/retry settings for the AWS clients.
+
+Handlers start a deadline from the Lambda context at the beginning of each
+invocation. AWS calls made while it is active fail fast with
+DeadlineExceeded once too little time remains, and otherwise go through a
+copy of the client whose botocore timeouts and retries fit in the time
+left, so the callers' fallbacks (default sentiment, FallbackIntent, the
+keyword response) still go out before Lambda times out.
+
+The deadline is a context variable: threads started for a request only see
+it if they run in a copy of the request's context (see submit).
+"""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Optional
+
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ConnectTimeoutError, ReadTimeoutError
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Budgets of the shortened client copies, in seconds: BUDGET_MIN_S * BUDGET_STEP**n
+BUDGET_MIN_S = 0.2
+BUDGET_STEP = 1.25
+
+
+class DeadlineExceeded(Exception):
+    """Too little time is left in the request for an AWS call."""
+
+
+class Deadline:
+    """Point in time by which a request must have its response out."""
+
+    def __init__(self, remaining_ms: float, reserve_ms: float = 0):
+        # The reserve is kept for sending the (fallback) response
+        self.expires_at = time.monotonic() + (remaining_ms - reserve_ms) / 1000
+
+    @classmethod
+    def from_context(cls, context: Any, reserve_ms: float) -> Optional['Deadline']:
+        """Deadline for a Lambda invocation, or None without a Lambda context."""
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if get_remaining is None:
+            return None
+        return cls(get_remaining(), reserve_ms)
+
+    def remaining_ms(self) -> float:
+        return (self.expires_at - time.monotonic()) * 1000
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar('deadline', default=None)
+
+
+def start(context: Any, reserve_ms: float = Config.DEADLINE_RESERVE_MS) -> Optional[Deadline]:
+    """Start the deadline of the current invocation."""
+    deadline = Deadline.from_context(context, reserve_ms)
+    _current.set(deadline)
+    return deadline
+
+
+def clear() -> None:
+    """End the current invocation's deadline."""
+    _current.set(None)
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left in the current request, or None without a deadline."""
+    deadline = _current.get()
+    return deadline.remaining_ms() if deadline else None
+
+
+def expired() -> bool:
+    """True if the current request has no time left for AWS calls."""
+    remaining = remaining_ms()
+    return remaining is not None and remaining < Config.DEADLINE_MIN_CALL_MS
+
+
+def submit(executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Future:
+    """Submit work to an executor, keeping the current request's deadline in it."""
+    return executor.submit(copy_context().run, func, *args, **kwargs)
+
+
+def call(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Call an AWS API within the current request's deadline.
+
+    Without a deadline the call is made directly. Otherwise it fails fast
+    when less than DEADLINE_MIN_CALL_MS remains; func should come from a
+    BudgetedClient so that botocore's timeouts end it in time. A timeout
+    that leaves less than the minimum is reported as DeadlineExceeded.
+    """
+    remaining = remaining_ms()
+    if remaining is None:
+        return func(*args, **kwargs)
+    if remaining < Config.DEADLINE_MIN_CALL_MS:
+        raise DeadlineExceeded(f"{remaining:.0f}ms left, not calling {getattr(func, '__name__', func)}")
+
+    try:
+        return func(*args, **kwargs)
+    except (ConnectTimeoutError, ReadTimeoutError) as e:
+        if expired():
+            raise DeadlineExceeded(f"{getattr(func, '__name__', func)} did not finish within {remaining:.0f}ms") from e
+        raise
+
+
+class BudgetedClient:
+    """
+    A boto3 client (or resource) plus copies of it with shorter timeouts and
+    fewer retries, made on demand for requests with less time left than the
+    client's own settings could take.
+    """
+
+    def __init__(self, factory: Callable[[BotoConfig], Any], read_timeout: float = None):
+        self.factory = factory
+        self.read_timeout = read_timeout if read_timeout is not None else Config.AWS_READ_TIMEOUT
+        self.base = factory(boto_config(self.read_timeout))
+        # Worst case of one call with the base settings (retries come on
+        # top of the first attempt)
+        self.base_attempts = Config.AWS_MAX_ATTEMPTS + 1
+        self.base_budget_s = self.base_attempts * (Config.AWS_CONNECT_TIMEOUT + self.read_timeout)
+        self._variants: Dict[float, Any] = {}
+        self._lock = threading.Lock()
+
+    def current(self) -> Any:
+        """The client to use for the time left in the current request."""
+        remaining = remaining_ms()
+        if remaining is None or remaining / 1000 >= self.base_budget_s:
+            return self.base
+
+        # Rounded down to a few fixed budgets so copies are reused
+        steps = math.floor(math.log(max(remaining / 1000, BUDGET_MIN_S) / BUDGET_MIN_S, BUDGET_STEP))
+        budget = round(BUDGET_MIN_S * BUDGET_STEP ** steps, 3)
+        with self._lock:
+            variant = self._variants.get(budget)
+            if variant is None:
+                variant = self._variants[budget] = self.factory(self._budget_config(budget))
+                logger.info(f"Created client copy for a {budget}s budget")
+        return variant
+
+    def _budget_config(self, budget: float) -> BotoConfig:
+        """Timeouts and retries that fit all attempts of a call in budget seconds."""
+        attempts = max(1, min(self.base_attempts, int(budget // (Config.AWS_CONNECT_TIMEOUT + self.read_timeout))))
+        per_attempt = budget / attempts
+        connect_timeout = min(Config.AWS_CONNECT_TIMEOUT, per_attempt / 4)
+        return boto_config(
+            read_timeout=min(self.read_timeout, per_attempt - connect_timeout),
+            connect_timeout=connect_timeout,
+            max_attempts=attempts - 1,
+        )
+
+
+def boto_config(
+    read_timeout: float = None,
+    connect_timeout: float = None,
+    max_attempts: int = None,
+    **overrides,
+) -> BotoConfig:
+    """
+    botocore settings for a service client: connect/read timeouts per
+    attempt and adaptive retries (client-side rate limiting on throttling);
+    max_attempts counts the retries after the first attempt.
+    """
+    return BotoConfig(
+        region_name=Config.AWS_REGION,
+        connect_timeout=connect_timeout if connect_timeout is not None else Config.AWS_CONNECT_TIMEOUT,
+        read_timeout=read_timeout if read_timeout is not None else Config.AWS_READ_TIMEOUT,
+        retries={
+            'max_attempts': max_attempts if max_attempts is not None else Config.AWS_MAX_ATTEMPTS,
+            'mode': 'adaptive',
+        },
+        **overrides,
+    )
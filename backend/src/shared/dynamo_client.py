@@ -4,11 +4,20 @@ DynamoDB client for Chatbot operations.
 
 import boto3
 from boto3.dynamodb.conditions import Key
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import heapq
 import logging
+import queue
+import random
+import threading
+import time
 
+from . import deadline
 from .config import Config
-from .models import Message, FAQItem, AnalyticsEvent
+from .models import Message, SessionState, FAQItem, AnalyticsEvent, encode_ulid_time
 
 logger = logging.getLogger(__name__)
 
@@ -17,21 +26,210 @@ class DynamoClient:
     """Client for DynamoDB operations."""
     
     def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb', region_name=Config.AWS_REGION)
+        # Writes use the base resource; reads made within a request deadline
+        # go through _reading
+        self.resources = deadline.BudgetedClient(lambda config: boto3.resource('dynamodb', config=config))
+        self.dynamodb = self.resources.base
         self.conversations_table = self.dynamodb.Table(Config.CONVERSATIONS_TABLE)
         self.knowledge_base_table = self.dynamodb.Table(Config.KNOWLEDGE_BASE_TABLE)
         self.analytics_table = self.dynamodb.Table(Config.ANALYTICS_TABLE)
+        # Analytics buffered during an invocation (see flush_analytics_events):
+        # sampled raw events and hourly counters keyed by (metric type, hour)
+        self._analytics_buffer: List[AnalyticsEvent] = []
+        self._analytics_rollups: Dict[Tuple[str, str], Dict[str, int]] = {}
+    
+    def _reading(self, table: Any) -> Any:
+        """The table on the resource copy whose timeouts fit the current request's deadline."""
+        return self.resources.current().Table(table.name)
+    
+    # Paginated reads
+    def _pages(
+        self,
+        table: Any,
+        operation: str,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+        **kwargs,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield one page of items at a time from a query or scan,
+        following LastEvaluatedKey until the result set is exhausted.
+        
+        Args:
+            table: boto3 Table resource
+            operation: 'query' or 'scan'
+            page_size: Items per request (Limit); DynamoDB's 1 MB pages if None
+            projection: Attribute names to return (ProjectionExpression)
+            **kwargs: Remaining query/scan parameters
+        """
+        page_size = page_size or Config.DYNAMO_PAGE_SIZE
+        if page_size:
+            kwargs['Limit'] = page_size
+        if projection:
+            names = dict(kwargs.get('ExpressionAttributeNames', {}))
+            placeholders = []
+            for i, attribute in enumerate(projection):
+                names[f'#p{i}'] = attribute
+                placeholders.append(f'#p{i}')
+            kwargs['ProjectionExpression'] = ', '.join(placeholders)
+            kwargs['ExpressionAttributeNames'] = names
+        
+        read = getattr(self._reading(table), operation)
+        while True:
+            response = deadline.call(read, **kwargs)
+            yield response.get('Items', [])
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return
+            kwargs['ExclusiveStartKey'] = last_key
+    
+    def _paginate(self, table: Any, operation: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Yield items from a query or scan across all pages (see _pages)."""
+        for page in self._pages(table, operation, **kwargs):
+            yield from page
+    
+    def _parallel_scan(self, table: Any, segments: int = 1, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Scan a table with `segments` parallel workers, yielding items as
+        pages arrive. At most two pages per segment are held in memory.
+        """
+        if segments <= 1:
+            yield from self._paginate(table, 'scan', **kwargs)
+            return
+        
+        pages: 'queue.Queue[Any]' = queue.Queue(maxsize=segments * 2)
+        stop = threading.Event()
+        done = object()
+        
+        def offer(page: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(page, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def scan_segment(segment: int) -> None:
+            try:
+                for page in self._pages(table, 'scan', Segment=segment, TotalSegments=segments, **kwargs):
+                    if not offer(page):
+                        return
+                offer(done)
+            except Exception as e:
+                offer(e)
+        
+        for segment in range(segments):
+            threading.Thread(target=scan_segment, args=(segment,), daemon=True).start()
+        
+        remaining = segments
+        try:
+            while remaining:
+                page = pages.get()
+                if page is done:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            # Unblocks workers if the caller stops iterating early
+            stop.set()
     
     # Conversations operations
-    def save_message(self, message: Message) -> None:
-        """Save a message to conversations table."""
+    def save_message(self, message: Message, state: Optional[SessionState] = None) -> None:
+        """
+        Save a message to conversations table.
+        
+        With a session state, the message is added to it and both items are
+        written in one transaction. The state write only succeeds if the
+        stored state is still the version it was loaded at; otherwise (a
+        concurrent turn of the same session saved first) the message is
+        saved alone. A state that could not be loaded is never written.
+        """
         try:
-            self.conversations_table.put_item(Item=message.to_dynamo_item())
+            if state is None or not state.loaded:
+                self.conversations_table.put_item(Item=message.to_dynamo_item())
+            else:
+                state.add_turn(
+                    message,
+                    Config.SESSION_STATE_TURNS,
+                    Config.SESSION_TURN_MAX_CHARS,
+                    Config.SESSION_SUMMARY_MAX_CHARS,
+                )
+                if not self._put_message_and_state(message, state):
+                    logger.warning(f"Session state of {message.session_id} changed since it was loaded, not updated")
+                    self.conversations_table.put_item(Item=message.to_dynamo_item())
             logger.info(f"Saved message for session {message.session_id}")
         except Exception as e:
             logger.error(f"Error saving message: {e}")
             raise
     
+    def _put_message_and_state(self, message: Message, state: SessionState) -> bool:
+        """
+        Write a message and its session state with TransactWriteItems.
+        
+        Returns:
+            False if the state version check failed and nothing was written
+        """
+        table_name = self.conversations_table.name
+        if state.version is None:
+            condition = {'ConditionExpression': 'attribute_not_exists(PK)'}
+        else:
+            condition = {
+                'ConditionExpression': 'turnCount = :version',
+                'ExpressionAttributeValues': {':version': state.version},
+            }
+        
+        client = self.conversations_table.meta.client
+        try:
+            client.transact_write_items(TransactItems=[
+                {'Put': {'TableName': table_name, 'Item': message.to_dynamo_item()}},
+                {'Put': {'TableName': table_name, 'Item': state.to_dynamo_item(), **condition}},
+            ])
+        except client.exceptions.TransactionCanceledException as e:
+            reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+            if 'ConditionalCheckFailed' not in reasons:
+                raise
+            return False
+        
+        state.version = state.turn_count
+        return True
+    
+    def get_session_state(self, session_id: str) -> Optional[SessionState]:
+        """
+        Get the rolling state of a session with one (consistent) GetItem.
+        
+        Returns None only if the session has no state; errors propagate so
+        callers do not mistake a failed read for a new session.
+        """
+        response = deadline.call(
+            self._reading(self.conversations_table).get_item,
+            Key={'PK': f'SESSION#{session_id}', 'SK': 'STATE'},
+            ConsistentRead=True,
+        )
+        item = response.get('Item')
+        return SessionState.from_dynamo_item(item) if item else None
+    
+    def iter_conversation_history(
+        self,
+        session_id: str,
+        newest_first: bool = True,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream the raw message items of a session, page by page."""
+        return self._paginate(
+            self.conversations_table,
+            'query',
+            page_size=page_size,
+            projection=projection,
+            KeyConditionExpression=(
+                Key('PK').eq(f'SESSION#{session_id}') & Key('SK').begins_with('MSG#')
+            ),
+            ScanIndexForward=not newest_first,
+        )
+    
     def get_conversation_history(
         self, 
         session_id: str, 
@@ -39,21 +237,60 @@ class DynamoClient:
     ) -> List[Message]:
         """Get recent messages for a session."""
         try:
-            response = self.conversations_table.query(
-                KeyConditionExpression=Key('PK').eq(f'SESSION#{session_id}'),
-                ScanIndexForward=False,  # Most recent first
-                Limit=limit,
-            )
-            return [Message.from_dynamo_item(item) for item in response.get('Items', [])]
+            items = islice(self.iter_conversation_history(session_id, page_size=limit), limit)
+            return [Message.from_dynamo_item(item) for item in items]
         except Exception as e:
             logger.error(f"Error getting conversation history: {e}")
             return []
     
+    # Cache operations (shared tiers, stored alongside conversations)
+    def get_cached_response(self, cache_key: str) -> Optional[str]:
+        """Get a cached bot response, ignoring entries past their TTL."""
+        response = deadline.call(
+            self._reading(self.conversations_table).get_item,
+            Key={'PK': f'CACHE#{cache_key}', 'SK': 'RESPONSE'},
+        )
+        item = response.get('Item')
+        # DynamoDB deletes expired items lazily, so check TTL on read
+        if not item or int(item.get('TTL', 0)) <= int(time.time()):
+            return None
+        return item.get('response')
+    
+    def put_cached_response(self, cache_key: str, bot_response: str, ttl_seconds: int) -> None:
+        """Store a bot response in the shared cache."""
+        self.conversations_table.put_item(Item={
+            'PK': f'CACHE#{cache_key}',
+            'SK': 'RESPONSE',
+            'response': bot_response,
+            'TTL': int(time.time()) + ttl_seconds,
+        })
+    
+    def get_cached_translation(self, cache_key: str) -> Optional[str]:
+        """Get a translation memory entry, ignoring entries past their TTL."""
+        response = deadline.call(
+            self._reading(self.conversations_table).get_item,
+            Key={'PK': f'TRANSLATION#{cache_key}', 'SK': 'TEXT'},
+        )
+        item = response.get('Item')
+        if not item or int(item.get('TTL', 0)) <= int(time.time()):
+            return None
+        return item.get('translation')
+    
+    def put_cached_translation(self, cache_key: str, translation: str, ttl_seconds: int) -> None:
+        """Store a translation memory entry."""
+        self.conversations_table.put_item(Item={
+            'PK': f'TRANSLATION#{cache_key}',
+            'SK': 'TEXT',
+            'translation': translation,
+            'TTL': int(time.time()) + ttl_seconds,
+        })
+    
     # Knowledge Base operations
     def get_faq_by_topic(self, category: str, topic_id: str) -> Optional[FAQItem]:
         """Get a specific FAQ item."""
         try:
-            response = self.knowledge_base_table.get_item(
+            response = deadline.call(
+                self._reading(self.knowledge_base_table).get_item,
                 Key={
                     'PK': f'FAQ#{category}',
                     'SK': f'TOPIC#{topic_id}',
@@ -65,57 +302,446 @@ class DynamoClient:
             logger.error(f"Error getting FAQ: {e}")
             return None
     
+    def iter_faqs_by_category(
+        self,
+        category: str,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream the raw FAQ items of a category."""
+        return self._paginate(
+            self.knowledge_base_table,
+            'query',
+            page_size=page_size,
+            projection=projection,
+            KeyConditionExpression=Key('PK').eq(f'FAQ#{category}'),
+        )
+    
     def search_faqs_by_category(self, category: str) -> List[FAQItem]:
         """Get all FAQs in a category."""
         try:
-            response = self.knowledge_base_table.query(
-                KeyConditionExpression=Key('PK').eq(f'FAQ#{category}'),
-            )
-            return [FAQItem.from_dynamo_item(item) for item in response.get('Items', [])]
+            return [FAQItem.from_dynamo_item(item) for item in self.iter_faqs_by_category(category)]
         except Exception as e:
             logger.error(f"Error searching FAQs: {e}")
             return []
     
+    def iter_faqs_by_keyword(
+        self,
+        keyword: str,
+        segments: Optional[int] = None,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream raw FAQ items containing a keyword (filtered, optionally parallel scan)."""
+        return self._parallel_scan(
+            self.knowledge_base_table,
+            segments or Config.DYNAMO_SCAN_SEGMENTS,
+            page_size=page_size,
+            projection=projection,
+            FilterExpression='contains(keywords, :kw)',
+            ExpressionAttributeValues={':kw': keyword.lower()},
+        )
+    
     def search_faqs_by_keyword(self, keyword: str) -> List[FAQItem]:
         """Search FAQs containing a keyword."""
         try:
             # Scan with filter - for small knowledge bases
             # For larger ones, consider using OpenSearch
-            response = self.knowledge_base_table.scan(
-                FilterExpression='contains(keywords, :kw)',
-                ExpressionAttributeValues={':kw': keyword.lower()},
-            )
-            return [FAQItem.from_dynamo_item(item) for item in response.get('Items', [])]
+            return [FAQItem.from_dynamo_item(item) for item in self.iter_faqs_by_keyword(keyword)]
         except Exception as e:
             logger.error(f"Error searching FAQs by keyword: {e}")
             return []
     
+    def iter_all_faqs(
+        self,
+        segments: Optional[int] = None,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every raw item of the knowledge base (optionally parallel scan)."""
+        return self._parallel_scan(
+            self.knowledge_base_table,
+            segments or Config.DYNAMO_SCAN_SEGMENTS,
+            page_size=page_size,
+            projection=projection,
+        )
+    
+    def get_all_faqs(self) -> List[FAQItem]:
+        """
+        Load the whole knowledge base, following scan pagination.
+        Errors propagate so callers can keep serving a previous copy.
+        """
+        return [FAQItem.from_dynamo_item(item) for item in self.iter_all_faqs()]
+    
     # Analytics operations
     def save_analytics_event(self, event: AnalyticsEvent) -> None:
         """Save an analytics event."""
         try:
-            self.analytics_table.put_item(Item=event.to_dynamo_item())
+            self.analytics_table.put_item(Item=self._analytics_item(event))
             logger.info(f"Saved analytics event: {event.metric_type}")
         except Exception as e:
             logger.error(f"Error saving analytics event: {e}")
             raise
     
+    @staticmethod
+    def _analytics_item(event: AnalyticsEvent) -> Dict[str, Any]:
+        return event.to_dynamo_item(
+            Config.ANALYTICS_WRITE_SHARDS,
+            Config.ANALYTICS_SHARD_STRATEGY,
+            date_indexed=Config.ANALYTICS_DATE_INDEX_WRITES,
+        )
+    
+    def buffer_analytics_event(self, event: AnalyticsEvent) -> None:
+        """
+        Queue an analytics event for the next flush_analytics_events call.
+        
+        The event is counted in its hourly rollup, and kept as a raw item
+        with probability ANALYTICS_RAW_SAMPLE_RATE.
+        """
+        if Config.ANALYTICS_ROLLUP_ENABLED:
+            hour = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H')
+            counters = self._analytics_rollups.setdefault((event.metric_type, hour), {})
+            for name in event.rollup_counters(Config.ANALYTICS_ROLLUP_DIMENSIONS):
+                counters[name] = counters.get(name, 0) + 1
+        
+        if random.random() < Config.ANALYTICS_RAW_SAMPLE_RATE:
+            self._analytics_buffer.append(event)
+    
+    def flush_analytics_events(self, max_attempts: Optional[int] = None) -> int:
+        """
+        Write buffered analytics events with batch_write_item, 25 per request,
+        retrying unprocessed items with exponential backoff.
+        
+        Never raises: events that still fail are logged and dropped.
+        
+        Args:
+            max_attempts: Attempts per batch (default ANALYTICS_FLUSH_MAX_ATTEMPTS;
+                1 writes without retries or backoff sleeps)
+        
+        Returns:
+            Number of events written
+        """
+        self._flush_analytics_rollups()
+        
+        events, self._analytics_buffer = self._analytics_buffer, []
+        if not events:
+            return 0
+        
+        if max_attempts is None:
+            max_attempts = Config.ANALYTICS_FLUSH_MAX_ATTEMPTS
+        table_name = self.analytics_table.name
+        written = 0
+        for start in range(0, len(events), 25):
+            requests = [
+                {'PutRequest': {'Item': self._analytics_item(event)}}
+                for event in events[start:start + 25]
+            ]
+            
+            for attempt in range(max_attempts):
+                if attempt:
+                    time.sleep(min(Config.ANALYTICS_FLUSH_BASE_DELAY * (2 ** (attempt - 1)), 1.0))
+                try:
+                    response = self.dynamodb.batch_write_item(RequestItems={table_name: requests})
+                except Exception as e:
+                    logger.warning(f"Analytics batch write failed (attempt {attempt + 1}): {e}")
+                    continue
+                
+                unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+                written += len(requests) - len(unprocessed)
+                requests = unprocessed
+                if not requests:
+                    break
+            
+            if requests:
+                logger.error(f"Dropped {len(requests)} analytics events after {max_attempts} attempts")
+        
+        logger.info(f"Flushed {written}/{len(events)} analytics events")
+        return written
+    
+    def _flush_analytics_rollups(self) -> None:
+        """Apply buffered counters with one UpdateItem ADD per (metric type, hour)."""
+        rollups, self._analytics_rollups = self._analytics_rollups, {}
+        ttl = int(time.time()) + Config.ANALYTICS_ROLLUP_TTL_DAYS * 24 * 60 * 60
+        
+        for (metric_type, hour), counters in rollups.items():
+            try:
+                # ADD is not idempotent, so failures are not retried here
+                self.analytics_table.update_item(
+                    **self.rollup_update_args(metric_type, hour, counters, ttl, Config.ANALYTICS_ROLLUP_SHARDS)
+                )
+            except Exception as e:
+                logger.error(f"Error updating analytics rollup {metric_type} {hour}: {e}")
+    
+    @staticmethod
+    def rollup_update_args(
+        metric_type: str,
+        hour: str,
+        counters: Dict[str, int],
+        ttl: int,
+        shards: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        UpdateItem arguments that add counters to an hourly rollup.
+        
+        Every invocation updates the rollup of each metric it saw, so with
+        more than one shard the update goes to a random one of
+        ROLLUP#<metric>#<shard>; get_analytics_rollup sums them back.
+        Counters need no per-session locality, so ANALYTICS_SHARD_STRATEGY
+        does not apply here.
+        """
+        names = {'#hour': 'hour', '#ttl': 'TTL'}
+        values: Dict[str, Any] = {':hour': hour, ':ttl': ttl}
+        additions = []
+        for i, (name, count) in enumerate(counters.items()):
+            names[f'#c{i}'] = name
+            values[f':c{i}'] = count
+            additions.append(f'#c{i} :c{i}')
+        
+        partition = f'ROLLUP#{metric_type}#{random.randrange(shards)}' if shards > 1 else f'ROLLUP#{metric_type}'
+        return {
+            'Key': {'PK': partition, 'SK': f'HOUR#{hour}'},
+            'UpdateExpression': f"ADD {', '.join(additions)} SET #hour = :hour, #ttl = :ttl",
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values,
+        }
+    
+    def get_analytics_rollup(
+        self,
+        metric_type: str,
+        start_date: str,
+        end_date: str,
+        dimension: Optional[str] = None,
+        granularity: str = 'day',
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Read hourly rollups and aggregate them per bucket.
+        
+        Messages per intent per day over the last 30 days is
+        get_analytics_rollup('MESSAGE', start, end, dimension='intent'):
+        at most 24 * 30 items per write shard, however many messages there
+        were. The shards (and the unsharded key of older rollups) are
+        queried in parallel and summed.
+        
+        Args:
+            metric_type: Metric type (MESSAGE, CONNECTION, ...)
+            start_date: First day ('YYYY-MM-DD') or hour ('YYYY-MM-DDTHH')
+            end_date: Last day or hour, inclusive
+            dimension: Break counts down by this dimension, or None for totals
+            granularity: 'day' or 'hour'
+            
+        Returns:
+            {bucket: {dimension_value: count}}, with the single key 'count'
+            when no dimension is given
+        """
+        prefix = f'{dimension}#' if dimension else None
+        bucket_length = 10 if granularity == 'day' else 13
+        totals: Dict[str, Dict[str, int]] = {}
+        
+        try:
+            keys = self._analytics_keys(metric_type, Config.ANALYTICS_ROLLUP_SHARDS)
+            partitions = [f'ROLLUP#{key}' for key in keys]
+            items = self._query_partitions(partitions, lambda partition: {
+                'KeyConditionExpression': (
+                    Key('PK').eq(partition) &
+                    Key('SK').between(f'HOUR#{start_date}', f'HOUR#{end_date}~')
+                ),
+            })
+            for item in items:
+                bucket = totals.setdefault(item['hour'][:bucket_length], {})
+                for name, count in item.items():
+                    if prefix is None and name == 'count':
+                        key = 'count'
+                    elif prefix is not None and name.startswith(prefix):
+                        key = name[len(prefix):]
+                    else:
+                        continue
+                    bucket[key] = bucket.get(key, 0) + int(count)
+        except Exception as e:
+            logger.error(f"Error getting analytics rollup: {e}")
+        
+        return totals
+    
+    def _analytics_keys(self, metric_type: str, shards: Optional[int] = None) -> List[str]:
+        """Metric keys of every write shard, plus the unsharded key of older events."""
+        shards = Config.ANALYTICS_WRITE_SHARDS if shards is None else shards
+        return [metric_type] + [f'{metric_type}#{shard}' for shard in range(shards)]
+    
+    def _query_analytics_shards(self, metric_type: str, build_query_args) -> List[Dict[str, Any]]:
+        """
+        Scatter-gather: run a paginated query for every write shard of a
+        metric (plus its unsharded key) in parallel and merge the items.
+        
+        Args:
+            metric_type: Metric type
+            build_query_args: Function from shard metric key to query kwargs
+        """
+        items = self._query_partitions(self._analytics_keys(metric_type), build_query_args)
+        for item in items:
+            item['metricType'] = metric_type
+        return items
+    
+    def _query_partitions(self, keys: List[str], build_query_args) -> List[Dict[str, Any]]:
+        """Run a paginated analytics query per key in parallel and merge the items."""
+        def query_key(key: str) -> List[Dict[str, Any]]:
+            return list(self._paginate(self.analytics_table, 'query', **build_query_args(key)))
+        
+        with ThreadPoolExecutor(max_workers=min(Config.ANALYTICS_READ_WORKERS, len(keys))) as pool:
+            results = [future.result() for future in [deadline.submit(pool, query_key, key) for key in keys]]
+        return [item for key_items in results for item in key_items]
+    
+    @staticmethod
+    def _parse_time_bound(value: str) -> Tuple[datetime, timedelta]:
+        """Parse 'YYYY-MM-DD', 'YYYY-MM-DDTHH' or 'YYYY-MM-DDTHH:MM' into (start, unit)."""
+        formats = {10: ('%Y-%m-%d', timedelta(days=1)), 13: ('%Y-%m-%dT%H', timedelta(hours=1)),
+                   16: ('%Y-%m-%dT%H:%M', timedelta(minutes=1))}
+        if len(value) not in formats:
+            raise ValueError(f"Unsupported time bound: {value}")
+        fmt, unit = formats[len(value)]
+        return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc), unit
+    
+    def _event_key_bounds(self, start: str, end: str) -> Tuple[str, str]:
+        """EVENT#<ULID> sort key bounds covering [start, end] inclusive."""
+        start_time, _ = self._parse_time_bound(start)
+        end_time, unit = self._parse_time_bound(end)
+        lower = f'EVENT#{encode_ulid_time(int(start_time.timestamp() * 1000))}'
+        upper = f'EVENT#{encode_ulid_time(int((end_time + unit).timestamp() * 1000) - 1)}~'
+        return lower, upper
+    
+    def get_analytics_range(self, metric_type: str, start: str, end: str) -> List[Dict[str, Any]]:
+        """
+        Get analytics events in a time range straight from the base table,
+        using the time-ordered EVENT#<ULID> sort keys.
+        
+        Args:
+            metric_type: Metric type
+            start: First day, hour or minute (UTC), e.g. '2024-05-01T13:05'
+            end: Last day, hour or minute, inclusive
+            
+        Returns:
+            Events ordered by time
+        """
+        try:
+            lower, upper = self._event_key_bounds(start, end)
+            items = self._query_analytics_shards(metric_type, lambda metric_key: {
+                'KeyConditionExpression': (
+                    Key('PK').eq(f'METRIC#{metric_key}') &
+                    Key('SK').between(lower, upper)
+                ),
+            })
+            items.sort(key=lambda item: item['SK'])
+            return items
+        except Exception as e:
+            logger.error(f"Error getting analytics range: {e}")
+            return []
+    
+    def iter_analytics_range(
+        self,
+        metric_type: str,
+        start: str,
+        end: str,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream analytics events in a time range in time order, merging the
+        write shards lazily; memory stays at one page per shard.
+        Errors propagate to the caller.
+        """
+        lower, upper = self._event_key_bounds(start, end)
+        if projection and 'SK' not in projection:
+            projection = list(projection) + ['SK']
+        
+        shards = [
+            self._paginate(
+                self.analytics_table,
+                'query',
+                page_size=page_size,
+                projection=projection,
+                KeyConditionExpression=(
+                    Key('PK').eq(f'METRIC#{metric_key}') &
+                    Key('SK').between(lower, upper)
+                ),
+            )
+            for metric_key in self._analytics_keys(metric_type)
+        ]
+        for item in heapq.merge(*shards, key=lambda item: item['SK']):
+            item['metricType'] = metric_type
+            yield item
+    
+    def iter_analytics_by_type(
+        self,
+        metric_type: str,
+        start_date: str,
+        end_date: str,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream analytics events by type and date range with constant memory,
+        for reporting jobs. Events only reachable through DateIndex (written
+        before time-ordered keys) come first, then the rest in time order.
+        Errors propagate to the caller.
+        """
+        if Config.ANALYTICS_DATE_INDEX_READS:
+            lower, upper = self._event_key_bounds(start_date, end_date)
+            index_projection = projection
+            if projection and not {'SK', 'date'} <= set(projection):
+                index_projection = list(set(projection) | {'SK', 'date'})
+            
+            shards = [
+                self._paginate(
+                    self.analytics_table,
+                    'query',
+                    page_size=page_size,
+                    projection=index_projection,
+                    IndexName='DateIndex',
+                    KeyConditionExpression=(
+                        Key('metricType').eq(metric_key) & 
+                        Key('date').between(start_date, end_date)
+                    ),
+                )
+                for metric_key in self._analytics_keys(metric_type)
+            ]
+            for item in heapq.merge(*shards, key=lambda item: item['date']):
+                # Time-ordered events are yielded by the base table read below
+                if lower <= item['SK'] <= upper:
+                    continue
+                item['metricType'] = metric_type
+                yield item
+        
+        yield from self.iter_analytics_range(metric_type, start_date, end_date, page_size, projection)
+    
     def get_analytics_by_type(
         self, 
         metric_type: str, 
         start_date: str, 
         end_date: str
     ) -> List[Dict[str, Any]]:
-        """Get analytics events by type and date range."""
+        """
+        Get analytics events by type and date range.
+        
+        Reads the base table by sort key range; events written before the
+        switch to time-ordered keys are still read through DateIndex while
+        ANALYTICS_DATE_INDEX_READS is on.
+        """
+        items = self.get_analytics_range(metric_type, start_date, end_date)
+        if not Config.ANALYTICS_DATE_INDEX_READS:
+            return items
+        
         try:
-            response = self.analytics_table.query(
-                IndexName='DateIndex',
-                KeyConditionExpression=(
-                    Key('metricType').eq(metric_type) & 
+            lower, upper = self._event_key_bounds(start_date, end_date)
+            indexed = self._query_analytics_shards(metric_type, lambda metric_key: {
+                'IndexName': 'DateIndex',
+                'KeyConditionExpression': (
+                    Key('metricType').eq(metric_key) & 
                     Key('date').between(start_date, end_date)
                 ),
-            )
-            return response.get('Items', [])
+            })
         except Exception as e:
             logger.error(f"Error getting analytics: {e}")
-            return []
+            return items
+        
+        # With index writes still on, time-ordered events come back from both reads
+        items.extend(item for item in indexed if not lower <= item['SK'] <= upper)
+        items.sort(key=lambda item: item.get('date', ''))
+        return items
@@ -0,0 +1,147 @@
+"""
+In-memory inverted keyword index over the FAQ knowledge base.
+"""
+
+import logging
+import time
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional
+
+from .faq_search import FAQSearchEngine, SearchResult, normalize_keyword
+from .models import FAQItem
+
+logger = logging.getLogger(__name__)
+
+
+class FAQIndex:
+    """
+    Keyword -> FAQItem index loaded once per container and refreshed on a TTL,
+    plus a BM25 engine over the same snapshot for ranked retrieval.
+
+    Lookups are in-process; DynamoDB is only touched when the index is
+    stale, and the previous index keeps serving while (or if) a refresh
+    fails.
+
+    The BM25 engine comes from the prebuilt index while it matches the
+    knowledge base. Otherwise it is built off the request path: in the
+    background on the first load (ranked search returns nothing and rank
+    keeps the given order until it is ready), and on the refresh thread
+    after that.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], List[FAQItem]],
+        ttl_seconds: int = 300,
+        prebuilt: Optional[FAQSearchEngine] = None,
+    ):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.prebuilt = prebuilt
+        self._index: Dict[str, List[FAQItem]] = {}
+        self._faqs: List[FAQItem] = []
+        self._engine = FAQSearchEngine([])
+        self._size = 0
+        self._loaded_at: Optional[float] = None
+        self._lock = Lock()
+
+    def search(self, keyword: str) -> List[FAQItem]:
+        """Get FAQs tagged with the keyword (same semantics as the keyword scan)."""
+        self._ensure_fresh()
+        return list(self._index.get(normalize_keyword(keyword), []))
+
+    def search_ranked(
+        self,
+        query: str,
+        language: Optional[str] = None,
+        top_k: int = 3,
+        min_score: float = 0.0,
+    ) -> List[SearchResult]:
+        """Get the top-k FAQs for free text, scored with BM25."""
+        self._ensure_fresh()
+        return self._engine.search(query, language, top_k=top_k, min_score=min_score)
+
+    def rank(self, faqs: List[FAQItem], query: str, language: Optional[str] = None) -> List[FAQItem]:
+        """Order candidate FAQs by BM25 relevance to the query."""
+        return self._engine.rank(faqs, query, language)
+
+    def refresh(self) -> None:
+        """Rebuild the index from the loader."""
+        started = time.perf_counter()
+        faqs = self.loader()
+        engine = self.prebuilt.for_faqs(faqs) if self.prebuilt else None
+        if engine is None and self._loaded_at is not None:
+            # Later refreshes already run in the background
+            engine = FAQSearchEngine(faqs)
+        self._index = self.build(faqs)
+        self._faqs = faqs
+        if engine is not None:
+            self._engine = engine
+        else:
+            Thread(target=self._build_engine, args=(faqs,), name='faq-engine-build', daemon=True).start()
+        self._size = len(faqs)
+        self._loaded_at = time.monotonic()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"FAQ index loaded {self._size} FAQs, {len(self._index)} keywords in {elapsed_ms:.0f}ms")
+
+    def _build_engine(self, faqs: List[FAQItem]) -> None:
+        """Build the BM25 engine for a snapshot, unless a newer one replaced it meanwhile."""
+        started = time.perf_counter()
+        try:
+            engine = FAQSearchEngine(faqs)
+        except Exception as e:
+            logger.error(f"Error building BM25 FAQ index: {e}")
+            return
+        if self._faqs is faqs:
+            self._engine = engine
+        logger.info(f"BM25 FAQ index built for {len(faqs)} FAQs in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    @staticmethod
+    def build(faqs: List[FAQItem]) -> Dict[str, List[FAQItem]]:
+        """Build the inverted index, keeping knowledge base order per keyword."""
+        index: Dict[str, List[FAQItem]] = {}
+        # Keywords repeat across FAQs: normalize each one once
+        normalized: Dict[str, str] = {}
+        for faq in faqs:
+            keywords = set()
+            for keyword in faq.keywords:
+                if keyword not in normalized:
+                    normalized[keyword] = normalize_keyword(keyword)
+                keywords.add(normalized[keyword])
+            for keyword in keywords:
+                index.setdefault(keyword, []).append(faq)
+        return index
+
+    @property
+    def faqs(self) -> List[FAQItem]:
+        """Current snapshot of the knowledge base (the same list until the next refresh)."""
+        self._ensure_fresh()
+        return self._faqs
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _ensure_fresh(self) -> None:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return
+
+        # One refresher at a time. The first load blocks; later refreshes
+        # run in the background while lookups keep reading the current index.
+        if not self._lock.acquire(blocking=self._loaded_at is None):
+            return
+        if self._loaded_at is None:
+            self._refresh_locked()
+        else:
+            Thread(target=self._refresh_locked, name='faq-index-refresh', daemon=True).start()
+
+    def _refresh_locked(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing FAQ index: {e}")
+            if self._loaded_at is not None:
+                # Back off for a full TTL instead of retrying on every lookup
+                self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
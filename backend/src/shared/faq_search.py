@@ -0,0 +1,360 @@
+"""
+Ranked BM25 retrieval over the multilingual FAQ knowledge base.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import FAQItem
+
+logger = logging.getLogger(__name__)
+
+# Prebuilt index files, written with the FAQ vectors
+INDEX_FILE = 'faq_bm25.npz'
+INDEX_METADATA_FILE = 'faq_bm25.json'
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = {
+    'es': {
+        'a', 'al', 'como', 'con', 'cual', 'cuales', 'de', 'del', 'el', 'en', 'es', 'esta',
+        'hay', 'la', 'las', 'lo', 'los', 'me', 'mi', 'mis', 'no', 'o', 'para', 'por', 'que',
+        'se', 'si', 'su', 'sus', 'tu', 'tus', 'un', 'una', 'y', 'yo',
+    },
+    'en': {
+        'a', 'an', 'and', 'are', 'can', 'do', 'does', 'for', 'how', 'i', 'in', 'is', 'it', 'my',
+        'of', 'on', 'or', 'the', 'to', 'what', 'when', 'where', 'which', 'you', 'your',
+    },
+    'pt': {
+        'a', 'ao', 'as', 'com', 'como', 'da', 'das', 'de', 'do', 'dos', 'e', 'em', 'eu',
+        'meu', 'minha', 'na', 'no', 'o', 'os', 'ou', 'para', 'por', 'qual', 'quais', 'que',
+        'se', 'seu', 'seus', 'sua', 'um', 'uma',
+    },
+}
+ALL_STOPWORDS = set().union(*STOPWORDS.values())
+
+# Term weights per field (BM25F-style): curated keywords count most
+FIELD_WEIGHTS = {'keywords': 3.0, 'question': 2.0, 'answer': 1.0}
+
+
+# Fast path for the accents used in es/pt; anything else goes through NFKD
+ACCENT_TABLE = str.maketrans('áàâãäéèêëíìîïóòôõöúùûüçñ', 'aaaaaeeeeiiiiooooouuuucn')
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Lowercase, trim and strip accents ("Envío " -> "envio")."""
+    folded = keyword.strip().lower().translate(ACCENT_TABLE)
+    if folded.isascii():
+        return folded
+    decomposed = unicodedata.normalize('NFKD', folded)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str, language: Optional[str] = None) -> List[str]:
+    """
+    Accent-fold, lowercase and split text, dropping the language's
+    stopwords (all languages when None) and plural endings.
+    """
+    stopwords = STOPWORDS.get(language, ALL_STOPWORDS)
+    tokens = []
+    for token in TOKEN_PATTERN.findall(normalize_keyword(text)):
+        if token in stopwords:
+            continue
+        tokens.append(_stem(token))
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def _stem(token: str) -> str:
+    """Strip plural endings shared by es/en/pt ("envios" -> "envio")."""
+    if len(token) > 4 and token.endswith('es') and token[-3] not in 'aeiou':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+@dataclass
+class SearchResult:
+    """A ranked FAQ match."""
+    faq: FAQItem
+    score: float
+
+
+class FAQSearchEngine:
+    """
+    BM25 index over question_*, answer_* and keywords of every FAQItem.
+
+    Postings are precomputed as NumPy arrays (document ids ascending, with
+    their final impact) so a query only touches the documents that contain
+    its terms. Top-k search prunes with each term's maximum impact
+    (MaxScore): once the terms left cannot lift a new document above the
+    current k-th score, they only update the remaining candidates.
+
+    The index is built offline with the FAQ vectors
+    (scripts/build_faq_vectors.py) and reused by for_faqs() while the
+    knowledge base still matches it.
+    """
+
+    def __init__(
+        self,
+        faqs: List[FAQItem],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.faqs = faqs
+        self.k1 = k1
+        self.b = b
+        # term -> (start, end) in _doc_ids / _impacts, and its largest impact
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._max_impact: Dict[str, float] = {}
+        self._doc_ids = np.zeros(0, dtype=np.int32)
+        self._impacts = np.zeros(0, dtype=np.float64)
+        self._build()
+        self._keys = {(faq.category, faq.topic_id): doc_id for doc_id, faq in enumerate(faqs)}
+        self._fingerprints: Optional[List[str]] = None
+
+    def _build(self) -> None:
+        terms: Dict[str, int] = {}
+        term_idx: List[int] = []
+        doc_idx: List[int] = []
+        tfs: List[float] = []
+        for doc_id, faq in enumerate(self.faqs):
+            for term, tf in _weighted_term_freqs(faq).items():
+                term_idx.append(terms.setdefault(term, len(terms)))
+                doc_idx.append(doc_id)
+                tfs.append(tf)
+        if not terms:
+            return
+
+        term_idx = np.asarray(term_idx, dtype=np.int64)
+        doc_idx = np.asarray(doc_idx, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float64)
+
+        # Length normalization is folded into the stored impact (idf * term score)
+        n_docs = len(self.faqs)
+        lengths = np.bincount(doc_idx, weights=tfs, minlength=n_docs)
+        norms = self.k1 * (1 - self.b + self.b * lengths / lengths.mean())
+        doc_freqs = np.bincount(term_idx, minlength=len(terms))
+        idf = np.log(1 + (n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        impacts = idf[term_idx] * tfs * (self.k1 + 1) / (tfs + norms[doc_idx])
+
+        # Group by term; a stable sort keeps document ids ascending per term
+        order = np.argsort(term_idx, kind='stable')
+        self._doc_ids = doc_idx[order]
+        self._impacts = impacts[order]
+        ends = np.cumsum(doc_freqs)
+        max_impacts = np.maximum.reduceat(self._impacts, ends - doc_freqs)
+        for term, idx in terms.items():
+            self._spans[term] = (int(ends[idx] - doc_freqs[idx]), int(ends[idx]))
+            self._max_impact[term] = float(max_impacts[idx])
+
+    def _postings(self, term: str):
+        start, end = self._spans[term]
+        return self._doc_ids[start:end], self._impacts[start:end]
+
+    def _query_terms(self, query: str, language: Optional[str]) -> List[str]:
+        """Indexed query terms, by descending maximum impact."""
+        terms = {term for term in tokenize(query, language) if term in self._spans}
+        return sorted(terms, key=lambda term: (-self._max_impact[term], term))
+
+    def score_all(self, query: str, language: Optional[str] = None) -> Dict[int, float]:
+        """BM25 score of every document matching at least one query term."""
+        scores = np.zeros(len(self.faqs))
+        for term in self._query_terms(query, language):
+            doc_ids, impacts = self._postings(term)
+            scores[doc_ids] += impacts
+        matched = np.flatnonzero(scores)
+        return dict(zip(matched.tolist(), scores[matched].tolist()))
+
+    def search(
+        self,
+        query: str,
+        language: Optional[str] = None,
+        top_k: int = 3,
+        min_score: float = 0.0,
+    ) -> List[SearchResult]:
+        """
+        Get the top-k FAQs for a query.
+
+        Args:
+            query: User text or topic
+            language: Query language (es, en, pt) for stopword removal
+            top_k: Maximum number of results
+            min_score: Drop results scoring below this
+
+        Returns:
+            Results ordered by descending score
+        """
+        terms = self._query_terms(query, language)
+        if not terms or top_k <= 0:
+            return []
+
+        # Upper bound of what the terms from i on can add to a document
+        bounds = np.cumsum([self._max_impact[term] for term in reversed(terms)])[::-1]
+        scores = np.zeros(len(self.faqs))
+        candidates = None
+        for i, term in enumerate(terms):
+            doc_ids, impacts = self._postings(term)
+            if candidates is None:
+                scores[doc_ids] += impacts
+                if i + 1 < len(terms):
+                    matched = np.flatnonzero(scores)
+                    threshold = _kth_largest(scores[matched], top_k)
+                    if threshold > bounds[i + 1]:
+                        # No unseen document can reach the top-k any more
+                        candidates = matched
+            else:
+                # Only candidates that can still reach the k-th score count
+                threshold = _kth_largest(scores[candidates], top_k)
+                candidates = candidates[scores[candidates] + bounds[i] >= threshold]
+                positions = np.minimum(np.searchsorted(doc_ids, candidates), len(doc_ids) - 1)
+                found = doc_ids[positions] == candidates
+                scores[candidates[found]] += impacts[positions[found]]
+
+        if candidates is None:
+            candidates = np.flatnonzero(scores)
+        candidate_scores = scores[candidates]
+        if len(candidates) > top_k:
+            # Candidates are in ascending id order: ties at the k-th score
+            # go to the earliest FAQs
+            kth = _kth_largest(candidate_scores, top_k)
+            above = candidate_scores > kth
+            tied = np.flatnonzero(candidate_scores == kth)[:top_k - int(above.sum())]
+            keep = np.concatenate([np.flatnonzero(above), tied])
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        # Descending score, ties in knowledge base order
+        order = np.lexsort((candidates, -candidate_scores))
+        return [
+            SearchResult(faq=self.faqs[doc_id], score=score)
+            for doc_id, score in zip(candidates[order].tolist(), candidate_scores[order].tolist())
+            if score > min_score
+        ]
+
+    def rank(self, faqs: List[FAQItem], query: str, language: Optional[str] = None) -> List[FAQItem]:
+        """Order a candidate list (e.g. keyword matches) by relevance to the query."""
+        # FAQs missing from the index get -1, which no posting matches
+        doc_ids = np.array([self._keys.get((faq.category, faq.topic_id), -1) for faq in faqs], dtype=np.int64)
+        scores = np.zeros(len(faqs))
+        for term in self._query_terms(query, language):
+            term_docs, impacts = self._postings(term)
+            positions = np.minimum(np.searchsorted(term_docs, doc_ids), len(term_docs) - 1)
+            found = term_docs[positions] == doc_ids
+            scores[found] += impacts[positions[found]]
+        order = sorted(range(len(faqs)), key=lambda i: -scores[i])
+        return [faqs[i] for i in order]
+
+    def for_faqs(self, faqs: List[FAQItem]) -> Optional['FAQSearchEngine']:
+        """
+        This index serving the given knowledge base, or None if it was built
+        from different FAQs (or different texts) and has to be rebuilt.
+        """
+        fingerprints = self.fingerprints
+        if len(faqs) != len(fingerprints):
+            return None
+        serving: List[Optional[FAQItem]] = [None] * len(fingerprints)
+        for faq in faqs:
+            doc_id = self._keys.get((faq.category, faq.topic_id))
+            if doc_id is None or serving[doc_id] is not None or index_fingerprint(faq) != fingerprints[doc_id]:
+                return None
+            serving[doc_id] = faq
+
+        engine = copy.copy(self)
+        engine.faqs = serving
+        return engine
+
+    @property
+    def fingerprints(self) -> List[str]:
+        """index_fingerprint of each indexed FAQ, by document id."""
+        if self._fingerprints is None:
+            self._fingerprints = [index_fingerprint(faq) for faq in self.faqs]
+        return self._fingerprints
+
+    def save(self, directory: str) -> None:
+        """Write the index next to the FAQ vectors (see load)."""
+        terms = list(self._spans)
+        np.savez(
+            os.path.join(directory, INDEX_FILE),
+            doc_ids=self._doc_ids,
+            impacts=self._impacts,
+            spans=np.array([self._spans[term] for term in terms], dtype=np.int64).reshape(-1, 2),
+            max_impacts=np.array([self._max_impact[term] for term in terms], dtype=np.float64),
+        )
+        with open(os.path.join(directory, INDEX_METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump({
+                'k1': self.k1,
+                'b': self.b,
+                'terms': terms,
+                'keys': [[faq.category, faq.topic_id] for faq in self.faqs],
+                'fingerprints': self.fingerprints,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['FAQSearchEngine']:
+        """
+        Load an index written by save, or None if it is unavailable. It
+        holds no FAQs: for_faqs attaches the live knowledge base to it.
+        """
+        try:
+            with open(os.path.join(directory, INDEX_METADATA_FILE), 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            arrays = np.load(os.path.join(directory, INDEX_FILE))
+        except (OSError, ValueError) as e:
+            logger.warning(f"BM25 FAQ index not loaded from {directory}: {e}")
+            return None
+
+        engine = cls([], metadata['k1'], metadata['b'])
+        engine._keys = {(category, topic_id): doc_id for doc_id, (category, topic_id) in enumerate(metadata['keys'])}
+        engine._fingerprints = metadata['fingerprints']
+        engine._doc_ids = arrays['doc_ids']
+        engine._impacts = arrays['impacts']
+        spans = arrays['spans'].tolist()
+        max_impacts = arrays['max_impacts'].tolist()
+        for term, (start, end), max_impact in zip(metadata['terms'], spans, max_impacts):
+            engine._spans[term] = (start, end)
+            engine._max_impact[term] = max_impact
+        logger.info(f"Loaded BM25 FAQ index for {len(engine._fingerprints)} FAQs, {len(engine._spans)} terms")
+        return engine
+
+
+def _kth_largest(values, k: int) -> float:
+    """k-th largest value, or 0 if there are fewer than k."""
+    if len(values) < k:
+        return 0.0
+    return float(np.partition(values, len(values) - k)[len(values) - k])
+
+
+def index_fingerprint(faq: FAQItem) -> str:
+    """Version of the FAQ texts that were indexed, to detect a stale prebuilt index."""
+    texts = [' '.join(faq.keywords), faq.question_es, faq.question_en, faq.question_pt,
+             faq.answer_es, faq.answer_en, faq.answer_pt]
+    return hashlib.sha1('\x1f'.join(texts).encode('utf-8')).hexdigest()[:16]
+
+
+def _weighted_term_freqs(faq: FAQItem) -> Dict[str, float]:
+    """Field-weighted term frequencies for one FAQ."""
+    fields = [
+        ('keywords', ' '.join(faq.keywords), None),
+        ('question', faq.question_es, 'es'),
+        ('question', faq.question_en, 'en'),
+        ('question', faq.question_pt, 'pt'),
+        ('answer', faq.answer_es, 'es'),
+        ('answer', faq.answer_en, 'en'),
+        ('answer', faq.answer_pt, 'pt'),
+    ]
+    freqs: Dict[str, float] = {}
+    for field, text, language in fields:
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text, language):
+            freqs[token] = freqs.get(token, 0.0) + weight
+    return freqs
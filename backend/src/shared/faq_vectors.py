@@ -0,0 +1,248 @@
+"""
+Vectorized semantic FAQ matcher over a precomputed NumPy matrix.
+
+FAQ questions, keywords and labelled paraphrases are embedded as character
+n-gram TF-IDF vectors hashed into a fixed dimension, together with
+out-of-scope examples that no FAQ answers. The matrix is built offline
+(scripts/build_faq_vectors.py) and memory-mapped at runtime, so matching
+a message is one vectorized dot product against every row.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Matcher is disabled when NumPy is not in the layer
+    np = None
+
+from .faq_search import ALL_STOPWORDS, normalize_keyword
+from .models import FAQItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 4096
+NGRAM_RANGE = (3, 4)
+MATRIX_FILE = 'faq_vectors.npy'
+IDF_FILE = 'faq_idf.npy'
+METADATA_FILE = 'faq_vectors.json'
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# row_faq value of the out-of-scope rows
+NO_FAQ = -1
+
+
+def hashed_ngram_counts(text: str, dim: int, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> Dict[int, int]:
+    """
+    Count character n-grams of the accent-folded text without stopwords,
+    hashed into `dim` buckets.
+    """
+    words = [w for w in NON_ALNUM.sub(' ', normalize_keyword(text)).split() if w not in ALL_STOPWORDS]
+    normalized = f" {' '.join(words)} "
+    counts: Dict[int, int] = {}
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        for i in range(len(normalized) - n + 1):
+            bucket = zlib.crc32(normalized[i:i + n].encode('utf-8')) % dim
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def faq_texts(faq: FAQItem) -> List[str]:
+    """Texts embedded for one FAQ; each becomes a row of the matrix."""
+    texts = [faq.question_es, faq.question_en, faq.question_pt, ' '.join(faq.keywords)]
+    return [text for text in texts if text]
+
+
+def faq_fingerprint(faq: FAQItem) -> str:
+    """Version of the FAQ texts that were embedded, to detect a stale artifact."""
+    return hashlib.sha1('\n'.join(faq_texts(faq)).encode('utf-8')).hexdigest()[:16]
+
+
+def build_matrix(
+    faqs: List[FAQItem],
+    dim: int = DEFAULT_DIM,
+    examples: Iterable[Tuple[str, Optional[str]]] = (),
+):
+    """
+    Build the L2-normalized TF-IDF matrix for the FAQs.
+
+    Args:
+        faqs: Knowledge base
+        dim: Hashing dimension
+        examples: Extra (text, topic_id) rows: paraphrases of a FAQ, or
+            out-of-scope messages with topic_id None
+
+    Returns:
+        Tuple of (matrix [rows x dim] float32, idf [dim] float32, row -> FAQ index or NO_FAQ)
+    """
+    rows = []
+    row_faq = []
+    for faq_idx, faq in enumerate(faqs):
+        for text in faq_texts(faq):
+            rows.append(hashed_ngram_counts(text, dim))
+            row_faq.append(faq_idx)
+
+    faq_by_topic = {faq.topic_id: faq_idx for faq_idx, faq in enumerate(faqs)}
+    for text, topic_id in examples:
+        if topic_id is not None and topic_id not in faq_by_topic:
+            continue
+        rows.append(hashed_ngram_counts(text, dim))
+        row_faq.append(NO_FAQ if topic_id is None else faq_by_topic[topic_id])
+
+    doc_freq = np.zeros(dim, dtype=np.float64)
+    for counts in rows:
+        doc_freq[list(counts)] += 1
+    idf = (np.log((1 + len(rows)) / (1 + doc_freq)) + 1).astype(np.float32)
+
+    matrix = np.zeros((len(rows), dim), dtype=np.float32)
+    for row, counts in enumerate(rows):
+        for bucket, count in counts.items():
+            matrix[row, bucket] = (1 + math.log(count)) * idf[bucket]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+
+    return matrix, idf, row_faq
+
+
+@dataclass
+class SemanticMatch:
+    """Best semantic FAQ match for a message."""
+    faq: FAQItem
+    score: float
+    # Lead over the best row of any other FAQ or of the out-of-scope examples
+    margin: float
+
+
+class SemanticFAQMatcher:
+    """
+    Scores a message against every row with one matrix-vector product.
+
+    A match is accepted only if its best row belongs to a FAQ (not to the
+    out-of-scope examples), scores at least min_score and leads every other
+    FAQ and the out-of-scope rows by min_margin.
+    """
+
+    def __init__(
+        self,
+        matrix,
+        idf,
+        row_faq: List[int],
+        faqs: List[FAQItem],
+        fingerprints: Optional[List[str]] = None,
+    ):
+        self.matrix = matrix
+        self.idf = idf
+        self.row_faq = np.asarray(row_faq)
+        self.faqs = faqs
+        self.fingerprints = fingerprints or [faq_fingerprint(faq) for faq in faqs]
+        self.dim = matrix.shape[1]
+        # FAQ served for each artifact FAQ (None: not in the live knowledge base)
+        self._serving: List[Optional[FAQItem]] = list(faqs)
+        self._row_live = np.ones(len(self.row_faq), dtype=bool)
+        self._synced_with: Optional[List[FAQItem]] = None
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['SemanticFAQMatcher']:
+        """
+        Load the artifact written by scripts/build_faq_vectors.py.
+
+        Returns:
+            The matcher, or None if NumPy or the artifact is unavailable
+        """
+        if np is None:
+            logger.warning("NumPy not available, semantic FAQ matching disabled")
+            return None
+
+        try:
+            with open(os.path.join(directory, METADATA_FILE), 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            matrix = np.load(os.path.join(directory, MATRIX_FILE), mmap_mode='r')
+            idf = np.load(os.path.join(directory, IDF_FILE))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Semantic FAQ artifact not loaded from {directory}: {e}")
+            return None
+
+        faqs = [FAQItem(**faq) for faq in metadata['faqs']]
+        logger.info(f"Loaded semantic FAQ matrix {matrix.shape} for {len(faqs)} FAQs")
+        return cls(matrix, idf, metadata['row_faq'], faqs, metadata.get('fingerprints'))
+
+    def sync(self, live_faqs: List[FAQItem]) -> None:
+        """
+        Serve answers from the live knowledge base (the FAQ index snapshot).
+
+        FAQs missing from it, or whose questions and keywords changed since
+        the artifact was built, are not matched until it is rebuilt.
+        """
+        if live_faqs is self._synced_with:
+            return
+
+        live = {(faq.category, faq.topic_id): faq for faq in live_faqs}
+        serving: List[Optional[FAQItem]] = []
+        stale = []
+        for faq, fingerprint in zip(self.faqs, self.fingerprints):
+            current = live.get((faq.category, faq.topic_id))
+            if current is None or faq_fingerprint(current) != fingerprint:
+                stale.append(faq.topic_id)
+                current = None
+            serving.append(current)
+
+        self._serving = serving
+        self._row_live = np.array([
+            faq_idx == NO_FAQ or serving[faq_idx] is not None for faq_idx in self.row_faq
+        ], dtype=bool)
+        self._synced_with = live_faqs
+        if stale:
+            logger.warning(f"Semantic FAQ artifact out of date for {stale}, not matching them")
+
+    def vectorize(self, text: str):
+        """Embed a message with the artifact's IDF weights."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for bucket, count in hashed_ngram_counts(text, self.dim).items():
+            vector[bucket] = (1 + math.log(count)) * self.idf[bucket]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def match(
+        self,
+        text: str,
+        min_score: float = 0.0,
+        min_margin: float = 0.0,
+        live_faqs: Optional[List[FAQItem]] = None,
+    ) -> Optional[SemanticMatch]:
+        """
+        Find the FAQ most similar to the message.
+
+        Args:
+            text: User message
+            min_score: Minimum cosine similarity to accept
+            min_margin: Minimum lead over any other FAQ and the out-of-scope rows
+            live_faqs: Current knowledge base, to check the artifact against
+
+        Returns:
+            The best match, or None if it is out of scope or not confident enough
+        """
+        if live_faqs is not None:
+            self.sync(live_faqs)
+        if not text or not self._row_live.any():
+            return None
+
+        scores = np.where(self._row_live, self.matrix @ self.vectorize(text), -1.0)
+        best_row = int(np.argmax(scores))
+        faq_idx = int(self.row_faq[best_row])
+        score = float(scores[best_row])
+        if faq_idx == NO_FAQ or score < min_score:
+            return None
+
+        others = scores[self.row_faq != faq_idx]
+        margin = score - float(others.max()) if len(others) else score
+        if margin < min_margin:
+            return None
+        return SemanticMatch(faq=self._serving[faq_idx], score=score, margin=margin)
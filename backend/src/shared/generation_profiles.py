@@ -0,0 +1,163 @@
+"""
+Generation profiles and per-model request/response adapters for Bedrock.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .config import Config
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Model and sampling settings for one kind of request."""
+    name: str
+    model_id: str
+    max_tokens: int
+    temperature: float
+    reasoning: bool = False
+
+
+class ModelAdapter(ABC):
+    """Translates between a model family's request/response formats and ours."""
+
+    @abstractmethod
+    def build_body(self, system: str, prompt: str, profile: GenerationProfile) -> Dict[str, Any]:
+        """Build the InvokeModel request body for a system and user prompt."""
+
+    @abstractmethod
+    def parse_response(self, body: Dict[str, Any]) -> Tuple[str, str]:
+        """Extract (content, reasoning) from an InvokeModel response body."""
+
+    @abstractmethod
+    def parse_stream_chunk(self, payload: Dict[str, Any]) -> Tuple[str, str]:
+        """Extract (content delta, reasoning delta) from one stream chunk."""
+
+
+class DeepSeekAdapter(ModelAdapter):
+    """DeepSeek R1: OpenAI-style chat messages, returns reasoning_content."""
+
+    def build_body(self, system: str, prompt: str, profile: GenerationProfile) -> Dict[str, Any]:
+        return {
+            'messages': [
+                {'role': 'system', 'content': system},
+                {'role': 'user', 'content': prompt},
+            ],
+            'max_tokens': profile.max_tokens,
+            'temperature': profile.temperature,
+        }
+
+    def parse_response(self, body: Dict[str, Any]) -> Tuple[str, str]:
+        choices = body.get('choices') or [{}]
+        message = choices[0].get('message', {})
+        return message.get('content') or '', message.get('reasoning_content') or ''
+
+    def parse_stream_chunk(self, payload: Dict[str, Any]) -> Tuple[str, str]:
+        content, reasoning = [], []
+        for choice in payload.get('choices', []):
+            delta = choice.get('delta') or choice.get('message') or {}
+            content.append(delta.get('content') or '')
+            reasoning.append(delta.get('reasoning_content') or '')
+        return ''.join(content), ''.join(reasoning)
+
+
+class AnthropicAdapter(ModelAdapter):
+    """Claude Messages API; reasoning maps to extended thinking."""
+
+    THINKING_BUDGET_TOKENS = 1024
+
+    def build_body(self, system: str, prompt: str, profile: GenerationProfile) -> Dict[str, Any]:
+        body = {
+            'anthropic_version': 'bedrock-2023-05-31',
+            'system': system,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': profile.max_tokens,
+            'temperature': profile.temperature,
+        }
+        if profile.reasoning:
+            # Extended thinking needs temperature 1 and room beyond the budget
+            body['thinking'] = {'type': 'enabled', 'budget_tokens': self.THINKING_BUDGET_TOKENS}
+            body['max_tokens'] = profile.max_tokens + self.THINKING_BUDGET_TOKENS
+            body['temperature'] = 1
+        return body
+
+    def parse_response(self, body: Dict[str, Any]) -> Tuple[str, str]:
+        blocks = body.get('content', [])
+        content = ''.join(block.get('text', '') for block in blocks if block.get('type') == 'text')
+        reasoning = ''.join(block.get('thinking', '') for block in blocks if block.get('type') == 'thinking')
+        return content, reasoning
+
+    def parse_stream_chunk(self, payload: Dict[str, Any]) -> Tuple[str, str]:
+        if payload.get('type') != 'content_block_delta':
+            return '', ''
+        delta = payload.get('delta', {})
+        return delta.get('text', ''), delta.get('thinking', '')
+
+
+class NovaAdapter(ModelAdapter):
+    """Amazon Nova: messages-v1 schema with inferenceConfig, no reasoning."""
+
+    def build_body(self, system: str, prompt: str, profile: GenerationProfile) -> Dict[str, Any]:
+        return {
+            'schemaVersion': 'messages-v1',
+            'system': [{'text': system}],
+            'messages': [{'role': 'user', 'content': [{'text': prompt}]}],
+            'inferenceConfig': {
+                'maxTokens': profile.max_tokens,
+                'temperature': profile.temperature,
+            },
+        }
+
+    def parse_response(self, body: Dict[str, Any]) -> Tuple[str, str]:
+        blocks = body.get('output', {}).get('message', {}).get('content', [])
+        return ''.join(block.get('text', '') for block in blocks), ''
+
+    def parse_stream_chunk(self, payload: Dict[str, Any]) -> Tuple[str, str]:
+        delta = payload.get('contentBlockDelta', {}).get('delta', {})
+        return delta.get('text', ''), ''
+
+
+# Model ID fragment -> adapter (inference profile IDs carry a region prefix)
+ADAPTERS = {
+    'deepseek': DeepSeekAdapter(),
+    'anthropic': AnthropicAdapter(),
+    'amazon.nova': NovaAdapter(),
+}
+
+
+def get_adapter(model_id: str) -> ModelAdapter:
+    """Adapter for a model ID; DeepSeek's format if the family is unknown."""
+    for fragment, adapter in ADAPTERS.items():
+        if fragment in model_id:
+            return adapter
+    return ADAPTERS['deepseek']
+
+
+PROFILES: Dict[str, GenerationProfile] = {
+    # One-sentence answers to simple intents
+    'fast': GenerationProfile(
+        'fast', Config.BEDROCK_FAST_MODEL_ID, Config.BEDROCK_FAST_MAX_TOKENS, 0.5, reasoning=False,
+    ),
+    'standard': GenerationProfile(
+        'standard', Config.BEDROCK_STANDARD_MODEL_ID, Config.BEDROCK_STANDARD_MAX_TOKENS, 0.7, reasoning=False,
+    ),
+    # Complaints and messages Lex could not classify
+    'reasoning': GenerationProfile(
+        'reasoning', Config.BEDROCK_REASONING_MODEL_ID, Config.BEDROCK_REASONING_MAX_TOKENS, 0.7, reasoning=True,
+    ),
+}
+
+SIMPLE_INTENTS = {
+    'GreetingIntent', 'FarewellIntent', 'HelpIntent', 'GetHelpIntent',
+    'PriceQueryIntent', 'ShippingQueryIntent', 'ReturnQueryIntent', 'FAQQueryIntent',
+}
+
+
+def select_profile(intent_name: Optional[str], sentiment: Optional[str] = None) -> GenerationProfile:
+    """Pick the generation profile for a message by intent and sentiment."""
+    if sentiment == 'NEGATIVE' or intent_name in (None, 'FallbackIntent'):
+        return PROFILES['reasoning']
+    if intent_name in SIMPLE_INTENTS:
+        return PROFILES['fast']
+    return PROFILES['standard']
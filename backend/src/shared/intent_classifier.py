@@ -0,0 +1,193 @@
+"""
+In-process intent pre-classifier.
+
+Utterances are embedded as hashed TF-IDF vectors of character n-grams and
+words; a message takes the intent of its most similar training utterance
+(cosine similarity, through an inverted index). The model is built offline
+by scripts/build_intent_model.py from the Lex sample utterances and shipped
+next to this module as intent_model.json.
+
+The cosine similarity is not a probability: the model also carries a
+calibration table (leave-one-out precision per similarity bin) that maps it
+to the share of messages classified correctly, the scale of Lex's
+nluConfidence that the response router thresholds are set for.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .faq_search import normalize_keyword
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_model.json')
+
+DEFAULT_DIM = 1 << 18
+NGRAM_RANGE = (3, 4)
+
+# Lower edges of the similarity bins of the calibration table
+CALIBRATION_EDGES = [0.0, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def hashed_features(text: str, dim: int = DEFAULT_DIM) -> Dict[int, int]:
+    """
+    Count the words and the character n-grams of the accent-folded text,
+    hashed into `dim` buckets. Stopwords are kept: in short commands like
+    "que tal" they carry the intent.
+    """
+    words = NON_ALNUM.sub(' ', normalize_keyword(text)).split()
+    features = [f'w:{word}' for word in words]
+    padded = f" {' '.join(words)} "
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    counts: Counter = Counter(zlib.crc32(feature.encode('utf-8')) % dim for feature in features)
+    return dict(counts)
+
+
+def _weigh(counts: Dict[int, int], idf: Dict[int, float], default_idf: float) -> Dict[int, float]:
+    """L2-normalized sublinear TF-IDF vector."""
+    vector = {bucket: (1 + math.log(count)) * idf.get(bucket, default_idf) for bucket, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {bucket: weight / norm for bucket, weight in vector.items()} if norm else {}
+
+
+def build_model(samples: Iterable[Tuple[str, str]], dim: int = DEFAULT_DIM) -> Dict:
+    """
+    Build the model from labelled utterances.
+
+    Args:
+        samples: (text, intent) pairs; duplicates are kept once
+
+    Returns:
+        {'dim', 'default_idf', 'idf': {bucket: idf}, 'examples': [[intent, {bucket: weight}]]}
+    """
+    unique = list(dict.fromkeys((text.strip(), intent) for text, intent in samples if text.strip()))
+    counts = [hashed_features(text, dim) for text, _ in unique]
+
+    doc_freq: Counter = Counter()
+    for features in counts:
+        doc_freq.update(features.keys())
+    total = len(counts)
+    idf = {bucket: math.log((1 + total) / (1 + df)) + 1 for bucket, df in doc_freq.items()}
+    default_idf = math.log(1 + total) + 1
+
+    examples = []
+    for (_, intent), features in zip(unique, counts):
+        vector = _weigh(features, idf, default_idf)
+        examples.append([intent, {str(bucket): round(weight, 4) for bucket, weight in vector.items()}])
+
+    return {
+        'dim': dim,
+        'default_idf': round(default_idf, 4),
+        'idf': {str(bucket): round(weight, 4) for bucket, weight in idf.items()},
+        'examples': examples,
+    }
+
+
+def build_calibration(
+    scored: Iterable[Tuple[float, bool]],
+    edges: List[float] = CALIBRATION_EDGES,
+) -> List[List[float]]:
+    """
+    Map similarity to the probability that the predicted intent is right.
+
+    Args:
+        scored: (similarity, prediction was correct) of held-out predictions
+
+    Returns:
+        [[lower edge, probability]] with the probability non-decreasing in
+        the similarity (adjacent bins pooled where it was not) and smoothed
+        towards 1/2 so that a few lucky predictions do not read as certainty
+    """
+    bins = [[0, 0] for _ in edges]
+    for score, correct in scored:
+        index = max([0] + [i for i, edge in enumerate(edges) if score >= edge])
+        bins[index][0] += int(correct)
+        bins[index][1] += 1
+
+    # Pool adjacent violators: blocks of [correct, total, first bin, last bin]
+    blocks: List[List[int]] = []
+    for i, (correct, total) in enumerate(bins):
+        blocks.append([correct, total, i, i])
+        while len(blocks) > 1 and _rate(blocks[-2]) > _rate(blocks[-1]):
+            last = blocks.pop()
+            blocks[-1] = [blocks[-1][0] + last[0], blocks[-1][1] + last[1], blocks[-1][2], last[3]]
+
+    table = []
+    for correct, total, first, last in blocks:
+        for i in range(first, last + 1):
+            table.append([edges[i], round(_rate([correct, total]), 4)])
+    return table
+
+
+def _rate(block: List[int]) -> float:
+    return (block[0] + 1) / (block[1] + 2)
+
+
+class IntentClassifier:
+    """Nearest-neighbour intent classifier over hashed TF-IDF vectors."""
+
+    def __init__(self, model: Dict):
+        self.dim = model['dim']
+        self.default_idf = model['default_idf']
+        self.idf = {int(bucket): weight for bucket, weight in model['idf'].items()}
+        self.intents = [intent for intent, _ in model['examples']]
+        self.calibration = model.get('calibration', [])
+        # Inverted index: bucket -> [(example, weight)]
+        self.postings: Dict[int, List[Tuple[int, float]]] = {}
+        for example, (_, vector) in enumerate(model['examples']):
+            for bucket, weight in vector.items():
+                self.postings.setdefault(int(bucket), []).append((example, weight))
+
+    @classmethod
+    def load(cls, path: str = MODEL_FILE) -> Optional['IntentClassifier']:
+        """Load the model from disk, or None if it is unavailable."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                classifier = cls(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Intent model not loaded from {path}: {e}")
+            return None
+        logger.info(f"Loaded intent model with {len(classifier.intents)} utterances")
+        return classifier
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Classify a message.
+
+        Returns:
+            Tuple of (intent of the most similar utterance or None,
+            cosine similarity between 0 and 1)
+        """
+        vector = _weigh(hashed_features(text, self.dim), self.idf, self.default_idf)
+        scores: Dict[int, float] = {}
+        for bucket, weight in vector.items():
+            for example, example_weight in self.postings.get(bucket, ()):
+                scores[example] = scores.get(example, 0.0) + weight * example_weight
+
+        if not scores:
+            return None, 0.0
+        best = max(scores, key=scores.get)
+        return self.intents[best], min(1.0, scores[best])
+
+    def calibrated(self, similarity: float) -> Optional[float]:
+        """
+        Probability that a prediction with this similarity is right, on the
+        scale of Lex's nluConfidence (None for models built without a
+        calibration table).
+        """
+        if not self.calibration:
+            return None
+        probability = self.calibration[0][1]
+        for edge, value in self.calibration:
+            if similarity >= edge:
+                probability = value
+        return probability
@@ -0,0 +1,115 @@
+"""
+In-process character-trigram language identifier for es/en/pt.
+
+Profiles are built offline by scripts/build_language_profiles.py and
+shipped next to this module as language_profiles.json. Besides the
+supported languages they include a few unsupported ones (fr, de, it), so
+messages in those languages are recognized as such instead of being
+forced onto the closest supported language.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+PROFILES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'language_profiles.json')
+
+# Letters only; accents are kept because they separate es from pt
+NON_LETTER = re.compile(r'[^a-záàâãäéèêëíìîïóòôõöúùûüçñ]+')
+
+
+def extract_trigrams(text: str) -> List[str]:
+    """Character trigrams of each word, padded with spaces at word boundaries."""
+    trigrams = []
+    for word in NON_LETTER.sub(' ', text.lower()).split():
+        padded = f' {word} '
+        trigrams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def build_profiles(samples: Iterable[Tuple[str, str]], top_k: int = 600) -> Dict[str, Dict]:
+    """
+    Build per-language trigram log-probability profiles.
+
+    Args:
+        samples: (text, language) pairs
+        top_k: Trigrams kept per language
+
+    Returns:
+        {language: {'unseen': logprob, 'trigrams': {trigram: logprob}}}
+    """
+    counts: Dict[str, Counter] = {}
+    for text, language in samples:
+        counts.setdefault(language, Counter()).update(extract_trigrams(text))
+
+    # One back-off for every language: a per-language one would favour the
+    # languages with the least training text on unfamiliar input
+    unseen = round(math.log(0.5 / max(sum(counter.values()) for counter in counts.values())), 3)
+
+    profiles = {}
+    for language, counter in counts.items():
+        top = counter.most_common(top_k)
+        total = sum(counter.values())
+        profiles[language] = {
+            'unseen': unseen,
+            'trigrams': {gram: round(math.log(count / total), 3) for gram, count in top},
+        }
+    return profiles
+
+
+class LanguageDetector:
+    """
+    Naive Bayes over character trigrams with a softmax confidence.
+
+    The softmax only compares the known profiles, so it stays confident on
+    text in a language none of them covers. Such text is reported as
+    unknown (confidence 0) when its best profile is an unsupported language
+    or fits it worse than min_logprob per trigram.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict], min_logprob: Optional[float] = None):
+        self.profiles = profiles
+        self.min_logprob = Config.LANGUAGE_DETECT_MIN_LOGPROB if min_logprob is None else min_logprob
+
+    @classmethod
+    def load(cls, path: str = PROFILES_FILE) -> Optional['LanguageDetector']:
+        """Load profiles from disk, or None if they are unavailable."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Language profiles not loaded from {path}: {e}")
+            return None
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """
+        Detect the language of the text.
+
+        Returns:
+            Tuple of (language_code, confidence between 0 and 1); the
+            default language with confidence 0 if the text is not in a
+            supported language
+        """
+        trigrams = extract_trigrams(text)
+        if not trigrams:
+            return Config.DEFAULT_LANGUAGE, 0.0
+
+        scores = {}
+        for language, profile in self.profiles.items():
+            table = profile['trigrams']
+            unseen = profile['unseen']
+            scores[language] = sum(table.get(gram, unseen) for gram in trigrams)
+
+        best = max(scores, key=scores.get)
+        if best not in Config.SUPPORTED_LANGUAGES or scores[best] / len(trigrams) < self.min_logprob:
+            return Config.DEFAULT_LANGUAGE, 0.0
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
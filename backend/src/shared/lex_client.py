@@ -3,28 +3,207 @@ Amazon Lex client for Chatbot.
 """
 
 import boto3
-from typing import Dict, Any, Optional
+import json
+from dataclasses import asdict
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
+from . import deadline
 from .config import Config
+from .faq_search import TOKEN_PATTERN, normalize_keyword
+from .models import AnalyticsEvent
+from .response_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# A fulfillment Lambda that answers a turn marks it in the session
+# attributes, so the orchestrator reuses the answer instead of generating
+# another one. The turn ID is a request attribute and does not persist, so
+# an answer left in the session by an earlier turn is never reused.
+TURN_ID_ATTRIBUTE = 'turnId'
+ANSWER_TURN_ATTRIBUTE = 'answerTurn'
+ANSWER_SOURCE_ATTRIBUTE = 'answerSource'
+ANSWER_GENERATIONS_ATTRIBUTE = 'answerGenerations'
+
+# Recent turns the orchestrator already loaded, carried to the fulfillment
+# Lambda as JSON [[user, bot], ...] (oldest first) so it does not query
+# DynamoDB for the history again
+HISTORY_ATTRIBUTE = 'recentTurns'
+
+# Analytics events fulfillment recorded for a turn, handed back as JSON
+# {"turn": <turn ID>, "events": [...]} so the orchestrator writes them after
+# replying to the user instead of fulfillment writing them before answering Lex
+ANALYTICS_ATTRIBUTE = 'analyticsEvents'
+
+
+def encode_history(turns: List[Dict[str, str]], max_bytes: int) -> Optional[str]:
+    """
+    Encode session turns for HISTORY_ATTRIBUTE, dropping the oldest ones
+    until the encoding fits in max_bytes.
+    
+    Returns:
+        The encoded turns, or None if not even the last turn fits
+    """
+    pairs = [[turn.get('u', ''), turn.get('b', '')] for turn in turns]
+    while True:
+        encoded = json.dumps(pairs, ensure_ascii=False, separators=(',', ':'))
+        if len(encoded.encode('utf-8')) <= max_bytes:
+            return encoded
+        if len(pairs) <= 1:
+            return None
+        pairs.pop(0)
+
+
+def decode_history(event: Dict[str, Any]) -> Optional[List[Tuple[str, str]]]:
+    """
+    Recent (user, bot) turns carried in a fulfillment event.
+    
+    Returns:
+        The turns, oldest first ([] for a new session), or None if the event
+        carries none and the history has to be read from DynamoDB
+    """
+    encoded = (event.get('requestAttributes') or {}).get(HISTORY_ATTRIBUTE)
+    if encoded is None:
+        return None
+    try:
+        return [(user, bot) for user, bot in json.loads(encoded)]
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Could not decode carried history: {e}")
+        return None
+
+
+def answer_attributes(event: Dict[str, Any], source: str, generations: int = 0) -> Dict[str, str]:
+    """
+    Session attributes marking a fulfillment answer for the orchestrator.
+    
+    Args:
+        event: Lex fulfillment event
+        source: What produced the answer (e.g. 'bedrock', 'faq_semantic')
+        generations: LLM generations made to produce it
+        
+    Returns:
+        The attributes, or {} if the request carried no turn ID
+    """
+    turn_id = (event.get('requestAttributes') or {}).get(TURN_ID_ATTRIBUTE)
+    if not turn_id:
+        return {}
+    return {
+        ANSWER_TURN_ATTRIBUTE: turn_id,
+        ANSWER_SOURCE_ATTRIBUTE: source,
+        ANSWER_GENERATIONS_ATTRIBUTE: str(generations),
+    }
+
+
+def encode_analytics_events(
+    event: Dict[str, Any],
+    events: List[AnalyticsEvent],
+    max_bytes: int,
+) -> Optional[Dict[str, str]]:
+    """
+    Session attributes handing fulfillment's analytics events to the orchestrator.
+    
+    Args:
+        event: Lex fulfillment event
+        events: Events recorded while fulfilling it
+        max_bytes: Size cap for the encoded events
+        
+    Returns:
+        The attributes, or None if the request carried no turn ID (Lex was
+        not called by the orchestrator) or the events do not fit in max_bytes
+    """
+    turn_id = (event.get('requestAttributes') or {}).get(TURN_ID_ATTRIBUTE)
+    if not turn_id:
+        return None
+    encoded = json.dumps(
+        {'turn': turn_id, 'events': [asdict(e) for e in events]},
+        ensure_ascii=False, separators=(',', ':'), default=str,
+    )
+    if len(encoded.encode('utf-8')) > max_bytes:
+        return None
+    return {ANALYTICS_ATTRIBUTE: encoded}
+
+
+def get_fulfillment_analytics(lex_result: Dict[str, Any], turn_id: str) -> List[AnalyticsEvent]:
+    """
+    Analytics events fulfillment handed back for this turn, for the
+    orchestrator to write once it has replied.
+    
+    Args:
+        lex_result: Result of LexClient.recognize_text
+        turn_id: Turn ID sent as a request attribute
+        
+    Returns:
+        The events ([] if fulfillment recorded none for this turn)
+    """
+    encoded = (lex_result.get('session_attributes') or {}).get(ANALYTICS_ATTRIBUTE)
+    if not encoded:
+        return []
+    try:
+        handed = json.loads(encoded)
+        if handed.get('turn') != turn_id:
+            return []
+        return [AnalyticsEvent(**e) for e in handed.get('events', [])]
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.warning(f"Could not decode fulfillment analytics events: {e}")
+        return []
+
+
+def get_fulfillment_answer(lex_result: Dict[str, Any], turn_id: str) -> Optional[Dict[str, Any]]:
+    """
+    The answer fulfillment gave for this turn, if any.
+    
+    Args:
+        lex_result: Result of LexClient.recognize_text
+        turn_id: Turn ID sent as a request attribute
+        
+    Returns:
+        Dict with text, source and generations, or None
+    """
+    attributes = lex_result.get('session_attributes') or {}
+    if attributes.get(ANSWER_TURN_ATTRIBUTE) != turn_id:
+        return None
+    
+    contents = [message.get('content') for message in lex_result.get('messages', []) if message.get('content')]
+    if not contents:
+        return None
+    return {
+        'text': '\n'.join(contents),
+        'source': attributes.get(ANSWER_SOURCE_ATTRIBUTE, 'fulfillment'),
+        'generations': int(attributes.get(ANSWER_GENERATIONS_ATTRIBUTE, '0') or 0),
+    }
+
 
 class LexClient:
     """Client for Amazon Lex v2 operations."""
     
     def __init__(self):
-        self.client = boto3.client('lexv2-runtime', region_name=Config.AWS_REGION)
+        self.clients = deadline.BudgetedClient(lambda config: boto3.client('lexv2-runtime', config=config))
         self.bot_id = Config.LEX_BOT_ID
         self.bot_alias_id = Config.LEX_BOT_ALIAS_ID
+        # Classification results of stateless intents, and the sessions Lex
+        # last left eliciting a slot (whose next message must reach Lex)
+        self.cache = LRUCache(
+            max_entries=Config.LEX_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.LEX_CACHE_TTL_SECONDS,
+        ) if Config.LEX_CACHE_ENABLED else None
+        self._eliciting = LRUCache(max_entries=Config.LEX_CACHE_MAX_ENTRIES, ttl_seconds=Config.LEX_CACHE_TTL_SECONDS)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_bypassed = 0
+    
+    @property
+    def client(self):
+        """Lex runtime client with timeouts that fit the current request's deadline."""
+        return self.clients.current()
     
     def recognize_text(
         self, 
         session_id: str, 
         text: str, 
         locale_id: str = 'es_ES',
-        session_state: Optional[Dict[str, Any]] = None
+        session_state: Optional[Dict[str, Any]] = None,
+        request_attributes: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         Send text to Lex for recognition.
@@ -34,10 +213,22 @@ class LexClient:
             text: User input text
             locale_id: Locale for the bot (es_ES, en_US, pt_BR)
             session_state: Optional session state for context
+            request_attributes: Optional attributes for this request only
+                (passed to the fulfillment Lambda, not kept in the session)
+            use_cache: False when the caller knows the session is mid-dialog
             
         Returns:
             Lex response with intent and messages
         """
+        cache_key = self._cache_key(session_id, text, locale_id, session_state, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                logger.info(f"Lex cache hit for session {session_id}")
+                return json.loads(cached)
+            self.cache_misses += 1
+        
         try:
             params = {
                 'botId': self.bot_id,
@@ -49,33 +240,91 @@ class LexClient:
             
             if session_state:
                 params['sessionState'] = session_state
+            if request_attributes:
+                params['requestAttributes'] = request_attributes
             
-            response = self.client.recognize_text(**params)
+            response = deadline.call(self.client.recognize_text, **params)
             
             logger.info(f"Lex response for session {session_id}: {response.get('sessionState', {}).get('intent', {}).get('name', 'Unknown')}")
             
-            return {
-                'intent_name': response.get('sessionState', {}).get('intent', {}).get('name', 'FallbackIntent'),
+            intent_name = response.get('sessionState', {}).get('intent', {}).get('name', 'FallbackIntent')
+            dialog_action = response.get('sessionState', {}).get('dialogAction', {}).get('type')
+            self._eliciting.put(session_id, '1' if dialog_action == 'ElicitSlot' else '')
+            result = {
+                'intent_name': intent_name,
+                'confidence': self._intent_confidence(response, intent_name),
                 'intent_state': response.get('sessionState', {}).get('intent', {}).get('state', 'Failed'),
                 'messages': response.get('messages', []),
                 'session_state': response.get('sessionState', {}),
+                'session_attributes': response.get('sessionState', {}).get('sessionAttributes', {}),
                 'slots': response.get('sessionState', {}).get('intent', {}).get('slots', {}),
             }
             
+            if cache_key is not None and dialog_action == 'Close' and intent_name in Config.LEX_CACHE_INTENTS:
+                # Session-specific state is left out of the cached copy
+                self.cache.put(cache_key, json.dumps({
+                    **result, 'session_state': {}, 'session_attributes': {}, 'source': 'lex_cache',
+                }))
+            return result
+            
         except Exception as e:
             logger.error(f"Error calling Lex: {e}")
             return {
                 'intent_name': 'FallbackIntent',
+                'confidence': None,
                 'intent_state': 'Failed',
                 'messages': [{'content': 'Lo siento, ocurrió un error. Por favor, intenta de nuevo.', 'contentType': 'PlainText'}],
                 'session_state': {},
+                'session_attributes': {},
                 'slots': {},
             }
     
+    def _cache_key(
+        self,
+        session_id: str,
+        text: str,
+        locale_id: str,
+        session_state: Optional[Dict[str, Any]],
+        use_cache: bool,
+    ) -> Optional[str]:
+        """Cache key for a request, or None when it must reach Lex."""
+        if self.cache is None:
+            return None
+        eliciting = (
+            self._eliciting.get(session_id)
+            or (session_state or {}).get('dialogAction', {}).get('type') == 'ElicitSlot'
+        )
+        if not use_cache or eliciting:
+            self.cache_bypassed += 1
+            return None
+        normalized = ' '.join(TOKEN_PATTERN.findall(normalize_keyword(text)))
+        return f'{locale_id}#{normalized}' if normalized else None
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit ratio and Lex calls avoided by the classification cache."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'bypassed': self.cache_bypassed,
+            'hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            'lex_calls_avoided': self.cache_hits,
+            'entries': len(self.cache) if self.cache is not None else 0,
+        }
+    
+    @staticmethod
+    def _intent_confidence(response: Dict[str, Any], intent_name: str) -> Optional[float]:
+        """NLU confidence of the chosen intent, or None if Lex reported none."""
+        for interpretation in response.get('interpretations', []):
+            if interpretation.get('intent', {}).get('name') == intent_name:
+                return interpretation.get('nluConfidence', {}).get('score')
+        return None
+    
     def get_session(self, session_id: str, locale_id: str = 'es_ES') -> Dict[str, Any]:
         """Get current session state."""
         try:
-            response = self.client.get_session(
+            response = deadline.call(
+                self.client.get_session,
                 botId=self.bot_id,
                 botAliasId=self.bot_alias_id,
                 localeId=locale_id,
@@ -89,7 +338,8 @@ class LexClient:
     def delete_session(self, session_id: str, locale_id: str = 'es_ES') -> bool:
         """Delete a session."""
         try:
-            self.client.delete_session(
+            deadline.call(
+                self.client.delete_session,
                 botId=self.bot_id,
                 botAliasId=self.bot_alias_id,
                 localeId=locale_id,
@@ -5,6 +5,41 @@ Data models for Chatbot.
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Optional, List, Dict, Any
+import os
+import random
+import time
+import zlib
+
+# Write-sharding strategies for analytics partition keys
+SHARD_RANDOM = 'random'  # spread every write uniformly
+SHARD_HASH = 'hash'      # same session (or event) always lands on the same shard
+
+# Crockford base32, as used by ULIDs; sorts the same as the numbers it encodes
+ULID_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def encode_ulid_time(timestamp_ms: int) -> str:
+    """Encode a millisecond timestamp as the 10-character ULID time prefix."""
+    chars = []
+    for _ in range(10):
+        timestamp_ms, remainder = divmod(timestamp_ms, 32)
+        chars.append(ULID_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def new_event_id(timestamp_ms: Optional[int] = None) -> str:
+    """
+    Generate a ULID: millisecond time prefix plus 80 random bits, so event IDs
+    (and the EVENT#<id> sort keys built from them) are ordered by time.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = int(time.time() * 1000)
+    randomness = int.from_bytes(os.urandom(10), 'big')
+    chars = []
+    for _ in range(16):
+        randomness, remainder = divmod(randomness, 32)
+        chars.append(ULID_ALPHABET[remainder])
+    return encode_ulid_time(timestamp_ms) + ''.join(reversed(chars))
 
 
 @dataclass
@@ -52,6 +87,88 @@ class Message:
         )
 
 
+@dataclass
+class SessionState:
+    """
+    Rolling per-session state: the last turns in compact form plus a short
+    summary of the turns that rolled off, so a session's history is one item
+    of bounded size.
+    """
+    session_id: str
+    turns: List[Dict[str, str]]
+    summary: str = ''
+    turn_count: int = 0
+    updated_at: str = ''
+    ttl: int = 0
+    # turnCount of the stored item this state was read from (None if there
+    # was none); the write back is conditional on it
+    version: Optional[int] = None
+    # False if the stored state could not be read: it is then never written
+    loaded: bool = True
+    
+    # Separates summarized turns inside `summary`
+    SUMMARY_SEPARATOR = ' | '
+    
+    def add_turn(self, message: 'Message', max_turns: int, max_turn_chars: int, max_summary_chars: int) -> None:
+        """Append a turn, folding the oldest ones into the summary beyond max_turns."""
+        self.turns.append({
+            'u': message.user_message[:max_turn_chars],
+            'b': message.bot_response[:max_turn_chars],
+            'i': message.intent_name,
+        })
+        while len(self.turns) > max_turns:
+            oldest = self.turns.pop(0)
+            parts = self.summary.split(self.SUMMARY_SEPARATOR) if self.summary else []
+            parts.append(oldest['u'][:max_summary_chars])
+            while len(self.SUMMARY_SEPARATOR.join(parts)) > max_summary_chars:
+                parts.pop(0)
+            self.summary = self.SUMMARY_SEPARATOR.join(parts)
+        
+        self.turn_count += 1
+        self.updated_at = message.created_at
+        self.ttl = message.ttl
+    
+    @classmethod
+    def from_messages(
+        cls,
+        session_id: str,
+        messages: List['Message'],
+        max_turns: int,
+        max_turn_chars: int,
+        max_summary_chars: int,
+    ) -> 'SessionState':
+        """Rebuild the state from stored messages (most recent first)."""
+        state = cls(session_id=session_id, turns=[])
+        for message in reversed(messages):
+            state.add_turn(message, max_turns, max_turn_chars, max_summary_chars)
+        return state
+    
+    def to_dynamo_item(self) -> Dict[str, Any]:
+        """Convert to DynamoDB item format."""
+        return {
+            'PK': f'SESSION#{self.session_id}',
+            'SK': 'STATE',
+            'turns': self.turns,
+            'summary': self.summary,
+            'turnCount': self.turn_count,
+            'updatedAt': self.updated_at,
+            'TTL': self.ttl,
+        }
+    
+    @classmethod
+    def from_dynamo_item(cls, item: Dict[str, Any]) -> 'SessionState':
+        """Create from DynamoDB item."""
+        return cls(
+            session_id=item['PK'].replace('SESSION#', ''),
+            turns=item.get('turns', []),
+            summary=item.get('summary', ''),
+            turn_count=int(item.get('turnCount', 0)),
+            updated_at=item.get('updatedAt', ''),
+            ttl=int(item.get('TTL', 0)),
+            version=int(item.get('turnCount', 0)),
+        )
+
+
 @dataclass
 class Conversation:
     """Represents a conversation session."""
@@ -130,14 +247,54 @@ class AnalyticsEvent:
     metadata: Dict[str, Any]
     ttl: int
     
-    def to_dynamo_item(self) -> Dict[str, Any]:
-        """Convert to DynamoDB item format."""
-        return {
-            'PK': f'METRIC#{self.metric_type}',
+    def shard_for(self, shards: int, strategy: str = SHARD_RANDOM) -> int:
+        """Pick the write shard for this event."""
+        if strategy == SHARD_HASH:
+            key = str(self.metadata.get('sessionId') or self.event_id)
+            return zlib.crc32(key.encode('utf-8')) % shards
+        return random.randrange(shards)
+    
+    def to_dynamo_item(
+        self,
+        shards: int = 1,
+        strategy: str = SHARD_RANDOM,
+        date_indexed: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Convert to DynamoDB item format.
+        
+        With more than one shard, the metric type in the partition key (and in
+        the DateIndex key) gets a '#<shard>' suffix so writes for one metric
+        spread over several partitions. With date_indexed=False the item has
+        no metricType attribute and is left out of the (sparse) DateIndex.
+        """
+        metric_key = self.metric_type
+        if shards > 1:
+            metric_key = f'{self.metric_type}#{self.shard_for(shards, strategy)}'
+        item = {
+            'PK': f'METRIC#{metric_key}',
             'SK': f'EVENT#{self.event_id}',
-            'metricType': self.metric_type,
+            'metricType': metric_key,
             'date': self.date,
             'value': self.value,
             'metadata': self.metadata,
             'TTL': self.ttl,
         }
+        if not date_indexed:
+            del item['metricType']
+        return item
+    
+    def rollup_counters(self, dimensions: List[str]) -> List[str]:
+        """
+        Counter attributes this event increments in its hourly rollup:
+        'count' plus '<dimension>#<value>' for each dimension present in metadata.
+        """
+        counters = ['count']
+        for dimension in dimensions:
+            value = self.metadata.get(dimension)
+            if value is None or value == '':
+                continue
+            if isinstance(value, bool):
+                value = str(value).lower()
+            counters.append(f'{dimension}#{value}')
+        return counters
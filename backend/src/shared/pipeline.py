@@ -0,0 +1,124 @@
+"""
+Dependency-aware stage executor for the message pipeline.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """A unit of work in the pipeline.
+
+    `func` is called with the results of the stages listed in `depends_on`
+    as keyword arguments.
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class PipelineResult:
+    """Results and timings of a pipeline run."""
+    results: Dict[str, Any]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+
+class StageExecutor:
+    """Runs independent stages concurrently on a bounded thread pool."""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+        # Kept alive across warm invocations; threads are created lazily
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='stage',
+        )
+
+    def run(self, stages: List[Stage]) -> PipelineResult:
+        """
+        Run stages as soon as their dependencies are satisfied.
+
+        Args:
+            stages: Stages to run; dependencies must refer to stages in the list
+
+        Returns:
+            PipelineResult with each stage's return value and duration
+        """
+        self._validate(stages)
+
+        started = time.perf_counter()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+
+        while pending or running:
+            ready = [
+                stage for stage in pending.values()
+                if all(dep in results for dep in stage.depends_on)
+            ]
+            for stage in ready:
+                del pending[stage.name]
+                kwargs = {dep: results[dep] for dep in stage.depends_on}
+                if self.max_workers == 1:
+                    results[stage.name], timings[stage.name] = _timed(stage.func, kwargs)
+                else:
+                    # Stages see the request's deadline (a context variable)
+                    running[deadline.submit(self._pool, _timed, stage.func, kwargs)] = stage.name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                # Re-raise stage errors to the caller, like the sequential path
+                results[name], timings[name] = future.result()
+
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Pipeline finished in {total_ms:.1f}ms: {_format_timings(timings)}")
+        return PipelineResult(results=results, timings_ms=timings, total_ms=total_ms)
+
+    def _validate(self, stages: List[Stage]) -> None:
+        """Reject unknown dependencies and cycles before submitting any work."""
+        names = {stage.name for stage in stages}
+        if len(names) != len(stages):
+            raise ValueError("Duplicate stage names")
+
+        for stage in stages:
+            missing = set(stage.depends_on) - names
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {sorted(missing)}")
+
+        resolved = set()
+        remaining = list(stages)
+        while remaining:
+            ready = [s for s in remaining if set(s.depends_on) <= resolved]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages: {sorted(s.name for s in remaining)}")
+            resolved.update(s.name for s in ready)
+            remaining = [s for s in remaining if s.name not in resolved]
+
+
+def _timed(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    """Call func and return its result with the elapsed time in ms."""
+    started = time.perf_counter()
+    result = func(**kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _format_timings(timings: Dict[str, float]) -> str:
+    return ', '.join(f"{name}={ms:.1f}ms" for name, ms in timings.items())
@@ -0,0 +1,180 @@
+"""
+Multi-tier cache for generated bot responses.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from .faq_search import TOKEN_PATTERN, normalize_keyword
+
+logger = logging.getLogger(__name__)
+
+# What to do with requests whose context includes conversation history
+HISTORY_POLICY_BYPASS = 'bypass'    # never cache them
+HISTORY_POLICY_SESSION = 'session'  # cache them, scoped to the session
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry TTL and entry/byte limits."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 1024 * 1024, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, tuple[str, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value.encode('utf-8'))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class ResponseCache:
+    """
+    Response cache keyed on normalized prompt, intent, language and a digest
+    of the generation context.
+
+    Tier 1 is a per-container LRU; tier 2 is an optional shared store with
+    `get_cached_response(key)` / `put_cached_response(key, response, ttl)`
+    (DynamoClient implements it). Shared-tier errors never fail a request.
+    """
+
+    def __init__(
+        self,
+        local: LRUCache,
+        shared: Optional[Any] = None,
+        shared_ttl_seconds: int = 3600,
+        history_policy: str = HISTORY_POLICY_BYPASS,
+    ):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self.history_policy = history_policy
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def make_key(
+        self,
+        prompt: str,
+        intent_name: str,
+        language: str,
+        context: str,
+        session_id: str = '',
+        has_history: bool = False,
+    ) -> Optional[str]:
+        """
+        Build the cache key for a request.
+
+        Returns:
+            The key, or None when the history policy says not to cache or
+            the prompt has no Latin letters or digits to key on
+        """
+        scope = ''
+        if has_history:
+            if self.history_policy != HISTORY_POLICY_SESSION:
+                self.bypassed += 1
+                return None
+            scope = session_id
+
+        normalized_prompt = ' '.join(TOKEN_PATTERN.findall(normalize_keyword(prompt)))
+        if not normalized_prompt:
+            # Emoji, CJK and other scripts normalize to nothing and would share one entry
+            self.bypassed += 1
+            return None
+        context_digest = hashlib.sha256((context or '').encode('utf-8')).hexdigest()
+        raw = '\x1f'.join([normalized_prompt, intent_name, language, context_digest, scope])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        """Look a response up in the local tier, then the shared tier."""
+        if key is None:
+            return None
+
+        value = self.local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get_cached_response(key)
+            except Exception as e:
+                logger.warning(f"Shared response cache read failed: {e}")
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                self.local.put(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Optional[str], response: str) -> None:
+        """Store a response in every tier."""
+        if key is None or not response:
+            return
+
+        self.local.put(key, response)
+        if self.shared is not None:
+            try:
+                self.shared.put_cached_response(key, response, self.shared_ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Shared response cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for metrics."""
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            'evictions': self.local.evictions,
+            'expirations': self.local.expirations,
+            'entries': len(self.local),
+            'bytes': self.local.size_bytes,
+        }
@@ -0,0 +1,200 @@
+"""
+Response router between Lex classification and generation.
+
+Confidently classified messages are answered from localized templates,
+the knowledge base or Lex's own dialog messages; only ambiguous or
+open-ended messages go on to the LLM.
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Routing tiers, cheapest first
+TIER_TEMPLATE = 'template'
+TIER_KNOWLEDGE_BASE = 'knowledge_base'
+TIER_SEMANTIC = 'faq_semantic'
+TIER_LEX = 'lex'
+TIER_LLM = 'llm'
+# Answer already produced by the fulfillment Lambda during Lex's turn
+TIER_FULFILLMENT = 'fulfillment'
+
+
+@dataclass
+class RoutePolicy:
+    """How an intent may be answered without the LLM."""
+    tier: str
+    min_confidence: float = 0.8
+    topic: Optional[str] = None    # knowledge base topic_id answering the intent
+    answer_negative: bool = True   # False sends frustrated users to the LLM
+
+
+@dataclass
+class RoutedResponse:
+    """A response produced without the LLM."""
+    tier: str
+    text: str
+    detail: str = ''
+
+
+DEFAULT_POLICIES: Dict[str, RoutePolicy] = {
+    'GreetingIntent': RoutePolicy(TIER_TEMPLATE, 0.8, answer_negative=False),
+    'FarewellIntent': RoutePolicy(TIER_TEMPLATE, 0.8, answer_negative=False),
+    'HelpIntent': RoutePolicy(TIER_TEMPLATE, 0.8),
+    'GetHelpIntent': RoutePolicy(TIER_TEMPLATE, 0.8),
+    'PriceQueryIntent': RoutePolicy(TIER_KNOWLEDGE_BASE, 0.85, topic='precio'),
+    'ShippingQueryIntent': RoutePolicy(TIER_KNOWLEDGE_BASE, 0.85, topic='envio'),
+    'ReturnQueryIntent': RoutePolicy(TIER_KNOWLEDGE_BASE, 0.85, topic='devolucion'),
+    'FAQQueryIntent': RoutePolicy(TIER_KNOWLEDGE_BASE, 0.7),
+    'FeedbackIntent': RoutePolicy(TIER_LEX, 0.7),
+    # Lex reports no confidence for the fallback; the matcher score decides
+    'FallbackIntent': RoutePolicy(TIER_SEMANTIC, 0.0),
+}
+
+HELP_TEMPLATE = {
+    'es': 'Puedo ayudarte con consultas sobre precios, envios, devoluciones, garantias, horarios de atencion y formas de contacto. Sobre que tema te gustaria saber?',
+    'en': 'I can help you with prices, shipping, returns, warranties, business hours and contact options. What would you like to know?',
+    'pt': 'Posso ajudar com precos, envios, devolucoes, garantias, horarios de atendimento e formas de contato. Sobre o que voce gostaria de saber?',
+}
+
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    'GreetingIntent': {
+        'es': 'Hola! Soy tu asistente virtual. En que puedo ayudarte hoy? Puedo responder preguntas sobre precios, envios, devoluciones, garantia y horarios.',
+        'en': 'Hi! I am your virtual assistant. How can I help you today? I can answer questions about prices, shipping, returns, warranty and business hours.',
+        'pt': 'Ola! Sou seu assistente virtual. Como posso ajudar hoje? Posso responder perguntas sobre precos, envios, devolucoes, garantia e horarios.',
+    },
+    'FarewellIntent': {
+        'es': 'Hasta luego! Fue un placer ayudarte. Que tengas un excelente dia!',
+        'en': 'Goodbye! It was a pleasure to help you. Have a great day!',
+        'pt': 'Ate logo! Foi um prazer ajudar. Tenha um otimo dia!',
+    },
+    'HelpIntent': HELP_TEMPLATE,
+    'GetHelpIntent': HELP_TEMPLATE,
+}
+
+
+class ResponseRouter:
+    """
+    Picks the cheapest tier that can answer a classified message, following
+    a per-intent policy table, and counts hits per tier.
+    """
+
+    def __init__(
+        self,
+        faq_index: Optional[Any] = None,
+        semantic_matcher: Optional[Any] = None,
+        policies: Optional[Dict[str, RoutePolicy]] = None,
+        templates: Optional[Dict[str, Dict[str, str]]] = None,
+    ):
+        self.faq_index = faq_index
+        self.semantic_matcher = semantic_matcher
+        self.policies = policies if policies is not None else DEFAULT_POLICIES
+        self.templates = templates if templates is not None else TEMPLATES
+        self.hits: Counter = Counter()
+        self.total = 0
+
+    def route(
+        self,
+        intent_name: str,
+        confidence: Optional[float],
+        language: str,
+        text: str,
+        slots: Optional[Dict[str, Any]] = None,
+        sentiment: Optional[str] = None,
+        lex_messages: Optional[List[Dict[str, Any]]] = None,
+    ) -> Optional[RoutedResponse]:
+        """
+        Answer a classified message without the LLM if its policy allows.
+
+        Args:
+            intent_name: Intent from Lex
+            confidence: Lex NLU confidence (None if Lex gave none)
+            language: Response language
+            text: User message
+            slots: Lex slots
+            sentiment: Comprehend sentiment
+            lex_messages: Messages returned by Lex (dialog prompts, fulfillment)
+
+        Returns:
+            The routed response, or None to generate one with the LLM
+        """
+        self.total += 1
+        routed = None
+        policy = self.policies.get(intent_name)
+
+        if policy and (confidence or 0.0) >= policy.min_confidence:
+            if sentiment == 'NEGATIVE' and not policy.answer_negative:
+                routed = None
+            elif policy.tier == TIER_TEMPLATE:
+                routed = self._from_template(intent_name, language)
+            elif policy.tier == TIER_KNOWLEDGE_BASE:
+                routed = self._from_knowledge_base(policy, language, text, slots or {})
+            elif policy.tier == TIER_SEMANTIC:
+                routed = self._from_semantic_match(language, text)
+            elif policy.tier == TIER_LEX:
+                routed = self._from_lex(lex_messages or [])
+
+        self.hits[routed.tier if routed else TIER_LLM] += 1
+        return routed
+
+    def _from_template(self, intent_name: str, language: str) -> Optional[RoutedResponse]:
+        templates = self.templates.get(intent_name)
+        if not templates:
+            return None
+        return RoutedResponse(TIER_TEMPLATE, templates.get(language, templates['es']), intent_name)
+
+    def _from_knowledge_base(
+        self, policy: RoutePolicy, language: str, text: str, slots: Dict[str, Any]
+    ) -> Optional[RoutedResponse]:
+        if self.faq_index is None:
+            return None
+
+        topic = policy.topic
+        topic_slot = slots.get('topic') or {}
+        if not topic and topic_slot.get('value'):
+            topic = topic_slot['value'].get('interpretedValue', '')
+
+        try:
+            faqs = self.faq_index.search(topic) if topic else []
+            if len(faqs) > 1:
+                faqs = self.faq_index.rank(faqs, text, language)
+            elif not faqs:
+                results = self.faq_index.search_ranked(text, language, top_k=1, min_score=Config.FAQ_MIN_SCORE)
+                faqs = [result.faq for result in results]
+        except Exception as e:
+            logger.warning(f"Knowledge base routing failed: {e}")
+            return None
+
+        if not faqs:
+            return None
+        return RoutedResponse(TIER_KNOWLEDGE_BASE, faqs[0].get_answer(language), faqs[0].topic_id)
+
+    def _from_semantic_match(self, language: str, text: str) -> Optional[RoutedResponse]:
+        if self.semantic_matcher is None:
+            return None
+        live_faqs = self.faq_index.faqs if self.faq_index is not None else None
+        match = self.semantic_matcher.match(
+            text, Config.FAQ_SEMANTIC_MIN_SCORE, Config.FAQ_SEMANTIC_MIN_MARGIN, live_faqs,
+        )
+        if not match:
+            return None
+        return RoutedResponse(TIER_SEMANTIC, match.faq.get_answer(language), f'{match.faq.topic_id}:{match.score:.2f}')
+
+    def _from_lex(self, lex_messages: List[Dict[str, Any]]) -> Optional[RoutedResponse]:
+        contents = [message.get('content') for message in lex_messages if message.get('content')]
+        if not contents:
+            return None
+        return RoutedResponse(TIER_LEX, '\n'.join(contents))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hits and hit rate per tier (LLM included) for metrics."""
+        return {
+            'total': self.total,
+            'hits': dict(self.hits),
+            'hit_rate': {tier: round(count / self.total, 4) for tier, count in self.hits.items()} if self.total else {},
+        }
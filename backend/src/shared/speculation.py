@@ -0,0 +1,203 @@
+"""
+Speculative Bedrock generation.
+
+Generation starts while Lex (and Translate) classify the message, using the
+context and profile the final request will have if the intent guessed
+locally is right. Once the intent is known the speculation is adopted if
+the final request turned out identical; otherwise it is cancelled and its
+tokens are counted as waste.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import deadline
+from .context_builder import estimate_tokens
+from .generation_profiles import GenerationProfile
+
+logger = logging.getLogger(__name__)
+
+# Why a speculation was not used
+DISCARD_ROUTED = 'routed'      # answered by a template / knowledge base / Lex
+DISCARD_CACHED = 'cached'      # the response cache had the answer
+DISCARD_CONTEXT = 'context'    # the intent or sentiment changed the context
+DISCARD_PROFILE = 'profile'    # the intent needs another generation profile
+
+
+class SpeculativeGeneration:
+    """A generation started before the intent is known."""
+
+    def __init__(self, prompt: str, context: str, profile: GenerationProfile):
+        self.prompt = prompt
+        self.context = context
+        self.profile = profile
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.degraded = False
+        # Generation time that overlapped classification, set on adoption
+        self.saved_ms = 0.0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._deltas: List[str] = []
+        self._listener: Optional[Callable[[str], None]] = None
+        self._future = None
+
+    def submit(self, pool: ThreadPoolExecutor, get_client: Callable[[], Any]) -> Future:
+        # Run under the request's deadline, even past the request's end
+        self._future = deadline.submit(pool, lambda: self.run(get_client()))
+        return self._future
+
+    def run(self, bedrock_client: Any) -> Tuple[str, Optional[float]]:
+        """Stream the response, buffering deltas until the generation is adopted."""
+        def on_delta(text: str):
+            with self._lock:
+                self._deltas.append(text)
+                listener = self._listener
+            if listener:
+                listener(text)
+
+        try:
+            result = bedrock_client.generate_response_stream(
+                self.prompt, self.context, on_delta=on_delta, profile=self.profile, cancel=self._cancel,
+            )
+            self.degraded = bedrock_client.last_response_degraded
+            return result
+        finally:
+            self.finished = time.perf_counter()
+
+    def matches(self, context: str, profile: GenerationProfile) -> bool:
+        """True if the final request is the one being speculated."""
+        return context == self.context and profile == self.profile
+
+    def adopt(self, on_delta: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[float]]:
+        """
+        Take over the generation: replay buffered deltas to on_delta, forward
+        the rest as they arrive and wait for the final response.
+
+        Returns:
+            Tuple of (bot_response, time to first delta after adoption in ms or None)
+        """
+        adopted = time.perf_counter()
+        self.saved_ms = ((self.finished or adopted) - self.started) * 1000
+        first_delta: List[float] = []
+
+        def forward(text: str):
+            if not first_delta:
+                first_delta.append(time.perf_counter())
+            if on_delta:
+                on_delta(text)
+
+        with self._lock:
+            for text in self._deltas:
+                forward(text)
+            self._listener = forward
+
+        bot_response, _ = self._future.result()
+        ttft_ms = (first_delta[0] - adopted) * 1000 if first_delta else None
+        return bot_response, ttft_ms
+
+    def cancel(self) -> None:
+        """Stop the model at its next chunk; the result is never used."""
+        self._cancel.set()
+
+    @property
+    def wasted_tokens(self) -> int:
+        """Estimated tokens billed so far: the prompt plus the output streamed."""
+        with self._lock:
+            output = ''.join(self._deltas)
+        return estimate_tokens(self.context) + estimate_tokens(self.prompt) + estimate_tokens(output)
+
+
+class Speculator:
+    """
+    Starts speculative generations and keeps hit/waste figures to weigh the
+    latency saved against the extra token spend.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], max_workers: int = 2):
+        # One client per worker thread so a cancelled run still finishing
+        # never mixes its state with another generation's
+        self.client_factory = client_factory
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='speculation')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.started = 0
+        self.skipped_busy = 0
+        self.hits = 0
+        self.discarded: Counter = Counter()
+        self.saved_ms = 0.0
+        self.wasted_tokens = 0
+
+    def start(self, prompt: str, context: str, profile: GenerationProfile) -> Optional[SpeculativeGeneration]:
+        """
+        Start generating in the background.
+
+        Returns:
+            The speculation, or None if every worker is still busy (e.g. with
+            cancelled runs waiting for their first chunk): queued behind them
+            it would start too late to save anything
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers:
+                self.skipped_busy += 1
+                return None
+            self._in_flight += 1
+            self.started += 1
+        speculation = SpeculativeGeneration(prompt, context, profile)
+        speculation.submit(self._pool, self._client).add_done_callback(self._finished)
+        return speculation
+
+    def _client(self) -> Any:
+        """The calling worker thread's Bedrock client."""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def adopt(
+        self,
+        speculation: SpeculativeGeneration,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, Optional[float]]:
+        """Use a speculation's response (see SpeculativeGeneration.adopt)."""
+        result = speculation.adopt(on_delta)
+        self.hits += 1
+        self.saved_ms += speculation.saved_ms
+        logger.info(f"Speculation hit, {speculation.saved_ms:.0f}ms of generation overlapped classification")
+        return result
+
+    def discard(self, speculation: SpeculativeGeneration, reason: str) -> int:
+        """
+        Cancel a speculation that cannot be used.
+
+        Returns:
+            Estimated tokens wasted on it
+        """
+        speculation.cancel()
+        wasted = speculation.wasted_tokens
+        self.discarded[reason] += 1
+        self.wasted_tokens += wasted
+        logger.info(f"Speculation discarded ({reason}), ~{wasted} tokens wasted")
+        return wasted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate, latency saved and tokens wasted for metrics."""
+        return {
+            'started': self.started,
+            'skipped_busy': self.skipped_busy,
+            'hits': self.hits,
+            'discarded': dict(self.discarded),
+            'hit_rate': round(self.hits / self.started, 4) if self.started else 0.0,
+            'saved_ms': int(self.saved_ms),
+            'wasted_tokens': self.wasted_tokens,
+        }
@@ -3,13 +3,68 @@ Amazon Translate client for multi-language support.
 """
 
 import boto3
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import logging
+import re
 
+from . import deadline
 from .config import Config
+from .translation_memory import TranslationMemory, build_translation_memory
 
 logger = logging.getLogger(__name__)
 
+# Segment markers used to pack several texts into one TranslateText call
+SEGMENT_MARKER = '[#{}#]'
+SEGMENT_SPLIT = re.compile(r'\s*\[#(\d+)#\]\s*')
+
+# Where texts over the request size limit are cut: sentence ends and line
+# breaks first, then any whitespace
+SENTENCE_BREAK = re.compile(r'((?<=[.!?])\s+|\n+)')
+WORD_BREAK = re.compile(r'(\s+)')
+
+
+def split_text(text: str, max_bytes: int) -> Tuple[List[str], List[str]]:
+    """
+    Split a text into chunks of at most max_bytes (UTF-8), at sentence
+    boundaries where possible.
+    
+    Returns:
+        Tuple of (chunks, separators between consecutive chunks), so that
+        interleaving them gives back the text
+    """
+    def size(piece: str) -> int:
+        return len(piece.encode('utf-8'))
+    
+    # Alternating [piece, separator, piece, ...] with every piece within the limit
+    parts: List[str] = []
+    for i, sentence in enumerate(SENTENCE_BREAK.split(text)):
+        if i % 2 or size(sentence) <= max_bytes:
+            parts.append(sentence)
+            continue
+        for j, word in enumerate(WORD_BREAK.split(sentence)):
+            if j % 2 or size(word) <= max_bytes:
+                parts.append(word)
+                continue
+            # A single word over the limit is cut by characters
+            piece = ''
+            for char in word:
+                if size(piece + char) > max_bytes:
+                    parts.extend([piece, ''])
+                    piece = ''
+                piece += char
+            parts.append(piece)
+    
+    chunks = [parts[0]]
+    separators: List[str] = []
+    for separator, piece in zip(parts[1::2], parts[2::2]):
+        if size(chunks[-1] + separator + piece) <= max_bytes:
+            chunks[-1] += separator + piece
+        else:
+            separators.append(separator)
+            chunks.append(piece)
+    return chunks, separators
+
 
 class TranslateClient:
     """Client for Amazon Translate operations."""
@@ -21,8 +76,14 @@ class TranslateClient:
         'pt': 'pt',
     }
     
-    def __init__(self):
-        self.client = boto3.client('translate', region_name=Config.AWS_REGION)
+    def __init__(self, memory: Optional[TranslationMemory] = None):
+        self.clients = deadline.BudgetedClient(lambda config: boto3.client('translate', config=config))
+        self.memory = memory if memory is not None else build_translation_memory()
+    
+    @property
+    def client(self):
+        """Translate client with timeouts that fit the current request's deadline."""
+        return self.clients.current()
     
     def translate_text(
         self, 
@@ -45,19 +106,21 @@ class TranslateClient:
         if source_language == target_language:
             return text
         
+        # Over the request size limit: translated in chunks by translate_batch
+        if len(text.encode('utf-8')) > Config.TRANSLATE_MAX_REQUEST_BYTES:
+            return self.translate_batch([text], source_language, target_language)[0]
+        
+        remembered = self.memory.get(source_language, target_language, text)
+        if remembered is not None:
+            logger.info(f"Translation memory hit {source_language} -> {target_language}: {self.memory.get_stats()}")
+            return remembered
+        
         try:
-            source_code = self.TRANSLATE_LANGUAGE_CODES.get(source_language, source_language)
-            target_code = self.TRANSLATE_LANGUAGE_CODES.get(target_language, target_language)
-            
-            response = self.client.translate_text(
-                Text=text,
-                SourceLanguageCode=source_code,
-                TargetLanguageCode=target_code,
-            )
-            
-            translated = response['TranslatedText']
+            translated = self._call_translate(text, source_language, target_language)
             logger.info(f"Translated from {source_language} to {target_language}")
             
+            self.memory.put(source_language, target_language, text, translated)
+            
             return translated
             
         except Exception as e:
@@ -81,18 +144,148 @@ class TranslateClient:
         """
         Translate multiple texts.
         
+        Identical inputs are translated once, remembered translations are
+        reused, and the rest are packed into as few TranslateText calls as
+        the request size limit allows, sent concurrently. A packed request
+        whose segments do not come back intact is retried text by text.
+        Texts over the limit are split at sentence boundaries and their
+        chunks translated like any other text, then reassembled.
+        
         Args:
             texts: List of texts to translate
             source_language: Source language code
             target_language: Target language code
             
         Returns:
-            List of translated texts
+            List of translated texts, in input order
         """
-        return [
-            self.translate_text(text, source_language, target_language)
-            for text in texts
-        ]
+        if source_language == target_language:
+            return list(texts)
+        
+        translations: Dict[str, str] = {}
+        pending = []
+        for text in dict.fromkeys(texts):
+            remembered = self.memory.get(source_language, target_language, text) if text.strip() else text
+            if remembered is not None:
+                translations[text] = remembered
+            else:
+                pending.append(text)
+        
+        oversized = {
+            text: split_text(text, Config.TRANSLATE_MAX_REQUEST_BYTES)
+            for text in pending
+            if len(text.encode('utf-8')) > Config.TRANSLATE_MAX_REQUEST_BYTES
+        }
+        if oversized:
+            pending = list(dict.fromkeys(
+                chunk for text in pending for chunk in (oversized[text][0] if text in oversized else [text])
+            ))
+        
+        batches = self._pack(pending)
+        logger.info(
+            f"Translating {len(texts)} texts ({len(pending)} new) "
+            f"from {source_language} to {target_language} in {len(batches)} requests"
+        )
+        
+        with ThreadPoolExecutor(max_workers=Config.TRANSLATE_BATCH_WORKERS) as pool:
+            unpacked = []
+            futures = [
+                deadline.submit(pool, self._translate_packed, batch, source_language, target_language)
+                for batch in batches
+            ]
+            for batch, batch_result in zip(batches, (future.result() for future in futures)):
+                if batch_result is None:
+                    unpacked.extend(batch)
+                else:
+                    translations.update(batch_result)
+            
+            # Texts that could not be packed go out one request each, concurrently
+            futures = [
+                deadline.submit(pool, self.translate_text, text, source_language, target_language)
+                for text in unpacked
+            ]
+            for text, future in zip(unpacked, futures):
+                translations[text] = future.result()
+        
+        for text, (chunks, separators) in oversized.items():
+            parts = [translations[chunks[0]]]
+            for separator, chunk in zip(separators, chunks[1:]):
+                parts.extend([separator, translations[chunk]])
+            translations[text] = ''.join(parts)
+            self.memory.put(source_language, target_language, text, translations[text])
+        
+        return [translations[text] for text in texts]
+    
+    def _pack(self, texts: List[str]) -> List[List[str]]:
+        """Group texts into batches whose packed size fits one request."""
+        batches = []
+        current = []
+        current_bytes = 0
+        for text in texts:
+            size = len(text.encode('utf-8')) + len(SEGMENT_MARKER.format(len(current))) + 2
+            # Texts that already contain a marker cannot be packed safely
+            if SEGMENT_SPLIT.search(text) or size > Config.TRANSLATE_MAX_REQUEST_BYTES:
+                batches.append([text])
+                continue
+            if current and current_bytes + size > Config.TRANSLATE_MAX_REQUEST_BYTES:
+                batches.append(current)
+                current = []
+                current_bytes = 0
+            current.append(text)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _translate_packed(
+        self,
+        batch: List[str],
+        source_language: str,
+        target_language: str
+    ) -> Optional[Dict[str, str]]:
+        """
+        Translate a batch in one call.
+        
+        Returns:
+            Mapping of text to translation, or None if the batch must be
+            translated text by text
+        """
+        if len(batch) == 1:
+            return None
+        
+        packed = '\n'.join(
+            f"{SEGMENT_MARKER.format(i)}\n{text}" for i, text in enumerate(batch)
+        )
+        try:
+            parts = SEGMENT_SPLIT.split(self._call_translate(packed, source_language, target_language))
+            # split() yields ['', '0', text0, '1', text1, ...]
+            indices = [int(index) for index in parts[1::2]]
+            segments = parts[2::2]
+            if parts[0].strip() or indices != list(range(len(batch))):
+                raise ValueError(f"segment markers not preserved ({len(indices)}/{len(batch)})")
+        except Exception as e:
+            logger.warning(f"Packed translation failed, translating individually: {e}")
+            return None
+        
+        result = {}
+        for text, translated in zip(batch, segments):
+            translated = translated.strip()
+            self.memory.put(source_language, target_language, text, translated)
+            result[text] = translated
+        return result
+    
+    def _call_translate(self, text: str, source_language: str, target_language: str) -> str:
+        """Call Amazon Translate; errors propagate to the caller."""
+        source_code = self.TRANSLATE_LANGUAGE_CODES.get(source_language, source_language)
+        target_code = self.TRANSLATE_LANGUAGE_CODES.get(target_language, target_language)
+        
+        response = deadline.call(
+            self.client.translate_text,
+            Text=text,
+            SourceLanguageCode=source_code,
+            TargetLanguageCode=target_code,
+        )
+        return response['TranslatedText']
     
     def get_supported_languages(self) -> list:
         """Get list of supported languages."""
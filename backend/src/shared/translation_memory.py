@@ -0,0 +1,182 @@
+"""
+Translation memory for TranslateClient.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from .config import Config
+from .response_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so trivially different inputs share an entry."""
+    return ' '.join(text.split()).lower()
+
+
+class FileTranslationStore:
+    """
+    Persistent tier backed by a local JSON-lines file
+    ({"key": ..., "translation": ...} per line).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, str] = {}
+        self._lock = Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry['key']] = entry['translation']
+
+    def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    def put(self, key: str, translation: str) -> None:
+        with self._lock:
+            self._entries[key] = translation
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'translation': translation}, ensure_ascii=False) + '\n')
+
+
+class DynamoTranslationStore:
+    """Persistent tier shared across containers, stored through DynamoClient."""
+
+    def __init__(self, dynamo_client: Any, ttl_seconds: int):
+        self.dynamo_client = dynamo_client
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        return self.dynamo_client.get_cached_translation(key)
+
+    def put(self, key: str, translation: str) -> None:
+        self.dynamo_client.put_cached_translation(key, translation, self.ttl_seconds)
+
+
+class TranslationMemory:
+    """
+    Memoizes translations keyed by (source, target, normalized text).
+
+    Lookups go through preloaded entries, then the in-process LRU, then
+    the optional persistent store. Store errors are logged and treated as
+    misses so translation still works without it.
+    """
+
+    def __init__(self, local: Optional[LRUCache] = None, store: Optional[Any] = None):
+        self.local = local or LRUCache()
+        self.store = store
+        self._preloaded: Dict[str, str] = {}
+        # Guards the counters: lookups run on the pipeline's stage threads
+        self._lock = Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.chars_saved = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def make_key(source_language: str, target_language: str, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f'{source_language}#{target_language}#{digest}'
+
+    def get(self, source_language: str, target_language: str, text: str) -> Optional[str]:
+        """Get a remembered translation, or None."""
+        key = self.make_key(source_language, target_language, text)
+
+        translation = self._preloaded.get(key)
+        if translation is None:
+            translation = self.local.get(key)
+        if translation is None and self.store is not None:
+            try:
+                translation = self.store.get(key)
+            except Exception as e:
+                logger.warning(f"Translation memory store read failed: {e}")
+            if translation is not None:
+                with self._lock:
+                    self.store_hits += 1
+                self.local.put(key, translation)
+
+        with self._lock:
+            if translation is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.chars_saved += len(text)
+            self.bytes_saved += len(text.encode('utf-8'))
+        return translation
+
+    def put(self, source_language: str, target_language: str, text: str, translation: str) -> None:
+        """Remember a translation in the LRU and persistent store."""
+        key = self.make_key(source_language, target_language, text)
+        self.local.put(key, translation)
+        if self.store is not None:
+            try:
+                self.store.put(key, translation)
+            except Exception as e:
+                logger.warning(f"Translation memory store write failed: {e}")
+
+    def preload(self, path: str) -> int:
+        """
+        Bulk-load pinned translations from a JSON file: a list of
+        {"source", "target", "text", "translation"} objects (or JSON lines).
+
+        Returns:
+            Number of entries loaded
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+
+        if content.startswith('['):
+            entries = json.loads(content)
+        else:
+            entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+        for entry in entries:
+            key = self.make_key(entry['source'], entry['target'], entry['text'])
+            self._preloaded[key] = entry['translation']
+
+        logger.info(f"Preloaded {len(entries)} translations from {path}")
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and savings for metrics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'chars_saved': self.chars_saved,
+                'bytes_saved': self.bytes_saved,
+                'preloaded': len(self._preloaded),
+                'entries': len(self.local),
+            }
+
+
+def build_translation_memory(dynamo_client: Optional[Any] = None) -> TranslationMemory:
+    """Create the translation memory described by Config."""
+    store = None
+    if Config.TRANSLATION_MEMORY_STORE == 'dynamodb' and dynamo_client is not None:
+        store = DynamoTranslationStore(dynamo_client, Config.TRANSLATION_MEMORY_TTL_SECONDS)
+    elif Config.TRANSLATION_MEMORY_STORE == 'file':
+        store = FileTranslationStore(Config.TRANSLATION_MEMORY_FILE)
+
+    memory = TranslationMemory(
+        LRUCache(max_entries=Config.TRANSLATION_MEMORY_MAX_ENTRIES, ttl_seconds=Config.TRANSLATION_MEMORY_TTL_SECONDS),
+        store=store,
+    )
+    if Config.TRANSLATION_MEMORY_PRELOAD and os.path.exists(Config.TRANSLATION_MEMORY_PRELOAD):
+        try:
+            memory.preload(Config.TRANSLATION_MEMORY_PRELOAD)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not preload translations: {e}")
+    return memory
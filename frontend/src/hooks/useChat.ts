@@ -1,4 +1,4 @@
-import { useState, useCallback } from 'react';
+import { useState, useCallback, useRef } from 'react';
 import { Message, Language, WebSocketMessage, Sentiment } from '../types/chat.types';
 import { useWebSocket } from './useWebSocket';
 
@@ -24,12 +24,32 @@ export function useChat(initialLanguage: Language = 'es') {
     const [isTyping, setIsTyping] = useState(false);
     const [language, setLanguage] = useState<Language>(initialLanguage);
 
+    // Id of the bot message being filled by streamed 'chunk' frames
+    const streamingIdRef = useRef<string | null>(null);
+
     const handleWebSocketMessage = useCallback((data: WebSocketMessage) => {
         setIsTyping(false);
 
-        if (data.type === 'message' && data.message) {
+        if (data.type === 'chunk' && data.delta) {
+            const delta = data.delta;
+            if (!streamingIdRef.current) {
+                const id = generateId();
+                streamingIdRef.current = id;
+                setMessages((prev) => [
+                    ...prev,
+                    { id, type: 'bot', content: delta, timestamp: new Date() },
+                ]);
+            } else {
+                const id = streamingIdRef.current;
+                setMessages((prev) =>
+                    prev.map((msg) => (msg.id === id ? { ...msg, content: msg.content + delta } : msg))
+                );
+            }
+        } else if (data.type === 'message' && data.message) {
+            const streamingId = streamingIdRef.current;
+            streamingIdRef.current = null;
             const botMessage: Message = {
-                id: generateId(),
+                id: streamingId || generateId(),
                 type: 'bot',
                 content: data.message,
                 timestamp: new Date(data.timestamp || Date.now()),
@@ -37,8 +57,14 @@ export function useChat(initialLanguage: Language = 'es') {
                 intent: data.intent,
                 language: data.language,
             };
-            setMessages((prev) => [...prev, botMessage]);
+            // The final frame replaces the streamed draft with the cleaned text
+            setMessages((prev) =>
+                streamingId
+                    ? prev.map((msg) => (msg.id === streamingId ? botMessage : msg))
+                    : [...prev, botMessage]
+            );
         } else if (data.type === 'error') {
+            streamingIdRef.current = null;
             const errorMessage: Message = {
                 id: generateId(),
                 type: 'system',
@@ -29,9 +29,11 @@ export const LANGUAGES: LanguageOption[] = [
 ];
 
 export interface WebSocketMessage {
-    type: 'message' | 'error' | 'connected' | 'disconnected';
+    type: 'message' | 'chunk' | 'error' | 'connected' | 'disconnected';
     sessionId?: string;
     message?: string;
+    delta?: string;
+    index?: number;
     intent?: string;
     sentiment?: Sentiment;
     language?: string;
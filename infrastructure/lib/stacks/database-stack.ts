@@ -55,7 +55,10 @@ export class DatabaseStack extends cdk.Stack {
             timeToLiveAttribute: 'TTL',
         });
 
-        // GSI para analytics por fecha
+        // GSI para analytics por fecha. Los eventos nuevos usan SK EVENT#<ULID> y se
+        // consultan por rango en la tabla base; no escriben metricType, asi que este
+        // indice disperso solo contiene eventos antiguos y puede eliminarse cuando
+        // expire su TTL (30 dias).
         this.analyticsTable.addGlobalSecondaryIndex({
             indexName: 'DateIndex',
             partitionKey: { name: 'metricType', type: dynamodb.AttributeType.STRING },
@@ -36,6 +36,7 @@ export class LambdaStack extends cdk.Stack {
                 'comprehend:DetectKeyPhrases',
                 'translate:TranslateText',
                 'bedrock:InvokeModel',
+                'bedrock:InvokeModelWithResponseStream',
                 'lex:RecognizeText',
                 'lex:PutSession',
                 'lex:GetSession',
@@ -60,6 +61,7 @@ export class LambdaStack extends cdk.Stack {
                 ANALYTICS_TABLE: props.analyticsTable.tableName,
                 LEX_BOT_ID: 'X3ADVBRCTQ',
                 LEX_BOT_ALIAS_ID: '9VQMVYGAGE',
+                BEDROCK_STREAMING: 'true',
                 LOG_LEVEL: 'INFO',
             },
             logGroup: new logs.LogGroup(this, 'OrchestratorLogs', {
@@ -0,0 +1,175 @@
+"""
+Benchmark del indice invertido de FAQs frente al scan con contains(),
+junto con la busqueda BM25 rankeada sobre el mismo indice.
+Ejecutar: python scripts/benchmark_faq_index.py
+
+Tambien verifica que los scores BM25 son exactos: cada FAQ que contiene un
+termino de la consulta recibe su score, aunque el termino aparezca en miles
+de documentos, y el top-k con poda MaxScore coincide con el exhaustivo.
+
+El indice BM25 se construye una vez (como en el despliegue), se guarda y se
+carga; "carga ms" es lo que tarda el primer refresh de Lambda con el indice
+precalculado.
+
+El scan se simula en memoria (mismo filtro que DynamoDB) y se estiman las
+RCUs que consumiria: DynamoDB cobra por los bytes leidos, no por los que
+pasan el filtro. La latencia de red del scan real no esta incluida.
+"""
+
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+from shared.faq_index import FAQIndex, normalize_keyword
+from shared.faq_search import FAQSearchEngine, _weighted_term_freqs, tokenize
+from shared.models import FAQItem
+
+SIZES = [100, 10_000, 100_000]
+LOOKUPS = 1000
+QUERIES = [
+    'cuanto tarda el envio a mi casa',
+    'what payment methods do you accept',
+    'qual o horario de atendimento',
+    'quiero devolver un producto danado',
+]
+
+
+def load_base_faqs():
+    """Cargar FAQs base desde el archivo JSON."""
+    faq_path = Path(__file__).parent.parent / 'data' / 'knowledge_base' / 'faqs.json'
+    with open(faq_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('faqs', [])
+
+
+def generate_faqs(base, size):
+    """Replicar las FAQs base con keywords unicas hasta el tamano pedido."""
+    faqs = []
+    for i in range(size):
+        faq = base[i % len(base)]
+        faqs.append(FAQItem(
+            category=faq['category'],
+            topic_id=f"{faq['topic_id']}-{i}",
+            question_es=faq['question_es'],
+            question_en=faq['question_en'],
+            question_pt=faq['question_pt'],
+            answer_es=faq['answer_es'],
+            answer_en=faq['answer_en'],
+            answer_pt=faq['answer_pt'],
+            keywords=faq['keywords'] + [f"{faq['topic_id']}{i}"],
+        ))
+    return faqs
+
+
+def scan_search(faqs, keyword):
+    """Equivalente en memoria de scan(FilterExpression='contains(keywords, :kw)')."""
+    return [faq for faq in faqs if keyword in faq.keywords]
+
+
+def estimate_scan_rcu(faqs):
+    """RCUs de un scan completo con lectura eventualmente consistente."""
+    total_bytes = sum(len(json.dumps(faq.to_dynamo_item(), ensure_ascii=False).encode('utf-8')) for faq in faqs)
+    return total_bytes / 4096 * 0.5
+
+
+def reference_scores(faqs, query, k1=1.2, b=0.75):
+    """BM25 calculado documento por documento, sin indice."""
+    doc_freqs = [_weighted_term_freqs(faq) for faq in faqs]
+    lengths = [sum(freqs.values()) for freqs in doc_freqs]
+    avg_length = sum(lengths) / len(lengths)
+    scores = {}
+    for term in set(tokenize(query)):
+        containing = [doc_id for doc_id, freqs in enumerate(doc_freqs) if term in freqs]
+        idf = math.log(1 + (len(faqs) - len(containing) + 0.5) / (len(containing) + 0.5))
+        for doc_id in containing:
+            tf = doc_freqs[doc_id][term]
+            norm = k1 * (1 - b + b * lengths[doc_id] / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+def check_exact_scores(faqs):
+    """Comparar el indice con el calculo exhaustivo y con un FAQ de impacto minimo."""
+    engine = FAQSearchEngine(faqs)
+    for query in QUERIES:
+        expected = reference_scores(faqs, query)
+        scores = engine.score_all(query)
+        assert scores.keys() == expected.keys(), f"'{query}': {len(scores)} de {len(expected)} FAQs puntuadas"
+        assert all(abs(scores[doc_id] - expected[doc_id]) < 1e-9 for doc_id in expected)
+
+    # El FAQ con menor score para un termino muy comun (el ultimo de sus
+    # postings por impacto) debe quedar por delante de uno que no lo contiene
+    term = 'envio'
+    matching = engine.score_all(term)
+    weakest = faqs[min(matching, key=matching.get)]
+    without = next(faq for doc_id, faq in enumerate(faqs) if doc_id not in matching)
+    assert len(matching) > 256 and engine.rank([without, weakest], term)[0] is weakest
+
+    # Top-k con poda: mismos FAQs y scores que ordenar todos los scores
+    for query in QUERIES + [f"envio {faqs[len(faqs) // 2].keywords[-1]}"]:
+        scores = engine.score_all(query)
+        for top_k in (1, 3, 10):
+            expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+            results = engine.search(query, top_k=top_k)
+            assert [(faqs.index(r.faq), r.score) for r in results] == expected, f"'{query}' top-{top_k}"
+    print(f"Scores exactos en {len(faqs)} FAQs ('{term}' aparece en {len(matching)}), top-k con poda exacto")
+
+
+def time_per_lookup_ms(func, keywords):
+    started = time.perf_counter()
+    for keyword in keywords:
+        func(keyword)
+    return (time.perf_counter() - started) * 1000 / len(keywords)
+
+
+def main():
+    print("=" * 93)
+    print("  Benchmark: indice invertido vs scan de keywords")
+    print("=" * 93)
+
+    base = load_base_faqs()
+    print(f"\n{'FAQs':>8} | {'scan ms':>10} | {'indice ms':>10} | {'speedup':>9} | {'RCU/scan':>9} | "
+          f"{'build ms':>9} | {'carga ms':>9} | {'bm25 ms':>8}")
+    print("-" * 93)
+
+    for size in SIZES:
+        faqs = generate_faqs(base, size)
+        keywords = [
+            base[i % len(base)]['keywords'][0] if i % 2 else f"{base[i % len(base)]['topic_id']}{i % size}"
+            for i in range(LOOKUPS)
+        ]
+
+        started = time.perf_counter()
+        engine = FAQSearchEngine(faqs)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine.save(directory)
+            started = time.perf_counter()
+            index = FAQIndex(lambda: faqs, ttl_seconds=3600, prebuilt=FAQSearchEngine.load(directory))
+            index.refresh()
+            load_ms = (time.perf_counter() - started) * 1000
+
+        # Verificar que ambos caminos devuelven lo mismo
+        for keyword in keywords[:20]:
+            assert [f.topic_id for f in index.search(keyword)] == \
+                [f.topic_id for f in scan_search(faqs, normalize_keyword(keyword))]
+
+        scan_keywords = keywords[:max(1, LOOKUPS * 100 // size)]
+        scan_ms = time_per_lookup_ms(lambda kw: scan_search(faqs, kw), scan_keywords)
+        index_ms = time_per_lookup_ms(index.search, keywords)
+        bm25_ms = time_per_lookup_ms(lambda q: index.search_ranked(q, top_k=3), QUERIES * 25)
+
+        print(f"{size:>8} | {scan_ms:>10.3f} | {index_ms:>10.4f} | {scan_ms / index_ms:>8.0f}x | "
+              f"{estimate_scan_rcu(faqs):>9.1f} | {build_ms:>9.0f} | {load_ms:>9.0f} | {bm25_ms:>8.3f}")
+
+    print("\nEl indice no consume RCUs por consulta; solo un scan completo por TTL.")
+    check_exact_scores(generate_faqs(base, 2000))
+
+
+if __name__ == '__main__':
+    main()
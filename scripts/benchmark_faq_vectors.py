@@ -0,0 +1,87 @@
+"""
+Reporte de precision del matcher semantico de FAQs.
+Ejecutar: python scripts/benchmark_faq_vectors.py
+
+Construye la matriz como scripts/build_faq_vectors.py y evalua sobre la
+particion 'test' de data/knowledge_base/faq_paraphrases.jsonl (no usada para
+construirla): parafrasis de cada FAQ y mensajes fuera de alcance que no deben
+recibir ninguna FAQ. Una respuesta es correcta si es la FAQ etiquetada;
+responder a un mensaje fuera de alcance cuenta como error.
+
+Termina con codigo 1 si la precision con el umbral y margen configurados
+queda por debajo de MIN_PRECISION.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_faq_vectors import load_examples, load_faqs
+from shared.config import Config
+from shared.faq_vectors import DEFAULT_DIM, SemanticFAQMatcher, build_matrix
+
+THRESHOLDS = [0.2, 0.3, 0.4, 0.5, 0.6]
+MARGINS = [0.0, 0.1, 0.2, 0.25, 0.3]
+MIN_PRECISION = 0.95
+
+
+def evaluate(matcher, samples, min_score, min_margin):
+    """(respondidas, correctas, parafrasis respondidas bien, fuera de alcance respondidas)."""
+    answered = correct = covered = false_accepts = 0
+    for text, topic_id in samples:
+        match = matcher.match(text, min_score, min_margin)
+        if not match:
+            continue
+        answered += 1
+        if match.faq.topic_id == topic_id:
+            correct += 1
+            covered += 1
+        elif topic_id is None:
+            false_accepts += 1
+    return answered, correct, covered, false_accepts
+
+
+def main():
+    faqs = load_faqs()
+    matrix, idf, row_faq = build_matrix(faqs, DEFAULT_DIM, load_examples('train'))
+    matcher = SemanticFAQMatcher(matrix, idf, row_faq, faqs)
+
+    samples = load_examples('test')
+    positives = sum(1 for _, topic_id in samples if topic_id is not None)
+    negatives = len(samples) - positives
+
+    print("=" * 72)
+    print(f"  Matcher semantico de FAQs - {positives} parafrasis, {negatives} fuera de alcance")
+    print("=" * 72)
+    print(f"\n{'umbral':>7} | {'margen':>7} | {'cobertura':>10} | {'precision':>10} | {'fuera de alcance aceptados':>27}")
+    print("-" * 72)
+    for min_score in THRESHOLDS:
+        for min_margin in MARGINS:
+            answered, correct, covered, false_accepts = evaluate(matcher, samples, min_score, min_margin)
+            precision = correct / answered if answered else 1.0
+            print(f"{min_score:>7.2f} | {min_margin:>7.2f} | {covered / positives:>9.1%} | {precision:>9.1%} | "
+                  f"{false_accepts:>17}/{negatives}")
+
+    min_score, min_margin = Config.FAQ_SEMANTIC_MIN_SCORE, Config.FAQ_SEMANTIC_MIN_MARGIN
+    print(f"\nConfiguracion actual (umbral {min_score}, margen {min_margin}):")
+    for text, topic_id in samples:
+        match = matcher.match(text, min_score, min_margin)
+        scored = matcher.match(text)
+        answer = match.faq.topic_id if match else '-'
+        status = 'ok' if (match.faq.topic_id if match else None) == topic_id else ('ERROR' if match else 'sin respuesta')
+        best = f'{scored.faq.topic_id} {scored.score:.2f} +{scored.margin:.2f}' if scored else 'fuera de alcance'
+        print(f"  [{status:>13}] {text!r}: esperado {topic_id or '-'}, respondido {answer} (mejor: {best})")
+
+    answered, correct, covered, false_accepts = evaluate(matcher, samples, min_score, min_margin)
+    precision = correct / answered if answered else 1.0
+    print(f"\nPrecision {precision:.1%} ({correct}/{answered}), cobertura {covered / positives:.1%}, "
+          f"fuera de alcance aceptados {false_accepts}/{negatives}")
+    if precision < MIN_PRECISION:
+        print(f"ERROR: precision por debajo de {MIN_PRECISION:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Reporte de precision y latencia del pre-clasificador de intents local.
+Ejecutar: python scripts/benchmark_intent_classifier.py
+
+Evalua sobre la particion 'test' de data/intent_classification/utterances.jsonl
+(no usada para entrenar) y muestra, para distintos umbrales de confianza,
+cuantos mensajes evitarian la llamada a Lex y con que precision. Solo cuentan
+los intents de Config.INTENT_CLASSIFIER_INTENTS: los demas siempre van a Lex.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_intent_model import load_corpus
+from shared.config import Config
+from shared.intent_classifier import IntentClassifier
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def main():
+    classifier = IntentClassifier.load()
+    if classifier is None:
+        print("ERROR: Ejecutar primero scripts/build_intent_model.py")
+        sys.exit(1)
+
+    samples = load_corpus('test')
+    predictions = [classifier.classify(text) for text, _ in samples]
+    local_intents = set(Config.INTENT_CLASSIFIER_INTENTS)
+
+    print("=" * 64)
+    print(f"  Pre-clasificador de intents - {len(samples)} muestras de prueba")
+    print("=" * 64)
+
+    print("\nExactitud por intent (sin umbral):")
+    for intent in sorted({gold for _, gold in samples}):
+        pairs = [(pred, gold) for (pred, _), (_, gold) in zip(predictions, samples) if gold == intent]
+        correct = sum(1 for pred, gold in pairs if pred == gold)
+        print(f"  {intent:<22} {correct}/{len(pairs)} ({correct / len(pairs):.1%})")
+
+    print(f"\n{'umbral':>8} | {'sin Lex':>8} | {'precision local':>16} | {'errores':>8}")
+    print("-" * 50)
+    for threshold in THRESHOLDS:
+        local = [
+            (pred, gold) for (pred, conf), (_, gold) in zip(predictions, samples)
+            if pred in local_intents and conf >= threshold
+        ]
+        correct = sum(1 for pred, gold in local if pred == gold)
+        precision = correct / len(local) if local else 0.0
+        print(f"{threshold:>8.2f} | {len(local) / len(samples):>7.1%} | {precision:>15.1%} | {len(local) - correct:>8}")
+
+    print(f"\nErrores que evitarian Lex (umbral actual {Config.INTENT_CLASSIFIER_MIN_CONFIDENCE}):")
+    for (pred, conf), (text, gold) in zip(predictions, samples):
+        if pred != gold and pred in local_intents and conf >= Config.INTENT_CLASSIFIER_MIN_CONFIDENCE:
+            print(f"  [{gold}->{pred} {conf:.2f}] {text}")
+
+    print("\nCalibracion (entrenamiento, dejando uno fuera) frente a la particion de prueba:")
+    print(f"  {'similitud':>10} | {'modelo':>7} | {'prueba':>7} | {'muestras':>8}")
+    edges = [edge for edge, _ in classifier.calibration] + [float('inf')]
+    for (edge, probability), upper in zip(classifier.calibration, edges[1:]):
+        in_bin = [pred == gold for (pred, conf), (_, gold) in zip(predictions, samples) if edge <= conf < upper]
+        observed = f"{sum(in_bin) / len(in_bin):>6.1%}" if in_bin else f"{'-':>7}"
+        print(f"  {edge:>10.1f} | {probability:>6.1%} | {observed} | {len(in_bin):>8}")
+
+    runs = 50
+    started = time.perf_counter()
+    for _ in range(runs):
+        for text, _ in samples:
+            classifier.classify(text)
+    per_call_us = (time.perf_counter() - started) * 1e6 / (runs * len(samples))
+    print(f"\nLatencia media: {per_call_us:.0f} us por clasificacion (Lex: una llamada de red, mas Translate si no es espanol)")
+
+
+if __name__ == '__main__':
+    main()
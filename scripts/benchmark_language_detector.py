@@ -0,0 +1,85 @@
+"""
+Benchmark y reporte de precision del detector de idioma local.
+Ejecutar: python scripts/benchmark_language_detector.py
+
+Evalua sobre la particion 'test' de data/language_detection/corpus.jsonl
+(no usada para entrenar) y muestra cuantas consultas se resolverian sin
+llamar a Comprehend para distintos umbrales de confianza. Las muestras en
+idiomas no soportados (incluido nl, sin perfil) deben ir a Comprehend:
+resolverlas localmente cuenta como error.
+
+Termina con codigo 1 si alguna muestra no soportada se resuelve localmente
+con la configuracion actual.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from build_language_profiles import load_corpus
+from shared.config import Config
+from shared.language_detector import LanguageDetector
+
+THRESHOLDS = [0.0, 0.8, 0.9, 0.95, 0.99]
+
+
+def main():
+    detector = LanguageDetector.load()
+    if detector is None:
+        print("ERROR: Ejecutar primero scripts/build_language_profiles.py")
+        sys.exit(1)
+
+    samples = load_corpus('test')
+    predictions = [detector.detect(text) for text, _ in samples]
+    supported = set(Config.SUPPORTED_LANGUAGES)
+
+    print("=" * 60)
+    print(f"  Detector de idioma local - {len(samples)} muestras de prueba")
+    print("=" * 60)
+
+    print("\nPrecision por idioma (no soportados: acierto = a Comprehend):")
+    for language in sorted({lang for _, lang in samples}):
+        pairs = [(pred, conf) for (pred, conf), (_, gold) in zip(predictions, samples) if gold == language]
+        if language in supported:
+            correct = sum(1 for pred, _ in pairs if pred == language)
+        else:
+            correct = sum(1 for _, conf in pairs if conf < Config.LANGUAGE_DETECT_MIN_CONFIDENCE)
+        print(f"  {language}: {correct}/{len(pairs)} ({correct / len(pairs):.1%})")
+
+    print(f"\n{'umbral':>8} | {'local':>8} | {'precision local':>16} | {'a Comprehend':>12} | {'no soportados locales':>21}")
+    print("-" * 78)
+    for threshold in THRESHOLDS:
+        local = [(pred, gold) for (pred, conf), (_, gold) in zip(predictions, samples) if conf >= threshold]
+        correct = sum(1 for pred, gold in local if pred == gold)
+        accuracy = correct / len(local) if local else 0.0
+        unsupported = sum(1 for _, gold in local if gold not in supported)
+        print(f"{threshold:>8.2f} | {len(local) / len(samples):>7.1%} | {accuracy:>15.1%} | "
+              f"{1 - len(local) / len(samples):>11.1%} | {unsupported:>21}")
+
+    print(f"\nErrores (umbral actual {Config.LANGUAGE_DETECT_MIN_CONFIDENCE}):")
+    failures = 0
+    for (pred, conf), (text, gold) in zip(predictions, samples):
+        if gold not in supported and conf >= Config.LANGUAGE_DETECT_MIN_CONFIDENCE:
+            failures += 1
+            print(f"  [{gold}->{pred} {conf:.2f}] {text}  (no soportado resuelto localmente)")
+        elif gold in supported and pred != gold and conf > 0:
+            print(f"  [{gold}->{pred} {conf:.2f}] {text}")
+
+    runs = 20
+    started = time.perf_counter()
+    for _ in range(runs):
+        for text, _ in samples:
+            detector.detect(text)
+    per_call_us = (time.perf_counter() - started) * 1e6 / (runs * len(samples))
+    print(f"\nLatencia media: {per_call_us:.0f} us por deteccion (Comprehend: una llamada de red)")
+
+    if failures:
+        print(f"ERROR: {failures} muestras en idiomas no soportados no pasarian por Comprehend")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
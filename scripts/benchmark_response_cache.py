@@ -0,0 +1,66 @@
+"""
+Verificacion de las claves de la cache de respuestas generadas.
+Ejecutar: python scripts/benchmark_response_cache.py
+
+Comprueba que variantes de mayusculas, acentos y puntuacion de un mismo
+mensaje comparten entrada, y que los mensajes sin letras latinas ni digitos
+(emoji, CJK, cirilico...) no se cachean: se normalizan a una cadena vacia y
+compartirian una sola entrada entre mensajes distintos.
+
+Termina con codigo 1 si algun caso no se comporta asi.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+from shared.response_cache import LRUCache, ResponseCache
+
+SAME_KEY = [
+    ('cuanto tarda el envio', 'Cuánto tarda el envío?'),
+    ('puedo pagar con tarjeta', '  PUEDO pagar con tarjeta!!'),
+]
+BYPASSED = ['👍', '🙏🙏', '你好', '配送需要多久', 'привет', '?!', '']
+ITERATIONS = 10000
+
+
+def make_key(cache, prompt):
+    return cache.make_key(prompt, 'ShippingIntent', 'es', 'contexto')
+
+
+def main():
+    cache = ResponseCache(LRUCache())
+    failures = []
+
+    print("=" * 60)
+    print("  Claves de la cache de respuestas")
+    print("=" * 60)
+    for first, second in SAME_KEY:
+        shared = make_key(cache, first) == make_key(cache, second)
+        print(f"  {first!r} / {second!r}: {'misma clave' if shared else 'claves distintas'}")
+        if not shared:
+            failures.append(f"{first!r} y {second!r} no comparten clave")
+
+    for prompt in BYPASSED:
+        key = make_key(cache, prompt)
+        print(f"  {prompt!r}: {'sin cache' if key is None else 'cacheado'}")
+        if key is not None:
+            failures.append(f"{prompt!r} se cachea con una clave vacia")
+
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        make_key(cache, SAME_KEY[0][1])
+    elapsed_us = (time.perf_counter() - started) / ITERATIONS * 1e6
+    print(f"\nmake_key: {elapsed_us:.1f} us por mensaje, {cache.bypassed} sin cache")
+
+    if failures:
+        for failure in failures:
+            print(f"ERROR: {failure}")
+        sys.exit(1)
+    print("OK: variantes comparten clave y mensajes sin texto latino no se cachean")
+
+
+if __name__ == '__main__':
+    main()
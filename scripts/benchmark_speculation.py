@@ -0,0 +1,125 @@
+"""
+Reporte de aciertos de la generacion especulativa del orquestador.
+Ejecutar: python scripts/benchmark_speculation.py
+
+Usa el mismo camino que un mensaje real: start_speculation arma el contexto
+y el perfil con el intent que adivina el pre-clasificador local, y el turno
+los compara con los de generation_request para el intent que da Lex (aqui,
+la etiqueta de la particion 'test' de data/intent_classification/utterances.jsonl).
+No se llama a Bedrock: el cliente de prueba solo registra la peticion.
+
+Muestra, por umbral de confianza, cuantos mensajes que van a Lex se
+especularian y cuantas especulaciones se aprovechan. Termina con error si
+un caso de acierto no coincide o uno de fallo se adopta.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['BEDROCK_SPECULATIVE'] = 'true'
+
+from build_intent_model import load_corpus
+from handlers.orchestrator import handler as orchestrator
+from shared.config import Config
+from shared.models import SessionState
+from shared.speculation import DISCARD_CONTEXT, DISCARD_PROFILE, Speculator
+
+THRESHOLDS = [0.3, 0.4, 0.5, 0.6, 0.7]
+SENTIMENTS = ['NEUTRAL', 'NEGATIVE']
+
+
+class DryRunBedrock:
+    """Cliente que no genera nada: solo deja que la especulacion termine."""
+
+    last_response_degraded = False
+
+    def generate_response_stream(self, prompt, context, on_delta=None, profile=None, cancel=None):
+        return '', None
+
+
+def sample_state():
+    """Sesion con un turno previo, como la mayoria de los mensajes reales."""
+    state = SessionState(session_id='benchmark', turns=[])
+    state.turns.append({'u': 'hola', 'b': 'Hola, en que puedo ayudarte?', 'i': 'GreetingIntent'})
+    return state
+
+
+def outcome(speculation, intent, sentiment, state):
+    """'hit' o el motivo de descarte, comparando con la peticion final."""
+    built_context, profile = orchestrator.generation_request(intent, sentiment, 'es', state)
+    if speculation.matches(built_context.text, profile):
+        return 'hit'
+    return DISCARD_CONTEXT if built_context.text != speculation.context else DISCARD_PROFILE
+
+
+def check_cases(classifier, state):
+    """Un acierto y un fallo por el camino real de start_speculation."""
+    text = 'cuanto tarda en llegar mi pedido'
+    guess = classifier.classify(text)
+    failures = []
+
+    speculation = orchestrator.start_speculation(text, 'es', guess, 'NEUTRAL', state)
+    if speculation is None:
+        failures.append(f"no se especulo '{text}' ({guess[0]} {guess[1]:.2f})")
+    else:
+        hit = outcome(speculation, guess[0], 'NEUTRAL', state)
+        miss = outcome(speculation, 'FallbackIntent', 'NEUTRAL', state)
+        print(f"\nCaso '{text}' ({guess[0]} {guess[1]:.2f}): Lex {guess[0]} -> {hit}, Lex FallbackIntent -> {miss}")
+        if hit != 'hit':
+            failures.append(f"acierto descartado ({hit})")
+        if miss == 'hit':
+            failures.append("fallo adoptado")
+
+    if orchestrator.start_speculation(text, 'es', (guess[0], 0.0), 'NEUTRAL', state) is not None:
+        failures.append("se especulo sin confianza")
+    return failures
+
+
+def main():
+    classifier = orchestrator.intent_classifier
+    if classifier is None:
+        print("ERROR: Ejecutar primero scripts/build_intent_model.py")
+        sys.exit(1)
+    orchestrator.speculator = Speculator(DryRunBedrock, max_workers=1)
+    state = sample_state()
+
+    # Solo especulan los mensajes que no se resuelven sin Lex
+    samples = [
+        (text, gold, classifier.classify(text)) for text, gold in load_corpus('test')
+    ]
+    samples = [sample for sample in samples if not orchestrator.classify_locally(sample[2])]
+
+    print("=" * 64)
+    print(f"  Generacion especulativa - {len(samples)} mensajes que van a Lex")
+    print("=" * 64)
+    print(f"\n{'umbral':>8} | {'especulados':>11} | {'aciertos':>8} | {'tasa':>6} | {'descartes':>9}")
+    print("-" * 56)
+    for threshold in THRESHOLDS:
+        started = hits = 0
+        for text, gold, (guess, confidence) in samples:
+            if confidence < threshold:
+                continue
+            for sentiment in SENTIMENTS:
+                built_context, profile = orchestrator.generation_request(guess, sentiment, 'es', state)
+                final_context, final_profile = orchestrator.generation_request(gold, sentiment, 'es', state)
+                started += 1
+                hits += built_context.text == final_context.text and profile == final_profile
+        rate = hits / started if started else 0.0
+        print(f"{threshold:>8.2f} | {started:>11} | {hits:>8} | {rate:>5.1%} | {started - hits:>9}")
+
+    print(f"\nUmbral actual: {Config.BEDROCK_SPECULATIVE_MIN_CONFIDENCE}")
+    failures = check_cases(classifier, state)
+    if failures:
+        for failure in failures:
+            print(f"ERROR: {failure}")
+        sys.exit(1)
+    print("OK: acierto adoptado y fallo descartado")
+
+
+if __name__ == '__main__':
+    main()
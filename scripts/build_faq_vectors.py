@@ -0,0 +1,118 @@
+"""
+Script para construir la matriz de vectores de FAQs para el Lambda Layer.
+Ejecutar: python scripts/build_faq_vectors.py [directorio_salida]
+
+Genera faq_vectors.npy, faq_idf.npy y faq_vectors.json a partir de
+data/knowledge_base/faqs.json y de la particion 'train' de
+data/knowledge_base/faq_paraphrases.jsonl (parafrasis etiquetadas y mensajes
+fuera de alcance, con topic_id null). Por defecto se escriben en
+backend/layers/shared/python/artifacts (/opt/python/artifacts en Lambda).
+
+Tambien precalcula el indice BM25 de las mismas FAQs (faq_bm25.npz y
+faq_bm25.json), para que Lambda no lo construya dentro de una peticion.
+
+faqs.json debe ser lo mismo que se cargo en DynamoDB (seed-database.py): en
+Lambda las FAQs cuya huella no coincide con la tabla no se responden.
+"""
+
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+import numpy as np
+
+from shared.faq_vectors import (
+    DEFAULT_DIM, IDF_FILE, MATRIX_FILE, METADATA_FILE, NGRAM_RANGE,
+    SemanticFAQMatcher, build_matrix, faq_fingerprint,
+)
+from shared.config import Config
+from shared.faq_search import INDEX_FILE, INDEX_METADATA_FILE, FAQSearchEngine
+from shared.models import FAQItem
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PARAPHRASES_PATH = PROJECT_ROOT / 'data' / 'knowledge_base' / 'faq_paraphrases.jsonl'
+DEFAULT_OUTPUT = PROJECT_ROOT / 'backend' / 'layers' / 'shared' / 'python' / 'artifacts'
+
+# Parafrasis para verificar la matriz generada
+SAMPLE_QUERIES = [
+    'cuanto tarda en llegar mi pedido',
+    'puedo pagar con tarjeta',
+    'how can I return an item',
+    'qual o horario de funcionamento',
+]
+
+
+def load_faqs():
+    """Cargar FAQs desde archivo JSON."""
+    faq_path = PROJECT_ROOT / 'data' / 'knowledge_base' / 'faqs.json'
+    if not faq_path.exists():
+        print(f"ERROR: Archivo no encontrado: {faq_path}")
+        sys.exit(1)
+
+    with open(faq_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    return [FAQItem(**faq) for faq in data.get('faqs', [])]
+
+
+def load_examples(split):
+    """Cargar (texto, topic_id o None) de una particion de las parafrasis."""
+    examples = []
+    with open(PARAPHRASES_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry['split'] == split:
+                    examples.append((entry['text'], entry['topic_id']))
+    return examples
+
+
+def main():
+    output_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_OUTPUT
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    faqs = load_faqs()
+    examples = load_examples('train')
+    started = time.perf_counter()
+    matrix, idf, row_faq = build_matrix(faqs, DEFAULT_DIM, examples)
+    print(f"Matriz {matrix.shape} construida en {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    np.save(output_dir / MATRIX_FILE, matrix)
+    np.save(output_dir / IDF_FILE, idf)
+    with open(output_dir / METADATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'dim': DEFAULT_DIM,
+            'ngram_range': list(NGRAM_RANGE),
+            'row_faq': row_faq,
+            'faqs': [asdict(faq) for faq in faqs],
+            'fingerprints': [faq_fingerprint(faq) for faq in faqs],
+        }, f, ensure_ascii=False)
+
+    started = time.perf_counter()
+    FAQSearchEngine(faqs).save(str(output_dir))
+    print(f"Indice BM25 construido en {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    files = (MATRIX_FILE, IDF_FILE, METADATA_FILE, INDEX_FILE, INDEX_METADATA_FILE)
+    size_kb = sum((output_dir / name).stat().st_size for name in files) / 1024
+    print(f"Artefactos escritos en {output_dir} ({size_kb:.0f} KB)")
+
+    matcher = SemanticFAQMatcher.load(str(output_dir))
+    print(f"\nVerificacion ({len(examples)} ejemplos de entrenamiento, umbral {Config.FAQ_SEMANTIC_MIN_SCORE}, "
+          f"margen {Config.FAQ_SEMANTIC_MIN_MARGIN}):")
+    for query in SAMPLE_QUERIES:
+        match = matcher.match(query, Config.FAQ_SEMANTIC_MIN_SCORE, Config.FAQ_SEMANTIC_MIN_MARGIN)
+        print(f"  {query!r} -> {f'{match.faq.topic_id} ({match.score:.2f}, +{match.margin:.2f})' if match else 'sin respuesta'}")
+
+    engine = FAQSearchEngine.load(str(output_dir))
+    if engine is None or engine.for_faqs(faqs) is None:
+        print("ERROR: el indice BM25 guardado no corresponde a faqs.json")
+        sys.exit(1)
+    print(f"Indice BM25 verificado ({len(engine.fingerprints)} FAQs)")
+
+
+if __name__ == '__main__':
+    main()
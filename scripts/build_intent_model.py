@@ -0,0 +1,111 @@
+"""
+Script para construir el modelo del pre-clasificador de intents local.
+Ejecutar: python scripts/build_intent_model.py [utterances_registradas.jsonl ...]
+
+Entrena con los sampleUtterances de scripts/create_lex_intents.py y
+scripts/intents/*.json, la particion 'train' de
+data/intent_classification/utterances.jsonl (incluye en/pt) y, opcionalmente,
+utterances registradas en produccion (JSONL con "text" e "intent", p. ej.
+mensajes que Lex clasifico con alta confianza). El resultado se escribe en
+backend/src/shared/intent_model.json, junto con la tabla de calibracion
+(similitud -> probabilidad de acierto) medida dejando fuera cada utterance
+de entrenamiento en su turno.
+"""
+
+import ast
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+from shared.intent_classifier import MODEL_FILE, IntentClassifier, build_calibration, build_model
+
+PROJECT_ROOT = Path(__file__).parent.parent
+LEX_INTENTS_SCRIPT = PROJECT_ROOT / 'scripts' / 'create_lex_intents.py'
+INTENTS_DIR = PROJECT_ROOT / 'scripts' / 'intents'
+CORPUS_PATH = PROJECT_ROOT / 'data' / 'intent_classification' / 'utterances.jsonl'
+
+
+def load_lex_intent_samples():
+    """sampleUtterances de INTENTS en create_lex_intents.py (sin importarlo: crea un cliente de Lex)."""
+    tree = ast.parse(LEX_INTENTS_SCRIPT.read_text(encoding='utf-8'))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'INTENTS' for t in node.targets):
+            intents = ast.literal_eval(node.value)
+            break
+    else:
+        print(f"ERROR: INTENTS no encontrado en {LEX_INTENTS_SCRIPT}")
+        sys.exit(1)
+
+    samples = []
+    for intent in intents:
+        for utterance in intent.get('sampleUtterances', []):
+            samples.append((utterance['utterance'], intent['intentName']))
+    for path in sorted(INTENTS_DIR.glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            intent = json.load(f)
+        for utterance in intent.get('sampleUtterances', []):
+            samples.append((utterance['utterance'], intent['intentName']))
+    return samples
+
+
+def load_corpus(split):
+    """Cargar muestras etiquetadas (texto, intent) de una particion del corpus."""
+    samples = []
+    with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry['split'] == split:
+                    samples.append((entry['text'], entry['intent']))
+    return samples
+
+
+def load_logged(paths):
+    """Utterances registradas en produccion (JSONL con "text" e "intent")."""
+    samples = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get('text') and entry.get('intent'):
+                        samples.append((entry['text'], entry['intent']))
+    return samples
+
+
+def leave_one_out(samples):
+    """(similitud, acierto) de cada utterance clasificada con un modelo entrenado sin ella."""
+    unique = list(dict.fromkeys((text.strip(), intent) for text, intent in samples if text.strip()))
+    scored = []
+    for i, (text, intent) in enumerate(unique):
+        classifier = IntentClassifier(build_model(unique[:i] + unique[i + 1:]))
+        predicted, similarity = classifier.classify(text)
+        scored.append((similarity, predicted == intent))
+    return scored
+
+
+def main():
+    logged = load_logged(sys.argv[1:])
+    samples = load_lex_intent_samples() + load_corpus('train') + logged
+    model = build_model(samples)
+    model['calibration'] = build_calibration(leave_one_out(samples))
+
+    with open(MODEL_FILE, 'w', encoding='utf-8') as f:
+        json.dump(model, f, separators=(',', ':'), sort_keys=True)
+
+    size_kb = Path(MODEL_FILE).stat().st_size / 1024
+    per_intent = Counter(intent for intent, _ in model['examples'])
+    print(f"Modelo construido con {len(model['examples'])} utterances ({len(logged)} registradas)")
+    for intent, count in sorted(per_intent.items()):
+        print(f"  {intent}: {count}")
+    print("Calibracion (similitud >= -> probabilidad de acierto):")
+    for edge, probability in model['calibration']:
+        print(f"  {edge:.1f}: {probability:.3f}")
+    print(f"Escrito en {MODEL_FILE} ({size_kb:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
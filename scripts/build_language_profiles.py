@@ -0,0 +1,62 @@
+"""
+Script para construir los perfiles de trigramas del detector de idioma local.
+Ejecutar: python scripts/build_language_profiles.py
+
+Entrena con las FAQs trilingues (data/knowledge_base/faqs.json) y la
+particion 'train' de data/language_detection/corpus.jsonl, que incluye
+idiomas no soportados (fr, de, it) para reconocerlos como tales. El
+resultado se escribe en backend/src/shared/language_profiles.json.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+from shared.language_detector import PROFILES_FILE, build_profiles
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CORPUS_PATH = PROJECT_ROOT / 'data' / 'language_detection' / 'corpus.jsonl'
+FAQ_PATH = PROJECT_ROOT / 'data' / 'knowledge_base' / 'faqs.json'
+
+
+def load_corpus(split):
+    """Cargar muestras etiquetadas (texto, idioma) de una particion del corpus."""
+    samples = []
+    with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry['split'] == split:
+                    samples.append((entry['text'], entry['language']))
+    return samples
+
+
+def load_faq_samples():
+    """Preguntas y respuestas de las FAQs en cada idioma."""
+    with open(FAQ_PATH, 'r', encoding='utf-8') as f:
+        faqs = json.load(f).get('faqs', [])
+
+    samples = []
+    for faq in faqs:
+        for language in ('es', 'en', 'pt'):
+            samples.append((faq[f'question_{language}'], language))
+            samples.append((faq[f'answer_{language}'], language))
+    return samples
+
+
+def main():
+    samples = load_faq_samples() + load_corpus('train')
+    profiles = build_profiles(samples)
+
+    with open(PROFILES_FILE, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+    size_kb = Path(PROFILES_FILE).stat().st_size / 1024
+    print(f"Perfiles construidos con {len(samples)} muestras: {', '.join(sorted(profiles))}")
+    print(f"Escritos en {PROFILES_FILE} ({size_kb:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -83,6 +83,9 @@ $sharedDest = Join-Path $layerPath "shared"
 if (Test-Path $sharedSource) {
     Copy-Item -Path $sharedSource -Destination $sharedDest -Recurse -Force
 }
+
+# Matriz de vectores de FAQs para el matcher semantico e indice BM25
+python scripts/build_faq_vectors.py (Join-Path $layerPath "artifacts")
 Write-Host "  ✓ Lambda Layer construido" -ForegroundColor Green
 Write-Host ""
 
@@ -70,6 +70,7 @@ echo -e "${YELLOW}[4/7] Construyendo Lambda Layer...${NC}"
 mkdir -p backend/layers/shared/python
 pip3 install -r backend/layers/shared/requirements.txt -t backend/layers/shared/python --quiet
 cp -r backend/src/shared backend/layers/shared/python/
+python3 scripts/build_faq_vectors.py backend/layers/shared/python/artifacts
 echo -e "  ${GREEN}✓ Lambda Layer construido${NC}"
 echo ""
 
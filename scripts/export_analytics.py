@@ -0,0 +1,47 @@
+"""
+Script para exportar eventos de analytics a JSON Lines.
+Ejecutar: python scripts/export_analytics.py TIPO DESDE HASTA [archivo_salida]
+
+Ejemplo: python scripts/export_analytics.py MESSAGE 2024-05-01 2024-05-31 mayo.jsonl
+
+Los eventos se leen pagina por pagina con DynamoClient.iter_analytics_by_type
+y se escriben a medida que llegan, asi que la memoria usada no depende de
+cuantos eventos haya en el rango.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+from shared.dynamo_client import DynamoClient
+
+PAGE_SIZE = 1000
+
+
+def main():
+    if len(sys.argv) < 4:
+        print(__doc__)
+        sys.exit(1)
+
+    metric_type, start_date, end_date = sys.argv[1:4]
+    output = open(sys.argv[4], 'w', encoding='utf-8') if len(sys.argv) > 4 else sys.stdout
+
+    client = DynamoClient()
+    started = time.perf_counter()
+    count = 0
+    try:
+        for item in client.iter_analytics_by_type(metric_type, start_date, end_date, page_size=PAGE_SIZE):
+            output.write(json.dumps(item, ensure_ascii=False, default=str) + '\n')
+            count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"{count} eventos exportados en {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
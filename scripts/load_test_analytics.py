@@ -0,0 +1,194 @@
+"""
+Prueba de carga de escrituras de analytics con y sin sharding.
+Ejecutar: python scripts/load_test_analytics.py [eventos] [hilos]
+
+Eventos crudos: escribe eventos LOADTEST con batch_write_item desde varios
+hilos, primero con una sola particion (METRIC#LOADTEST) y luego repartidos
+en ANALYTICS_WRITE_SHARDS shards.
+
+Rollups: simula una invocacion por evento, cada una con su UpdateItem ADD
+sobre el rollup horario (la escritura que recibe todo el trafico), primero
+sobre ROLLUP#<metrica> y luego repartida en shards. Despues lee el rollup
+con DynamoClient.get_analytics_rollup y comprueba que la suma de los shards
+coincide con las actualizaciones aceptadas.
+
+Al final cuenta, para la mezcla real (una actualizacion de rollup por
+invocacion y eventos crudos muestreados a ANALYTICS_RAW_SAMPLE_RATE), cuantas
+escrituras recibe la particion mas cargada de cada camino.
+
+Los reintentos de botocore se desactivan para que los throttles se vean en
+el reporte. Todo expira por TTL en una hora.
+"""
+
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend' / 'src'))
+
+import boto3
+from botocore.config import Config as BotoConfig
+
+from shared.config import Config
+from shared.dynamo_client import DynamoClient
+from shared.models import AnalyticsEvent, new_event_id
+
+DEFAULT_EVENTS = 20000
+DEFAULT_THREADS = 32
+
+
+def make_events(count):
+    """Generar eventos de prueba con metadata similar a MESSAGE."""
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    return [
+        AnalyticsEvent(
+            metric_type='LOADTEST',
+            event_id=new_event_id(),
+            date=today,
+            value=1,
+            metadata={'sessionId': f'loadtest-{i}', 'intent': 'FAQIntent', 'language': 'es'},
+            ttl=int(time.time()) + 3600,
+        )
+        for i in range(count)
+    ]
+
+
+def write_batch(dynamodb, items):
+    """Escribir un lote una sola vez; devuelve (escritos, throttles)."""
+    requests = [{'PutRequest': {'Item': item}} for item in items]
+    try:
+        response = dynamodb.batch_write_item(RequestItems={Config.ANALYTICS_TABLE: requests})
+    except Exception as e:
+        if 'Throughput' in str(e) or 'Throttl' in str(e):
+            return 0, len(items)
+        raise
+    unprocessed = len(response.get('UnprocessedItems', {}).get(Config.ANALYTICS_TABLE, []))
+    return len(items) - unprocessed, unprocessed
+
+
+def unretried_resource(threads):
+    """Recurso DynamoDB sin reintentos, para contar los throttles."""
+    return boto3.resource(
+        'dynamodb',
+        region_name=Config.AWS_REGION,
+        config=BotoConfig(retries={'max_attempts': 1}, max_pool_connections=threads),
+    )
+
+
+def run(events, shards, threads):
+    """Ejecutar una ronda y devolver (eventos/s, escritos, throttles)."""
+    dynamodb = unretried_resource(threads)
+    items = [
+        event.to_dynamo_item(shards, Config.ANALYTICS_SHARD_STRATEGY, date_indexed=Config.ANALYTICS_DATE_INDEX_WRITES)
+        for event in events
+    ]
+    batches = [items[i:i + 25] for i in range(0, len(items), 25)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda batch: write_batch(dynamodb, batch), batches))
+    elapsed = time.perf_counter() - started
+
+    written = sum(w for w, _ in results)
+    throttled = sum(t for _, t in results)
+    return written / elapsed, written, throttled
+
+
+def update_rollup(table, metric_type, hour, counters, shards):
+    """Una invocacion: un UpdateItem ADD; devuelve 1 si se acepto, 0 si hubo throttle."""
+    ttl = int(time.time()) + 3600
+    try:
+        table.update_item(**DynamoClient.rollup_update_args(metric_type, hour, counters, ttl, shards))
+    except Exception as e:
+        if 'Throughput' in str(e) or 'Throttl' in str(e):
+            return 0
+        raise
+    return 1
+
+
+def run_rollups(invocations, shards, threads):
+    """Ronda de rollups; devuelve (actualizaciones/s, aceptadas, throttles, suma leida)."""
+    table = unretried_resource(threads).Table(Config.ANALYTICS_TABLE)
+    # Metrica propia por ronda para poder verificar la suma al leer
+    metric_type = f'LOADTEST{new_event_id()}'
+    hour = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H')
+    counters = {'count': 1, 'intent#FAQIntent': 1, 'language#es': 1}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(
+            lambda _: update_rollup(table, metric_type, hour, counters, shards),
+            range(invocations),
+        ))
+    elapsed = time.perf_counter() - started
+
+    accepted = sum(results)
+    rollup = DynamoClient().get_analytics_rollup(metric_type, hour, hour, granularity='hour')
+    read_back = sum(bucket.get('count', 0) for bucket in rollup.values())
+    return accepted / elapsed, accepted, invocations - accepted, read_back
+
+
+def partition_load(messages):
+    """Escrituras por particion de la mezcla real para N mensajes (sin AWS)."""
+    hour = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H')
+    raw = Counter()
+    rollups = Counter()
+    for event in make_events(messages):
+        update = DynamoClient.rollup_update_args('LOADTEST', hour, {'count': 1}, 0, Config.ANALYTICS_ROLLUP_SHARDS)
+        rollups[update['Key']['PK']] += 1
+        if random.random() < Config.ANALYTICS_RAW_SAMPLE_RATE:
+            raw[event.to_dynamo_item(Config.ANALYTICS_WRITE_SHARDS, Config.ANALYTICS_SHARD_STRATEGY)['PK']] += 1
+    return raw, rollups
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EVENTS
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_THREADS
+
+    print("=" * 64)
+    print(f"  Carga de analytics: {count} eventos, {threads} hilos, tabla {Config.ANALYTICS_TABLE}")
+    print("=" * 64)
+
+    print("\nEventos crudos (batch_write_item):")
+    print(f"\n{'shards':>8} | {'eventos/s':>10} | {'escritos':>9} | {'throttles':>9}")
+    print("-" * 46)
+
+    baseline = None
+    for shards in (1, Config.ANALYTICS_WRITE_SHARDS):
+        rate, written, throttled = run(make_events(count), shards, threads)
+        baseline = baseline or rate
+        print(f"{shards:>8} | {rate:>10.0f} | {written:>9} | {throttled:>9}")
+
+    print(f"\nMejora con {Config.ANALYTICS_WRITE_SHARDS} shards: {rate / baseline:.1f}x")
+
+    print("\nRollups horarios (un UpdateItem ADD por invocacion):")
+    print(f"\n{'shards':>8} | {'updates/s':>10} | {'aceptados':>9} | {'throttles':>9} | {'suma leida':>10}")
+    print("-" * 59)
+
+    baseline = None
+    for shards in (1, Config.ANALYTICS_ROLLUP_SHARDS):
+        rate, accepted, throttled, read_back = run_rollups(count, shards, threads)
+        baseline = baseline or rate
+        status = '' if read_back == accepted else '  ERROR: la suma no coincide'
+        print(f"{shards:>8} | {rate:>10.0f} | {accepted:>9} | {throttled:>9} | {read_back:>10}{status}")
+
+    print(f"\nMejora con {Config.ANALYTICS_ROLLUP_SHARDS} shards: {rate / baseline:.1f}x")
+
+    raw, rollups = partition_load(count)
+    print(f"\nMezcla real para {count} mensajes (muestreo de crudos {Config.ANALYTICS_RAW_SAMPLE_RATE:.0%}):")
+    print(f"\n{'camino':>10} | {'shards':>7} | {'escrituras':>10} | {'particion mas cargada':>22}")
+    print("-" * 60)
+    for name, shards, counts in (
+        ('crudos', Config.ANALYTICS_WRITE_SHARDS, raw),
+        ('rollups', Config.ANALYTICS_ROLLUP_SHARDS, rollups),
+    ):
+        hottest = max(counts.values()) if counts else 0
+        print(f"{name:>10} | {shards:>7} | {sum(counts.values()):>10} | {hottest:>22}")
+
+
+if __name__ == '__main__':
+    main()